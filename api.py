@@ -1,5 +1,12 @@
-from fastapi import FastAPI, HTTPException
+import asyncio
+import hmac
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from typing import Optional
+from fastapi import FastAPI, Header, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
 from scrapers import (
     scrape_addiyar, 
     scrape_annahar, 
@@ -16,11 +23,37 @@ from scrapers import (
     scrape_lbcgroup,
     scrape_almarkazia
 ) 
+from scrapers.article_cache import article_cache
+from scrapers.article_store import article_store
+from scrapers.routing import routing_table
+from scrapers.circuit_breaker import site_breakers, host_breakers
+from scrapers.deadlines import overall_deadline
+from scrapers import incremental
+from scrapers.runner import run_scraper_async
+from scrapers.scrapfly_client import scrapfly_client
+from scrapers import metrics, responses
+from scrapers.profiling import profile_scraper_async, load_profile
+from scrapers.snapshots import SnapshotStore
+from config import config
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Keeps the per-site snapshots warm in the background while the API runs.
+    """
+    refresher = None
+    if config.SNAPSHOT_REFRESH_ENABLED:
+        refresher = asyncio.create_task(snapshot_store.run_forever())
+    yield
+    if refresher:
+        refresher.cancel()
+    scrapfly_client.close()
 
 app = FastAPI(
     title="Lebanese News Scraper API",
     description="API for scraping Lebanese news sites with anti-blocking capabilities",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Add CORS middleware
@@ -50,6 +83,165 @@ SCRAPER_MAPPING = {
     "almarkazia": scrape_almarkazia,
 }
 
+# Latest result per site, served to clients without waiting on upstream sites
+snapshot_store = SnapshotStore(SCRAPER_MAPPING)
+
+class SingleFlight:
+    """
+    Coalesces concurrent identical API calls. While a call for a key is in
+    flight, later callers with the same key wait for its outcome (response or
+    HTTP error) instead of running it again. A caller that disconnects only
+    stops waiting; the shared call finishes for the others.
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.shared = 0
+        self._in_flight = {}
+
+    async def do(self, key, function, *args):
+        task = self._in_flight.get(key)
+        if task is None:
+            self.calls += 1
+            task = asyncio.ensure_future(function(*args))
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done: self._finished(key, done))
+        else:
+            self.shared += 1
+        return await asyncio.shield(task)
+
+    def _finished(self, key, task):
+        self._in_flight.pop(key, None)
+        # Mark the outcome as retrieved even when every caller went away before it was ready
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self):
+        return {"calls": self.calls, "shared": self.shared, "in_flight": len(self._in_flight)}
+
+# Identical /scrape/{site_name} and /scrape-all calls arriving together share one response
+single_flight = SingleFlight()
+
+def _freshness(snapshot):
+    """
+    Describes where a result came from and how old it is.
+    """
+    if snapshot is None:
+        return {"source": "live", "scraped_at": datetime.now(timezone.utc).isoformat(), "age_seconds": 0.0, "stale": False}
+    freshness = {
+        "source": "snapshot",
+        "scraped_at": datetime.fromtimestamp(snapshot["scraped_at"], timezone.utc).isoformat(),
+        "age_seconds": round(snapshot_store.age(snapshot), 1),
+        "stale": snapshot_store.is_stale(snapshot)
+    }
+    if snapshot["last_error"]:
+        freshness["refresh_error"] = snapshot["last_error"]
+    return freshness
+
+def _site_entry(result, freshness):
+    """
+    Builds the per-site entry reported by /scrape-all and its streaming variant.
+    """
+    if result["status"] in ("success", "no_content"):
+        return {
+            "status": "success",
+            "articles_count": len(result["articles"]),
+            "elapsed_seconds": result["elapsed_seconds"],
+            "timed_out": result.get("timed_out", False),
+            **freshness,
+            "articles": result["articles"]
+        }
+    return {
+        "status": result["status"],
+        "error": result["error"],
+        "articles_count": 0,
+        "elapsed_seconds": result["elapsed_seconds"],
+        "timed_out": result.get("timed_out", False),
+        **freshness,
+        "articles": []
+    }
+
+async def _live_result(site_name, result):
+    """
+    Pairs a fresh runner result with its freshness. A scrape skipped by an
+    open circuit breaker is answered with the site's last snapshot that had
+    articles instead, when there is one.
+    """
+    if result["status"] == "circuit_open":
+        snapshot = await snapshot_store.get(site_name)
+        if snapshot is not None and snapshot["result"]["articles"]:
+            return snapshot["result"], _freshness(snapshot)
+    return result, _freshness(None)
+
+async def _get_result(site_name, live):
+    """
+    Returns a site's result and freshness, answering from its snapshot unless
+    ``live`` is set or no snapshot exists yet. Stale snapshots are returned
+    as-is while a background revalidation runs.
+    """
+    snapshot = None if live else await snapshot_store.get(site_name)
+    if snapshot is None:
+        return await _live_result(site_name, await snapshot_store.refresh(site_name))
+    if snapshot_store.is_stale(snapshot):
+        snapshot_store.revalidate(site_name)
+    return snapshot["result"], _freshness(snapshot)
+
+async def _get_new_result(site_name, live, since):
+    """
+    Like _get_result(), but keeps only the articles not covered by the
+    delivery cursor ``since`` and adds the next ``cursor`` to the result.
+    Without a usable snapshot the site is scraped incrementally: one
+    homepage fetch, plus article fetches for new articles only. Such a
+    partial result never replaces the site's snapshot.
+    """
+    snapshot = None if live else await snapshot_store.get(site_name)
+    if snapshot is None:
+        with incremental.since(since):
+            result = await run_scraper_async(site_name, SCRAPER_MAPPING[site_name])
+        result, freshness = await _live_result(site_name, result)
+    else:
+        if snapshot_store.is_stale(snapshot):
+            snapshot_store.revalidate(site_name)
+        result, freshness = snapshot["result"], _freshness(snapshot)
+    if result["status"] in ("success", "no_content") and "cursor" not in result:
+        articles, cursor = incremental.new_since(result["articles"], since)
+        result = dict(result, articles=articles, cursor=cursor)
+    return result, freshness
+
+def _parse_fields(fields, allowed=responses.ARTICLE_FIELDS):
+    """
+    Parses the fields= query option, raising a 400 for unknown fields.
+    """
+    try:
+        return responses.parse_fields(fields, allowed)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def _shape(entry, fields, offset=0, limit=None):
+    """
+    Returns a copy of a response entry with its articles paginated (offset,
+    limit) and projected to ``fields``. Paginated entries report their
+    offset and whether more articles follow; articles_count stays the total.
+    The entry itself may be shared by coalesced calls, so it is not changed.
+    """
+    shaped = {key: value for key, value in entry.items() if key != "articles"}
+    articles = entry["articles"]
+    if offset or limit is not None:
+        end = None if limit is None else offset + limit
+        shaped["offset"] = offset
+        shaped["has_more"] = end is not None and end < len(articles)
+        articles = articles[offset:end]
+    shaped["articles"] = responses.project(articles, fields)
+    return shaped
+
+async def _json_response(payload, accept_encoding):
+    """
+    Serializes and compresses a response in a worker thread, so large
+    payloads do not hold up the event loop.
+    """
+    body, headers = await asyncio.to_thread(responses.encode, payload, accept_encoding)
+    return Response(body, media_type="application/json", headers=headers)
+
 @app.get("/")
 async def root():
     """
@@ -62,6 +254,13 @@ async def root():
         "endpoints": {
             "scrape_site": "/scrape/{site_name}",
             "scrape_all": "/scrape-all",
+            "scrape_all_stream": "/scrape-all/stream",
+            "articles": "/articles",
+            "cache_stats": "/cache/stats",
+            "routing": "/routing",
+            "circuits": "/circuits",
+            "scrapfly_stats": "/scrapfly/stats",
+            "metrics": "/metrics",
             "health": "/health"
         }
     }
@@ -73,11 +272,106 @@ async def health_check():
     """
     return {"status": "healthy", "message": "API is running"}
 
+@app.get("/cache/stats")
+async def cache_stats():
+    """
+    Hit/miss counters for the article-body cache of this worker, and how many
+    API calls were answered by joining an identical call already in flight.
+    """
+    return {"article_cache": article_cache.stats(), "single_flight": single_flight.stats()}
+
+@app.get("/routing")
+async def routing():
+    """
+    The direct/Scrapfly route learned for every host this worker has fetched.
+    """
+    return {"hosts": routing_table.snapshot()}
+
+@app.get("/circuits")
+async def circuits():
+    """
+    Circuit breaker state of every site and host this worker has scraped.
+    """
+    return {"sites": site_breakers.snapshot(), "hosts": host_breakers.snapshot()}
+
+@app.get("/scrapfly/stats")
+async def scrapfly_stats():
+    """
+    Calls, cache hits, latency and credits spent by this worker's Scrapfly client.
+    """
+    return {"scrapfly": scrapfly_client.stats.snapshot()}
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    """
+    Fetch, parse and extract timings plus scrape counters of this worker, for Prometheus.
+    
+    Counters are per worker: with several workers (start.sh WORKERS) each
+    request to /metrics reaches one of them and sees only its counters.
+    """
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+def _profiling_allowed(token):
+    """
+    Profiling is open to everyone with PROFILING_ENABLED, otherwise it needs the admin PROFILE_TOKEN.
+    """
+    if config.PROFILING_ENABLED:
+        return True
+    return bool(config.PROFILE_TOKEN and token and hmac.compare_digest(token, config.PROFILE_TOKEN))
+
+@app.get("/profiles/{profile_id}", response_class=PlainTextResponse)
+async def get_profile(profile_id: str, x_profile_token: Optional[str] = Header(None)):
+    """
+    Folded stacks of a stored scrape profile, ready for flamegraph.pl or speedscope.
+    """
+    if not _profiling_allowed(x_profile_token):
+        raise HTTPException(status_code=403, detail="Profiling is disabled")
+    folded = await asyncio.to_thread(load_profile, profile_id)
+    if folded is None:
+        raise HTTPException(status_code=404, detail=f"Profile '{profile_id}' not found")
+    return PlainTextResponse(folded)
+
 @app.get("/scrape/{site_name}")
-async def scrape_site_by_name(site_name: str):
+async def scrape_site_by_name(
+    site_name: str,
+    live: bool = False,
+    since: Optional[str] = None,
+    fields: Optional[str] = None,
+    offset: int = Query(0, ge=0),
+    limit: Optional[int] = Query(None, ge=1, le=500),
+    profile: bool = False,
+    x_profile_token: Optional[str] = Header(None),
+    accept_encoding: Optional[str] = Header(None)
+):
     """
     Scrapes a specific news site by its name.
     
+    Answers from the site's background snapshot when one exists; pass
+    live=true to force a fresh scrape.
+    
+    Every response carries a next_cursor. Polling with since=<next_cursor>
+    returns only the articles that appeared since (possibly none, with a
+    200), each with its text, and a new next_cursor. Articles whose text
+    could not be fetched are returned again on the next poll. When the
+    site is scraped for such a call, articles the caller already has are
+    not fetched again, so a poll with nothing new costs one homepage fetch.
+    since= (empty) returns everything and starts polling.
+    
+    fields picks the article fields returned, comma-separated (e.g.
+    fields=headline,article_url); offset and limit return one page of the
+    articles, with has_more set when more follow. Paging cannot be combined
+    with since, whose next_cursor covers every article found. Responses are
+    compressed with zstd, br or gzip as the Accept-Encoding header allows.
+    
+    profile=true scrapes live under the sampling profiler and adds a
+    breakdown of the time spent (network, rate_limit, parse, selectors,
+    extract, waiting) to the response; the folded stacks are served at
+    /profiles/{id}. Needs PROFILING_ENABLED or an X-Profile-Token header
+    matching PROFILE_TOKEN.
+    
+    Concurrent calls for the same site and cursor share one response;
+    profiled calls always run on their own.
+    
     Available sites: addiyar, annahar, aljoumhouria, alakhbar, nidaalwatan, 
     aliwaa, elsharkonline, mtv, aljadeed, sawtbeirut, lebanondebate, 
     lebaneseforces, lbcgroup, almarkazia
@@ -90,47 +384,248 @@ async def scrape_site_by_name(site_name: str):
             status_code=404, 
             detail=f"Site '{site_name}' not found. Available sites: {available_sites}"
         )
+    # One name per site, so differently cased calls share a scrape
+    site_name = site_name.lower()
+    if since is not None:
+        if offset or limit is not None:
+            raise HTTPException(status_code=400, detail="offset and limit cannot be combined with since")
+        try:
+            incremental.decode_cursor(since)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    article_fields = _parse_fields(fields)
         
-    try:
-        scraped_data = scraper_function()
-        if not scraped_data:
-            raise HTTPException(status_code=404, detail=f"No articles found for {site_name}.")
-            
-        return {
-            "site": site_name,
-            "articles_count": len(scraped_data),
-            "articles": scraped_data
-        }
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"An error occurred while scraping {site_name}: {str(e)}")
+    if profile:
+        if not _profiling_allowed(x_profile_token):
+            raise HTTPException(status_code=403, detail="Profiling is disabled")
+        # Every profiled call gets its own scrape and profile
+        response = await _scrape_site(site_name, scraper_function, live, True, since)
+    else:
+        response = await single_flight.do(
+            ("scrape", site_name, live, since), _scrape_site, site_name, scraper_function, live, False, since
+        )
+    return await _json_response(_shape(response, article_fields, offset, limit), accept_encoding)
+
+async def _scrape_site(site_name, scraper_function, live, profile=False, since=None):
+    """
+    Builds the /scrape/{site_name} response, raising the HTTP error for failed scrapes.
+    """
+    profile_summary = None
+    if profile:
+        with incremental.since(since):
+            result, session = await profile_scraper_async(site_name, scraper_function)
+        freshness = _freshness(None)
+        profile_summary = session.summary()
+    elif since is not None:
+        result, freshness = await _get_new_result(site_name, live, since)
+    else:
+        result, freshness = await _get_result(site_name, live)
+    
+    # Failed scrapes are what profiles are for, so errors point at the stored profile too
+    profile_note = f" (profile: {profile_summary['folded_url']})" if profile_summary and session.stored else ""
+    if result["status"] == "circuit_open":
+        raise HTTPException(status_code=503, detail=f"Scraping {site_name} is paused: {result['error']}")
+    if result["status"] == "timeout":
+        raise HTTPException(status_code=504, detail=f"Scraping {site_name} timed out: {result['error']}{profile_note}")
+    if result["status"] == "error":
+        raise HTTPException(status_code=500, detail=f"An error occurred while scraping {site_name}: {result['error']}{profile_note}")
+    # Nothing new since the caller's cursor is a normal answer to a poll
+    if not result["articles"] and since is None:
+        raise HTTPException(status_code=404, detail=f"No articles found for {site_name}.{profile_note}")
+    if "cursor" in result:
+        next_cursor = result["cursor"]
+    else:
+        next_cursor = incremental.new_since(result["articles"], None)[1]
+        
+    return {
+        "site": site_name,
+        "articles_count": len(result["articles"]),
+        "elapsed_seconds": result["elapsed_seconds"],
+        **freshness,
+        **({"profile": profile_summary} if profile_summary else {}),
+        "next_cursor": next_cursor,
+        "articles": result["articles"]
+    }
 
 @app.get("/scrape-all")
-async def scrape_all_sites():
+async def scrape_all_sites(
+    live: bool = False,
+    deadline_ms: Optional[int] = Query(None, gt=0),
+    fields: Optional[str] = None,
+    offset: int = Query(0, ge=0),
+    limit: Optional[int] = Query(None, ge=1, le=500),
+    accept_encoding: Optional[str] = Header(None)
+):
     """
-    Scrapes all available news sites.
+    Returns the latest results of all available news sites.
+    
+    Results come from the background snapshots; sites without a snapshot are
+    scraped concurrently on the spot. Pass live=true to scrape every site now,
+    each under its own deadline (SITE_DEADLINE) with at most
+    SCRAPE_CONCURRENCY sites at once.
+    
+    deadline_ms bounds the whole request: every homepage and article fetch
+    stops when it runs out, and whatever finished is returned, with
+    timed_out set on the sites that were cut short.
+    
+    fields picks the article fields returned, comma-separated (e.g.
+    fields=headline,article_url for a listing without article texts);
+    offset and limit page through the articles of every site alike.
+    Responses are compressed with zstd, br or gzip as the Accept-Encoding
+    header allows.
+    
+    Concurrent calls with the same scrape parameters share one scrape.
     """
+    article_fields = _parse_fields(fields)
+    response = await single_flight.do(("scrape-all", live, deadline_ms), _scrape_all, live, deadline_ms)
+    results = {
+        site_name: _shape(entry, article_fields, offset, limit) for site_name, entry in response["results"].items()
+    }
+    return await _json_response(dict(response, results=results), accept_encoding)
+
+async def _scrape_all(live, deadline_ms):
+    """
+    Builds the /scrape-all response.
+    """
+    start = time.monotonic()
+    with overall_deadline(deadline_ms / 1000 if deadline_ms else None):
+        site_results = await _scrape_all_results(live)
+    
     results = {}
     total_articles = 0
     
-    for site_name, scraper_function in SCRAPER_MAPPING.items():
-        try:
-            scraped_data = scraper_function()
-            results[site_name] = {
-                "status": "success",
-                "articles_count": len(scraped_data) if scraped_data else 0,
-                "articles": scraped_data or []
-            }
-            total_articles += len(scraped_data) if scraped_data else 0
-        except Exception as e:
-            results[site_name] = {
-                "status": "error",
-                "error": str(e),
-                "articles_count": 0,
-                "articles": []
-            }
+    for site_name, (result, freshness) in site_results.items():
+        results[site_name] = _site_entry(result, freshness)
+        total_articles += results[site_name]["articles_count"]
     
     return {
         "total_sites": len(SCRAPER_MAPPING),
         "total_articles": total_articles,
+        "timed_out_sites": sum(1 for entry in results.values() if entry["timed_out"]),
+        "elapsed_seconds": round(time.monotonic() - start, 3),
         "results": results
-    } 
\ No newline at end of file
+    }
+
+async def _scrape_all_results(live):
+    """
+    Returns the result and freshness of every site for /scrape-all.
+    """
+    if live:
+        live_results = await snapshot_store.refresh_all()
+        site_results = {site_name: await _live_result(site_name, result) for site_name, result in live_results.items()}
+    else:
+        missing = [site_name for site_name in SCRAPER_MAPPING if await snapshot_store.get(site_name) is None]
+        live_results = await snapshot_store.refresh_all(missing) if missing else {}
+        site_results = {}
+        for site_name in SCRAPER_MAPPING:
+            if site_name in live_results:
+                site_results[site_name] = await _live_result(site_name, live_results[site_name])
+            else:
+                site_results[site_name] = await _get_result(site_name, live=False)
+    return site_results
+
+def _iso(timestamp):
+    return datetime.fromtimestamp(timestamp, timezone.utc).isoformat()
+
+@app.get("/articles")
+async def list_articles(
+    site: Optional[str] = None,
+    since: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=500),
+    fields: Optional[str] = None,
+    accept_encoding: Optional[str] = Header(None)
+):
+    """
+    Pages through every article scraped so far, from the article store,
+    without scraping anything.
+    
+    Articles come oldest change first (first scraped, or headline/text
+    changed). since keeps articles changed after a time (ISO 8601 or epoch
+    seconds); cursor continues after the previous page. next_cursor is
+    always returned: polling with it later returns only what changed since.
+    fields picks the article fields returned, comma-separated.
+    """
+    article_fields = _parse_fields(fields, responses.STORED_ARTICLE_FIELDS)
+    if site is not None and site.lower() not in SCRAPER_MAPPING:
+        raise HTTPException(status_code=404, detail=f"Site '{site}' not found")
+    if since is not None and since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    try:
+        articles, next_cursor, has_more = await asyncio.to_thread(
+            article_store.query,
+            site.lower() if site else None,
+            since.timestamp() if since else None,
+            cursor,
+            limit
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    for article in articles:
+        for key in ("first_seen", "last_seen", "changed_at"):
+            article[key] = _iso(article[key])
+    return await _json_response({
+        "count": len(articles),
+        "has_more": has_more,
+        "next_cursor": next_cursor,
+        "articles": responses.project(articles, article_fields)
+    }, accept_encoding)
+
+@app.get("/scrape-all/stream")
+async def stream_all_sites(
+    live: bool = False,
+    stream_format: str = Query("ndjson", alias="format", pattern="^(ndjson|sse)$"),
+    granularity: str = Query("site", pattern="^(site|article)$"),
+    fields: Optional[str] = None
+):
+    """
+    Streams the results of all sites as soon as each one is ready.
+    
+    format=ndjson emits one JSON object per line, format=sse emits
+    Server-Sent Events. granularity=site emits one event per site,
+    granularity=article one event per article plus a per-site status event.
+    A final summary event closes the stream. fields picks the article
+    fields sent, comma-separated.
+    """
+    article_fields = _parse_fields(fields)
+    start = time.monotonic()
+    semaphore = asyncio.Semaphore(max(1, config.SCRAPE_CONCURRENCY))
+    
+    async def _site_result(site_name):
+        async with semaphore:
+            return site_name, await _get_result(site_name, live)
+    
+    def _encode(event_type, payload):
+        data = responses.dumps(payload).decode("utf-8")
+        if stream_format == "sse":
+            return f"event: {event_type}\ndata: {data}\n\n"
+        return data + "\n"
+    
+    async def _events():
+        tasks = [asyncio.ensure_future(_site_result(site_name)) for site_name in SCRAPER_MAPPING]
+        total_articles = 0
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                site_name, (result, freshness) = await next_done
+                entry = _shape(_site_entry(result, freshness), article_fields)
+                total_articles += entry["articles_count"]
+                
+                if granularity == "article":
+                    for article in entry.pop("articles"):
+                        yield _encode("article", {"type": "article", "site": site_name, "article": article})
+                yield _encode("site", {"type": "site", "site": site_name, **entry})
+            
+            yield _encode("summary", {
+                "type": "summary",
+                "total_sites": len(SCRAPER_MAPPING),
+                "total_articles": total_articles,
+                "elapsed_seconds": round(time.monotonic() - start, 3)
+            })
+        finally:
+            # Client went away: stop waiting on the remaining sites (their snapshot refreshes still finish)
+            for task in tasks:
+                task.cancel()
+    
+    media_type = "text/event-stream" if stream_format == "sse" else "application/x-ndjson"
+    return StreamingResponse(_events(), media_type=media_type, headers={"Cache-Control": "no-cache"})
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Lookup latency and recall of the near-duplicate index as it grows.
+
+Fills a scratch DuplicateIndex with synthetic signatures in steps up to
+--size articles, and after every step times lookups of signatures that
+match nothing and of near-duplicates of indexed articles (a share of their
+MinHash values changed, as for a copy with edited wording). Reports p50/p99
+lookup latency and the share of near-duplicates found. Also reports the
+time to shingle and sign one fixture article.
+
+Usage: python benchmarks/dedup_index.py [--size N] [--steps N] [--lookups N]
+       [--changed FRACTION]
+"""
+
+import argparse
+import gzip
+import os
+import random
+import re
+import statistics
+import tempfile
+import time
+from array import array
+
+import sites  # noqa: F401 (puts the repository root on sys.path)
+from config import config
+from scrapers.dedup import DuplicateIndex, NUM_PERM, band_keys, minhash, shingles
+
+_rng = random.Random(7)
+
+def _random_signature():
+    return array('Q', (_rng.getrandbits(61) for _ in range(NUM_PERM)))
+
+def _near_duplicate(signature, changed):
+    copy = array('Q', signature)
+    for position in _rng.sample(range(NUM_PERM), int(changed * NUM_PERM)):
+        copy[position] = _rng.getrandbits(61)
+    return copy
+
+def _fill(index, start, count, kept):
+    """Add ``count`` synthetic articles in one transaction, keeping a few signatures to look up later."""
+    conn = index._connection()
+    conn.execute("BEGIN")
+    for number in range(start, start + count):
+        signature = _random_signature()
+        url = "https://example.com/%d" % number
+        article_id = conn.execute(
+            "INSERT INTO signatures (url, cluster, signature) VALUES (?, ?, ?)", (url, url, signature.tobytes())
+        ).lastrowid
+        conn.executemany("INSERT OR IGNORE INTO bands (bucket, article) VALUES (?, ?)",
+                         [(bucket, article_id) for bucket in band_keys(signature)])
+        if len(kept) < 1000:
+            kept.append((url, signature))
+    conn.execute("COMMIT")
+
+def _time_lookups(index, signatures):
+    timings, found = [], []
+    for signature in signatures:
+        start = time.perf_counter()
+        found.append(index.lookup(signature))
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    return statistics.median(timings) * 1000, timings[int(0.99 * (len(timings) - 1))] * 1000, found
+
+def _signing_time():
+    """Return the shingle count and milliseconds to sign the text of the first fixture article found."""
+    fixtures = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+    for site_name in sorted(os.listdir(fixtures)):
+        for name in sorted(os.listdir(os.path.join(fixtures, site_name))):
+            if name.startswith("article"):
+                path = os.path.join(fixtures, site_name, name)
+                with gzip.open(path, "rt", encoding="utf-8", errors="ignore") as f:
+                    text = re.sub(r"<script.*?</script>|<style.*?</style>|<[^>]+>", " ", f.read(), flags=re.S)
+                hashed = shingles(text)
+                start = time.perf_counter()
+                for _ in range(20):
+                    minhash(hashed)
+                return len(hashed), (time.perf_counter() - start) / 20 * 1000
+    return 0, 0.0
+
+def main(size, steps, lookups, changed):
+    shingle_count, sign_ms = _signing_time()
+    print(f"signing a fixture article: {shingle_count} shingles, {sign_ms:.2f} ms")
+
+    with tempfile.TemporaryDirectory() as directory:
+        index = DuplicateIndex(os.path.join(directory, "dedup.sqlite3"), config.DEDUP_THRESHOLD)
+        kept = []
+        print("%10s %12s %12s %12s %12s %8s" % ("articles", "miss p50 ms", "miss p99 ms",
+                                                "dup p50 ms", "dup p99 ms", "recall"))
+        indexed = 0
+        for step in range(1, steps + 1):
+            target = size * step // steps
+            _fill(index, indexed, target - indexed, kept)
+            indexed = target
+
+            misses = [_random_signature() for _ in range(lookups)]
+            miss_p50, miss_p99, _ = _time_lookups(index, misses)
+            originals = [kept[_rng.randrange(len(kept))] for _ in range(lookups)]
+            dup_p50, dup_p99, found = _time_lookups(
+                index, [_near_duplicate(signature, changed) for _, signature in originals])
+            recall = sum(1 for (url, _), cluster in zip(originals, found) if cluster == url) / lookups
+            print("%10d %12.3f %12.3f %12.3f %12.3f %8.3f" % (indexed, miss_p50, miss_p99, dup_p50, dup_p99, recall))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size", type=int, default=200000, help="articles in the index at the last step")
+    parser.add_argument("--steps", type=int, default=4, help="index sizes measured")
+    parser.add_argument("--lookups", type=int, default=1000, help="lookups timed per kind and step")
+    parser.add_argument("--changed", type=float, default=0.2,
+                        help="share of MinHash values changed in near-duplicates")
+    args = parser.parse_args()
+    main(args.size, args.steps, args.lookups, args.changed)
@@ -0,0 +1,101 @@
+"""
+Local stand-in for the news sites, serving the pages in benchmarks/fixtures.
+
+Each site has a gzipped homepage.html.gz and article.html.gz. The homepage
+fixture answers the site's homepage URL and the article fixture answers any
+other URL on the site's host. serve_fixtures() routes every request the
+scrapers make to a site host through a local HTTP server, so scrapers run
+unmodified and offline.
+"""
+
+import os
+import threading
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+from requests.adapters import HTTPAdapter
+
+from sites import SITES
+from config import config
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+def fixture_path(site_name, page):
+    """Return the path of a site's ``homepage`` or ``article`` fixture."""
+    return os.path.join(FIXTURES_DIR, site_name, page + ".html.gz")
+
+def _is_homepage(site_name, path):
+    homepage_path = urlsplit(SITES[site_name]["url"]).path.rstrip("/")
+    return urlsplit(path).path.rstrip("/") == homepage_path
+
+class _FixtureHandler(BaseHTTPRequestHandler):
+    # Keep-alive like a real site, so the pooled session reuses its connections
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; don't let Nagle delay the body
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        host, _, path = self.path.lstrip("/").partition("/")
+        site_name = config.get_site_for_host(host)
+        if site_name not in SITES:
+            self.send_error(404, "No fixtures for %s" % host)
+            return
+
+        page = "homepage" if _is_homepage(site_name, "/" + path) else "article"
+        try:
+            with open(fixture_path(site_name, page), "rb") as f:
+                body = f.read()
+        except OSError:
+            self.send_error(404, "Missing %s fixture for %s" % (page, site_name))
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+class FixtureAdapter(HTTPAdapter):
+    """Transport adapter that sends requests for a site host to the local fixture server."""
+
+    def __init__(self, server_address, **kwargs):
+        super().__init__(**kwargs)
+        self.server_address = server_address
+
+    def send(self, request, **kwargs):
+        parts = urlsplit(request.url)
+        path = parts.path + ("?" + parts.query if parts.query else "")
+        request.url = "http://%s:%d/%s%s" % (self.server_address[0], self.server_address[1], parts.netloc, path)
+        return super().send(request, **kwargs)
+
+@contextmanager
+def serve_fixtures(session):
+    """
+    Start the fixture server and route ``session``'s requests for every site
+    host to it until the block exits.
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _FixtureHandler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, name="fixture-server", daemon=True)
+    thread.start()
+
+    adapter = FixtureAdapter(server.server_address)
+    prefixes = [
+        "%s://%s/" % (scheme, urlsplit(site["url"]).netloc)
+        for site in SITES.values() for scheme in ("http", "https")
+    ]
+    for prefix in prefixes:
+        session.mount(prefix, adapter)
+    try:
+        yield server
+    finally:
+        for prefix in prefixes:
+            session.adapters.pop(prefix, None)
+        adapter.close()
+        server.shutdown()
+        server.server_close()
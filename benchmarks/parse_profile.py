@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Parse time and peak memory per page, with and without region parsing.
+
+For every site the homepage and its first article are fetched once, then
+parsed repeatedly with HTML_PARSE_REGIONS off ("full") and on ("regions").
+Reports the bytes handed to the parser, the median time per parse and the
+peak Python heap during one parse. tracemalloc only sees Python allocations,
+so with the lxml backend the byte count is the better proxy for tree memory.
+With --offline the pages come from benchmarks/fixtures instead of the live
+sites.
+
+Usage: python benchmarks/parse_profile.py [--offline] [--repeat N] [site ...]
+"""
+
+import argparse
+import contextlib
+import statistics
+import time
+import tracemalloc
+
+from sites import SITES, replay_fetches, site_names_from_args
+from config import config
+from fixture_server import serve_fixtures
+from scrapers.html_parser import prepare_html
+from scrapers.scrapfly_helper import get_session
+
+MODES = (("full", False), ("regions", True))
+
+def _measure(function, repeat):
+    """Return the median seconds per call and the peak traced bytes of one call."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    function()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return statistics.median(timings), peak
+
+def _parsed_bytes(module, function):
+    """Return how many bytes the parser receives during one call of ``function``."""
+    sizes = []
+    original = module.parse_html
+
+    def _recording(content, backend=None, region=None):
+        sizes.append(len(prepare_html(content, region)))
+        return original(content, backend, region)
+
+    module.parse_html = _recording
+    try:
+        function()
+    finally:
+        module.parse_html = original
+    return sum(sizes)
+
+def _profile_page(site_name, page, module, function, repeat):
+    rows = []
+    for mode, regions_enabled in MODES:
+        config.HTML_PARSE_REGIONS = regions_enabled
+        seconds, peak = _measure(function, repeat)
+        rows.append((site_name, page, mode, _parsed_bytes(module, function), seconds * 1000, peak / 1024))
+    return rows
+
+def _print_rows(rows):
+    print("%-15s %-9s %-8s %10s %10s %12s" % ("site", "page", "mode", "bytes", "ms", "peak KiB"))
+    for row in rows:
+        print("%-15s %-9s %-8s %10d %10.2f %12.1f" % row)
+
+def main(site_names, repeat, offline=False):
+    config.ARTICLE_CACHE_ENABLED = False
+    config.HTTP_CACHE_ENABLED = False
+    replay_fetches()
+
+    rows = []
+    for site_name in site_names:
+        site = SITES[site_name]
+        module = site["module"]
+        with serve_fixtures(get_session()) if offline else contextlib.nullcontext():
+            articles = site["scrape"]()
+        if not articles:
+            print(f"Skipping {site_name}: no articles scraped")
+            continue
+
+        # The scrape above fetched every page; from here on fetches are replayed and only parsing is timed
+        homepage = module.direct_get(site["url"]).content
+        rows.extend(_profile_page(site_name, "homepage", module,
+                                  lambda: site["parse_homepage"](homepage, site["base_url"]), repeat))
+        article_url = articles[0]["article_url"]
+        rows.extend(_profile_page(site_name, "article", module,
+                                  lambda: site["get_article"](article_url), repeat))
+
+    _print_rows(rows)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("sites", nargs="*", help="sites to profile (default: all)")
+    parser.add_argument("--repeat", type=int, default=20, help="parses per page and mode")
+    parser.add_argument("--offline", action="store_true", help="profile the recorded fixtures instead of the live sites")
+    args = parser.parse_args()
+    main(site_names_from_args(args.sites), args.repeat, args.offline)
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Parser parity check.
+
+Runs every site scraper once per HTML backend against the same pages and
+reports any field that differs between BeautifulSoup and lxml. The pages
+come from benchmarks/fixtures, or from the live sites with --live. Each page
+is fetched once and replayed for the second backend, and the article and
+HTTP caches are bypassed so both runs really parse. A site for which either
+backend extracts no articles fails: a fetch that failed proves nothing.
+
+Usage: python benchmarks/parser_parity.py [--live] [site ...]
+"""
+
+import argparse
+import contextlib
+import json
+import sys
+
+from sites import SITES, replay_fetches, site_names_from_args
+from config import config
+from fixture_server import serve_fixtures
+from scrapers.scrapfly_helper import get_session
+
+BACKENDS = ("bs4", "lxml")
+
+def _diff(site_name, results):
+    """Return human-readable differences between the backends' results."""
+    reference, candidate = (results[backend] for backend in BACKENDS)
+    if len(reference) != len(candidate):
+        return ["%s: %d articles with %s, %d with %s" % (
+            site_name, len(reference), BACKENDS[0], len(candidate), BACKENDS[1])]
+
+    differences = []
+    for index, (expected, actual) in enumerate(zip(reference, candidate)):
+        for field in sorted(set(expected) | set(actual)):
+            if expected.get(field) != actual.get(field):
+                differences.append("%s[%d].%s: %s != %s" % (
+                    site_name, index, field,
+                    json.dumps(expected.get(field), ensure_ascii=False)[:80],
+                    json.dumps(actual.get(field), ensure_ascii=False)[:80]))
+    return differences
+
+def main(site_names, live=False):
+    config.ARTICLE_CACHE_ENABLED = False
+    config.HTTP_CACHE_ENABLED = False
+    replay_fetches()
+
+    failures = 0
+    for site_name in site_names:
+        results = {}
+        for backend in BACKENDS:
+            config.HTML_PARSER = backend
+            with contextlib.nullcontext() if live else serve_fixtures(get_session()):
+                results[backend] = SITES[site_name]["scrape"]()
+
+        differences = _diff(site_name, results)
+        empty = [backend for backend in BACKENDS if not results[backend]]
+        if empty:
+            failures += 1
+            print("EMPTY    %s (no articles with %s)" % (site_name, ", ".join(empty)))
+        elif differences:
+            failures += 1
+            print("MISMATCH %s" % site_name)
+            for line in differences:
+                print("  " + line)
+        else:
+            print("OK       %s (%d articles)" % (site_name, len(results[BACKENDS[0]])))
+
+    print("\n%d/%d sites extract identical fields" % (len(site_names) - failures, len(site_names)))
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("sites", nargs="*", help="sites to check (default: all)")
+    parser.add_argument("--live", action="store_true", help="scrape the live sites instead of the recorded fixtures")
+    args = parser.parse_args()
+    sys.exit(main(site_names_from_args(args.sites), args.live))
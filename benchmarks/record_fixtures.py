@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Record benchmark fixtures from the live sites.
+
+Scrapes each site once, then stores its homepage and the first article page
+it fetched as benchmarks/fixtures/<site>/{homepage,article}.html.gz. Run it
+when a site's markup changes so the offline benchmarks keep exercising the
+real selectors.
+
+Usage: python benchmarks/record_fixtures.py [site ...]
+"""
+
+import gzip
+import os
+import sys
+
+from sites import SITES, SCRAPER_MODULES, site_names_from_args
+from config import config
+from fixture_server import fixture_path
+
+def _capture_fetches():
+    """Wrap the scrapers' fetch functions and return the dict that collects every response by URL."""
+    responses = {}
+
+    def _capturing(fetch):
+        def _fetch(url, *args, **kwargs):
+            response = fetch(url, *args, **kwargs)
+            responses.setdefault(url, response)
+            return response
+        return _fetch
+
+    for module in SCRAPER_MODULES:
+        for name in ("direct_get", "get_with_fallback"):
+            if hasattr(module, name):
+                setattr(module, name, _capturing(getattr(module, name)))
+    return responses
+
+def _write(path, content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        # Fixed mtime and no file name keep re-recorded fixtures byte-identical
+        with gzip.GzipFile(fileobj=f, mode="wb", mtime=0, filename="") as gz:
+            gz.write(content)
+
+def main(site_names):
+    config.ARTICLE_CACHE_ENABLED = False
+    config.SCRAPFLY_CACHE_ENABLED = False
+    config.HTTP_CACHE_ENABLED = False
+    responses = _capture_fetches()
+
+    failures = 0
+    for site_name in site_names:
+        site = SITES[site_name]
+        articles = site["scrape"]()
+        homepage = responses.get(site["url"])
+        article = responses.get(articles[0]["article_url"]) if articles else None
+        if homepage is None or article is None:
+            failures += 1
+            print(f"FAILED   {site_name}: could not fetch a homepage and an article")
+            continue
+
+        _write(fixture_path(site_name, "homepage"), homepage.content)
+        _write(fixture_path(site_name, "article"), article.content)
+        print(f"RECORDED {site_name} ({len(homepage.content) // 1024} KiB homepage, "
+              f"{len(article.content) // 1024} KiB article)")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main(site_names_from_args(sys.argv[1:])))
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Load test over a recorded cassette.
+
+Replays a cassette recorded with FETCH_MODE=record (see scrapers/cassette.py)
+and drives either the NewsScraper pipeline or the API's /scrape-all?live=true
+endpoint many times over, several rounds in parallel. Nothing reaches the
+news sites or Scrapfly. Reports round latency percentiles and site
+throughput.
+
+Record a cassette first, for example:
+    FETCH_MODE=record python test.py
+
+Usage: python benchmarks/replay_load.py [--target pipeline|api] [--rounds N]
+       [--parallel N] [--latency S] [--jitter S] [--cassette PATH]
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import sites  # noqa: F401 (puts the repository root on sys.path)
+from config import config
+
+def _percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+def _pipeline_round():
+    from test import NewsScraper
+    summary = NewsScraper().scrape_all()["summary"]
+    return summary["successful_sites"], summary["total_sites"]
+
+def _api_round_factory():
+    from fastapi.testclient import TestClient
+    from api import app
+    # One client, entered once, so every request runs on the same event loop as under uvicorn
+    config.SNAPSHOT_REFRESH_ENABLED = False
+    client = TestClient(app)
+    client.__enter__()
+
+    def _api_round():
+        response = client.get("/scrape-all", params={"live": "true"})
+        response.raise_for_status()
+        site_entries = response.json()["results"]
+        return sum(1 for entry in site_entries.values() if entry["articles_count"]), len(site_entries)
+    return _api_round
+
+def main(target, rounds, parallel):
+    run_round = _pipeline_round if target == "pipeline" else _api_round_factory()
+
+    def _timed_round(_):
+        start = time.perf_counter()
+        succeeded, total = run_round()
+        return time.perf_counter() - start, succeeded, total
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=parallel, thread_name_prefix="load") as executor:
+        outcomes = list(executor.map(_timed_round, range(rounds)))
+    wall = time.perf_counter() - start
+
+    latencies = [outcome[0] for outcome in outcomes]
+    succeeded = sum(outcome[1] for outcome in outcomes)
+    attempted = sum(outcome[2] for outcome in outcomes)
+    print(f"\n{target}: {rounds} rounds, {parallel} in parallel, {wall:.2f}s wall")
+    print(f"  round latency  p50 {statistics.median(latencies):.3f}s  p95 {_percentile(latencies, 0.95):.3f}s  "
+          f"max {max(latencies):.3f}s")
+    print(f"  sites          {succeeded}/{attempted} with articles, {attempted / wall:.1f} sites/s, "
+          f"{rounds / wall:.2f} rounds/s")
+    return 0 if succeeded else 1
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--target", choices=("pipeline", "api"), default="pipeline")
+    parser.add_argument("--rounds", type=int, default=20, help="full scrapes of every site")
+    parser.add_argument("--parallel", type=int, default=4, help="rounds running at the same time")
+    parser.add_argument("--latency", type=float, default=config.REPLAY_LATENCY, help="seconds added to every response")
+    parser.add_argument("--jitter", type=float, default=config.REPLAY_JITTER, help="up to this many extra random seconds")
+    parser.add_argument("--cassette", default=config.CASSETTE_PATH)
+    args = parser.parse_args()
+
+    # Must be set before the first request creates the shared session
+    config.FETCH_MODE = "replay"
+    config.CASSETTE_PATH = args.cassette
+    config.REPLAY_LATENCY = args.latency
+    config.REPLAY_JITTER = args.jitter
+    # Exercise the full fetch/parse path on every round
+    config.HTTP_CACHE_ENABLED = False
+    config.ARTICLE_CACHE_ENABLED = False
+    config.SCRAPFLY_CACHE_ENABLED = False
+    # Keep replayed pages out of the local snapshots, article store and duplicate index
+    config.SHARED_STATE_ENABLED = False
+    config.ARTICLE_STORE_ENABLED = False
+    config.DEDUP_ENABLED = False
+    sys.exit(main(args.target, args.rounds, args.parallel))
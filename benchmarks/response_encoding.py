@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Serialization and compression of a /scrape-all response.
+
+Scrapes every site once from the fixtures (see fixture_server.py), builds
+the /scrape-all payload from the results, repeated --copies times to stand
+for a bigger homepage set, and reports per encoding step the median time
+and the body size: FastAPI's default JSON rendering against
+scrapers/responses.py, each content coding, and a headline/URL projection.
+Every article of a site gets the text of the site's one article fixture,
+so compressed sizes are far below those of real responses; compare the
+codings' times and relative sizes only.
+
+Usage: python benchmarks/response_encoding.py [--copies N] [--repeat N]
+"""
+
+import argparse
+import statistics
+import time
+
+from sites import SITES
+from config import config
+from fixture_server import serve_fixtures
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from scrapers.scrapfly_helper import get_session
+from scrapers import responses
+
+def _payload(copies):
+    config.ARTICLE_CACHE_ENABLED = False
+    config.HTTP_CACHE_ENABLED = False
+    with serve_fixtures(get_session()):
+        scraped = {site_name: site["scrape"]() for site_name, site in SITES.items()}
+    results = {}
+    for copy in range(copies):
+        for site_name, articles in scraped.items():
+            results["%s-%d" % (site_name, copy)] = {
+                "status": "success", "articles_count": len(articles), "elapsed_seconds": 1.0,
+                "timed_out": False, "source": "snapshot", "scraped_at": "2025-01-01T00:00:00+00:00",
+                "age_seconds": 1.0, "stale": False, "articles": articles,
+            }
+    total = sum(entry["articles_count"] for entry in results.values())
+    return {"total_sites": len(results), "total_articles": total, "timed_out_sites": 0,
+            "elapsed_seconds": 1.0, "results": results}
+
+def _median_ms(function, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+def main(copies, repeat):
+    payload = _payload(copies)
+    body = responses.dumps(payload)
+    headlines = dict(payload, results={
+        site_name: dict(entry, articles=responses.project(entry["articles"], ("headline", "article_url")))
+        for site_name, entry in payload["results"].items()
+    })
+    steps = [
+        ("fastapi default json", lambda: JSONResponse(jsonable_encoder(payload)).body),
+        ("responses.dumps", lambda: responses.dumps(payload)),
+    ]
+    steps += [("%s (level as served)" % coding, (lambda compress: lambda: compress(body))(compress))
+              for coding, compress in responses._COMPRESSORS.items()]
+    steps.append(("headline,article_url", lambda: responses.dumps(headlines)))
+
+    print("%d sites, %d articles (orjson: %s)" % (
+        payload["total_sites"], payload["total_articles"], "yes" if responses.orjson else "no"))
+    print("%-26s %10s %12s" % ("step", "ms", "bytes"))
+    for name, function in steps:
+        print("%-26s %10.2f %12d" % (name, _median_ms(function, repeat), len(function())))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--copies", type=int, default=1, help="times every site's results are repeated")
+    parser.add_argument("--repeat", type=int, default=20, help="runs per step")
+    args = parser.parse_args()
+    main(args.copies, args.repeat)
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Offline benchmark of every site extractor.
+
+Runs each scrape_* function and its article helper against the recorded pages
+in benchmarks/fixtures, served by a local stand-in HTTP server, so no network
+is needed. Per site it reports the full scrape time, the time spent parsing
+and extracting the homepage and one article page, the peak Python heap while
+doing so and the parse+extract throughput.
+
+Results can be saved with --save and compared against a saved run with
+--baseline; the exit code is 1 when any site got slower than --tolerance.
+
+Usage: python benchmarks/run_benchmarks.py [--repeat N] [--save FILE] [--baseline FILE] [site ...]
+"""
+
+import argparse
+import gzip
+import json
+import statistics
+import sys
+import time
+import tracemalloc
+
+from sites import SITES, site_names_from_args
+from config import config
+from fixture_server import fixture_path, serve_fixtures
+from scrapers.scrapfly_helper import get_session
+
+# Module-level names the scrapers call, timed separately from the extraction around them
+_FETCH_FUNCTIONS = ("direct_get", "get_with_fallback")
+
+class _Stopwatch:
+    """Accumulates the time spent in the fetch and parse functions of one scraper module."""
+
+    def __init__(self, module):
+        self.module = module
+        self.fetch = 0.0
+        self.parse = 0.0
+        self._originals = {}
+
+    def _timed(self, name, bucket):
+        original = getattr(self.module, name)
+
+        def _wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                setattr(self, bucket, getattr(self, bucket) + time.perf_counter() - start)
+
+        self._originals[name] = original
+        setattr(self.module, name, _wrapper)
+
+    def __enter__(self):
+        for name in _FETCH_FUNCTIONS:
+            if hasattr(self.module, name):
+                self._timed(name, "fetch")
+        self._timed("parse_html", "parse")
+        return self
+
+    def __exit__(self, *exc_info):
+        for name, original in self._originals.items():
+            setattr(self.module, name, original)
+
+def _run(module, function, repeat):
+    """
+    Call ``function`` ``repeat`` times and return the median fetch, parse and
+    extract seconds per call, plus the peak traced heap of one extra call.
+    """
+    fetches, parses, extracts = [], [], []
+    for _ in range(repeat):
+        with _Stopwatch(module) as stopwatch:
+            start = time.perf_counter()
+            function()
+            total = time.perf_counter() - start
+        fetches.append(stopwatch.fetch)
+        parses.append(stopwatch.parse)
+        extracts.append(max(0.0, total - stopwatch.fetch - stopwatch.parse))
+
+    tracemalloc.start()
+    function()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return statistics.median(fetches), statistics.median(parses), statistics.median(extracts), peak
+
+def _page_result(module, function, size, repeat):
+    fetch, parse, extract, peak = _run(module, function, repeat)
+    return {
+        "bytes": size,
+        "fetch_ms": round(fetch * 1000, 3),
+        "parse_ms": round(parse * 1000, 3),
+        "extract_ms": round(extract * 1000, 3),
+        "peak_kib": round(peak / 1024, 1),
+    }
+
+def benchmark_site(site_name, repeat):
+    """Benchmark one site against its fixtures and return the measurements."""
+    site = SITES[site_name]
+    module = site["module"]
+    with gzip.open(fixture_path(site_name, "homepage"), "rb") as f:
+        homepage = f.read()
+    with gzip.open(fixture_path(site_name, "article"), "rb") as f:
+        article_size = len(f.read())
+
+    scrape_times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        articles = site["scrape"]()
+        scrape_times.append(time.perf_counter() - start)
+    if not articles:
+        raise RuntimeError("%s extracted no articles from its fixtures" % site_name)
+
+    article_url = articles[0]["article_url"]
+    pages = {
+        "homepage": _page_result(module, lambda: site["parse_homepage"](homepage, site["base_url"]),
+                                 len(homepage), repeat),
+        "article": _page_result(module, lambda: site["get_article"](article_url), article_size, repeat),
+    }
+    work = sum(page["parse_ms"] + page["extract_ms"] for page in pages.values()) / 1000
+    return {
+        "articles": len(articles),
+        "scrape_ms": round(statistics.median(scrape_times) * 1000, 3),
+        "pages": pages,
+        "mb_per_s": round((len(homepage) + article_size) / work / 1e6, 2) if work else None,
+    }
+
+def _print_results(results):
+    print("%-15s %8s %10s %-9s %8s %9s %9s %10s %9s" % (
+        "site", "articles", "scrape ms", "page", "KiB", "parse ms", "extract ms", "peak KiB", "MB/s"))
+    for site_name, result in results.items():
+        for index, (page_name, page) in enumerate(result["pages"].items()):
+            print("%-15s %8s %10s %-9s %8.1f %9.2f %10.2f %10.1f %9s" % (
+                site_name if index == 0 else "",
+                result["articles"] if index == 0 else "",
+                "%.2f" % result["scrape_ms"] if index == 0 else "",
+                page_name, page["bytes"] / 1024, page["parse_ms"], page["extract_ms"], page["peak_kib"],
+                result["mb_per_s"] if index == 0 else ""))
+
+def _regressions(results, baseline, tolerance):
+    """Return a line for every page whose parse+extract time grew by more than ``tolerance``."""
+    lines = []
+    for site_name, result in results.items():
+        for page_name, page in result["pages"].items():
+            previous = baseline.get(site_name, {}).get("pages", {}).get(page_name)
+            if not previous:
+                continue
+            before = previous["parse_ms"] + previous["extract_ms"]
+            after = page["parse_ms"] + page["extract_ms"]
+            if before and after > before * (1 + tolerance):
+                lines.append("%s %s: %.2f ms -> %.2f ms (+%.0f%%)" % (
+                    site_name, page_name, before, after, (after / before - 1) * 100))
+    return lines
+
+def main(site_names, repeat, save=None, baseline=None, tolerance=0.25):
+    # Measure the scrapers themselves: no pacing, no caches, never leave the machine
+    config.RATE_LIMIT = 0
+    config.SCRAPFLY_API_KEY = ""
+    config.HTTP_CACHE_ENABLED = False
+    config.ARTICLE_CACHE_ENABLED = False
+
+    print(f"Backend: {config.HTML_PARSER}, region parsing: {'on' if config.HTML_PARSE_REGIONS else 'off'}, "
+          f"{repeat} runs per measurement\n")
+    with serve_fixtures(get_session()):
+        results = {site_name: benchmark_site(site_name, repeat) for site_name in site_names}
+    _print_results(results)
+
+    if save:
+        with open(save, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nSaved results to {save}")
+
+    if baseline:
+        with open(baseline, "r", encoding="utf-8") as f:
+            regressions = _regressions(results, json.load(f), tolerance)
+        if regressions:
+            print(f"\nSlower than the baseline by more than {tolerance:.0%}:")
+            for line in regressions:
+                print("  " + line)
+            return 1
+        print(f"\nNo regressions beyond {tolerance:.0%} against {baseline}")
+    return 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("sites", nargs="*", help="sites to benchmark (default: all)")
+    parser.add_argument("--repeat", type=int, default=20, help="runs per measurement (median is reported)")
+    parser.add_argument("--save", help="write the results as JSON to this file")
+    parser.add_argument("--baseline", help="compare against results saved earlier with --save")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown before failing (0.25 = 25%%)")
+    args = parser.parse_args()
+    sys.exit(main(site_names_from_args(args.sites), args.repeat, args.save, args.baseline, args.tolerance))
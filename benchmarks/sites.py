@@ -0,0 +1,89 @@
+"""
+Site table shared by the benchmark scripts: for every site, its scraper, the
+homepage parse function and the article helper, plus a way to replay fetches.
+"""
+
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scrapers.lebanon import (
+    news_sites_set_1, news_sites_set_2, news_sites_set_3,
+    news_sites_set_4, news_sites_set_5
+)
+
+SCRAPER_MODULES = (news_sites_set_1, news_sites_set_2, news_sites_set_3,
+                   news_sites_set_4, news_sites_set_5)
+
+def _site(module, scrape, parse_homepage, get_article, url, base_url=None):
+    return {
+        "module": module,
+        "scrape": getattr(module, scrape),
+        "parse_homepage": getattr(module, parse_homepage),
+        "get_article": getattr(module, get_article),
+        "url": url,
+        "base_url": base_url or url,
+    }
+
+SITES = {
+    "addiyar": _site(news_sites_set_1, "scrape_addiyar", "_parse_addiyar_homepage",
+                     "_get_article_text", "https://www.addiyar.com/", "https://www.addiyar.com"),
+    "annahar": _site(news_sites_set_1, "scrape_annahar", "_parse_annahar_homepage",
+                     "_get_annahar_article_text", "https://www.annahar.com/"),
+    "aljoumhouria": _site(news_sites_set_1, "scrape_aljoumhouria", "_parse_aljoumhouria_homepage",
+                          "_get_aljoumhouria_article_text", "https://www.aljoumhouria.com/ar",
+                          "https://www.aljoumhouria.com"),
+    "alakhbar": _site(news_sites_set_2, "scrape_al_akhbar", "_parse_al_akhbar_homepage",
+                      "_get_alakhbar_article_text", "https://www.al-akhbar.com/", "https://www.al-akhbar.com"),
+    "nidaalwatan": _site(news_sites_set_2, "scrape_nidaalwatan", "_parse_nidaalwatan_homepage",
+                         "_get_nidaalwatan_article_text", "https://www.nidaalwatan.com"),
+    "aliwaa": _site(news_sites_set_2, "scrape_aliwaa", "_parse_aliwaa_homepage",
+                    "_get_aliwaa_article_text", "https://aliwaa.com.lb"),
+    "elsharkonline": _site(news_sites_set_3, "scrape_elsharkonline", "_parse_elsharkonline_homepage",
+                           "_get_elsharkonline_article_text", "https://www.elsharkonline.com"),
+    "mtv": _site(news_sites_set_3, "scrape_mtv", "_parse_mtv_homepage",
+                 "_get_mtv_article_details", "https://www.mtv.com.lb"),
+    "aljadeed": _site(news_sites_set_3, "scrape_aljadeed", "_parse_aljadeed_homepage",
+                      "_get_aljadeed_article_text", "https://www.aljadeed.tv"),
+    "sawtbeirut": _site(news_sites_set_3, "scrape_sawtbeirut", "_parse_sawtbeirut_homepage",
+                        "_get_sawtbeirut_article_text", "https://www.sawtbeirut.com"),
+    "lebanondebate": _site(news_sites_set_4, "scrape_lebanondebate", "_parse_lebanondebate_homepage",
+                           "_get_lebanondebate_article_text", "https://www.lebanondebate.com"),
+    "lebaneseforces": _site(news_sites_set_5, "scrape_lebanese_forces", "_parse_lebanese_forces_homepage",
+                            "_get_lebanese_forces_article_text", "https://www.lebanese-forces.com"),
+    "lbcgroup": _site(news_sites_set_5, "scrape_lbcgroup", "_parse_lbcgroup_homepage",
+                      "_get_lbcgroup_article_text", "https://www.lbcgroup.tv"),
+}
+
+def site_names_from_args(args):
+    """Return the site names given on the command line (all sites by default), exiting on unknown names."""
+    requested = args or list(SITES)
+    unknown = [name for name in requested if name not in SITES]
+    if unknown:
+        sys.exit("Unknown site(s): %s. Available: %s" % (", ".join(unknown), ", ".join(SITES)))
+    return requested
+
+def replay_fetches():
+    """
+    Make every scraper module fetch each URL at most once and replay the
+    response afterwards, so repeated runs parse identical bytes.
+    """
+    responses = {}
+    lock = threading.Lock()
+
+    def _memoized(fetch):
+        def _fetch(url, *args, **kwargs):
+            with lock:
+                if url in responses:
+                    return responses[url]
+            response = fetch(url, *args, **kwargs)
+            with lock:
+                return responses.setdefault(url, response)
+        return _fetch
+
+    for module in SCRAPER_MODULES:
+        for name in ("direct_get", "get_with_fallback"):
+            if hasattr(module, name):
+                setattr(module, name, _memoized(getattr(module, name)))
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Article text cleanup: the former per-helper code against scrapers/text_cleaning.py.
+
+For every fixture article page, runs each cleanup step the article helpers
+perform, the way they used to inline it and through the shared module, on
+the same parsed page: the Al-Akhbar paragraph filter (per-character Arabic
+check and substring scans), joining non-empty paragraphs (text extraction
+included, as the old code extracted every paragraph twice), joining every
+paragraph, blank ones included, as the Addiyar, An-Nahar and Al-Joumhouria
+helpers do, trimming lines and collapsing whitespace. Checks both give the same text and reports the
+median time per page.
+
+Usage: python benchmarks/text_cleaning.py [--repeat N] [site ...]
+"""
+
+import argparse
+import gzip
+import re
+import statistics
+import time
+
+from sites import site_names_from_args
+from fixture_server import fixture_path
+from scrapers.html_parser import parse_html
+from scrapers.text_cleaning import clean_lines, collapse_whitespace, join_paragraphs
+from scrapers.lebanon.news_sites_set_2 import _ALAKHBAR_PARAGRAPHS
+
+def _old_alakhbar_filter(texts):
+    article_text_parts = []
+    for text in texts:
+        if (text and len(text) > 20 and
+                any('\u0600' <= char <= '\u06FF' for char in text) and
+                not any(skip_word in text for skip_word in ['الأخبار', 'تموز 2025', 'EN']) and
+                len(text.split()) > 3):
+            if not (len(text) < 50 and any(category in text for category in ['لبنان|سياسة', 'فلسطين', 'سوريا', 'عرب وعالم'])):
+                article_text_parts.append(text)
+    return "\n".join(article_text_parts)
+
+def _old_join(paragraphs):
+    return "\n".join(p.text(strip=True) for p in paragraphs if p.text(strip=True))
+
+def _old_join_all(paragraphs):
+    return "\n".join([p.text(strip=True) for p in paragraphs])
+
+def _old_clean_lines(text):
+    lines = [line.strip() for line in text.split('\n') if line.strip()]
+    return "\n".join(lines)
+
+def _old_collapse(text):
+    return re.sub(r'\s+', ' ', text).strip()
+
+def _steps(document):
+    paragraphs = document.select("p")
+    # Every paragraph of the page, and the page text, as the helpers get them from the parser
+    texts = [p.text(strip=True) for p in paragraphs]
+    text = document.select_one("body").text(separator="\n", strip=True)
+    return (
+        ("paragraph filter", lambda: _old_alakhbar_filter(texts), lambda: _ALAKHBAR_PARAGRAPHS.join(texts)),
+        ("join paragraphs", lambda: _old_join(paragraphs),
+         lambda: join_paragraphs(p.text(strip=True) for p in paragraphs)),
+        ("join all paragraphs", lambda: _old_join_all(paragraphs),
+         lambda: join_paragraphs((p.text(strip=True) for p in paragraphs), keep_blank=True)),
+        ("clean lines", lambda: _old_clean_lines(text), lambda: clean_lines(text)),
+        ("collapse whitespace", lambda: _old_collapse(text), lambda: collapse_whitespace(text)),
+    )
+
+def _median_us(function, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1e6
+
+def main(site_names, repeat):
+    totals = {}
+    mismatches = 0
+    print("%-15s %-20s %10s %10s %8s" % ("site", "step", "old us", "new us", "speedup"))
+    for site_name in site_names:
+        with gzip.open(fixture_path(site_name, "article"), "rb") as f:
+            document = parse_html(f.read())
+        for step, old, new in _steps(document):
+            if old() != new():
+                mismatches += 1
+                print("MISMATCH %s %s" % (site_name, step))
+            old_us, new_us = _median_us(old, repeat), _median_us(new, repeat)
+            print("%-15s %-20s %10.1f %10.1f %7.2fx" % (site_name, step, old_us, new_us, old_us / new_us))
+            total = totals.setdefault(step, [0.0, 0.0])
+            total[0] += old_us
+            total[1] += new_us
+
+    print()
+    for step, (old_us, new_us) in totals.items():
+        print("%-15s %-20s %10.1f %10.1f %7.2fx" % ("all pages", step, old_us, new_us, old_us / new_us))
+    return 1 if mismatches else 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("sites", nargs="*", help="sites whose article fixture is used (default: all)")
+    parser.add_argument("--repeat", type=int, default=50, help="runs per step and page")
+    args = parser.parse_args()
+    raise SystemExit(main(site_names_from_args(args.sites), args.repeat))
@@ -1,5 +1,6 @@
 import os
 from typing import Optional
+from urllib.parse import urlsplit
 
 class Config:
     """Configuration management for the news scraper application."""
@@ -12,11 +13,133 @@ class Config:
         # Scrapfly API configuration
         self.SCRAPFLY_API_KEY: Optional[str] = os.getenv('SCRAPFLY_API_KEY')
         self.SCRAPFLY_API_URL: str = "https://api.scrapfly.io/scrape"
+        # Scrapfly calls in flight at once, and the disk cache that stops paying twice for a URL (TTL in seconds)
+        self.SCRAPFLY_CONCURRENCY: int = int(os.getenv('SCRAPFLY_CONCURRENCY', '5'))
+        self.SCRAPFLY_CACHE_ENABLED: bool = os.getenv('SCRAPFLY_CACHE_ENABLED', 'true').lower() == 'true'
+        self.SCRAPFLY_CACHE_PATH: str = os.getenv('SCRAPFLY_CACHE_PATH', '.cache/scrapfly.sqlite3')
+        self.SCRAPFLY_CACHE_TTL: float = float(os.getenv('SCRAPFLY_CACHE_TTL', '300'))
+        self.SCRAPFLY_CACHE_MAX_ENTRIES: int = int(os.getenv('SCRAPFLY_CACHE_MAX_ENTRIES', '1000'))
         
         # Request configuration
         self.DEFAULT_TIMEOUT: int = int(os.getenv('REQUEST_TIMEOUT', '15'))
         self.REQUEST_DELAY: float = float(os.getenv('REQUEST_DELAY', '1.0'))
         
+        # Connection pooling (keep-alive connections are reused per host)
+        self.POOL_CONNECTIONS: int = int(os.getenv('POOL_CONNECTIONS', '32'))
+        self.POOL_MAXSIZE: int = int(os.getenv('POOL_MAXSIZE', '10'))
+        
+        # Record/replay transport: 'live', 'record' (archive every response) or 'replay' (serve from the
+        # cassette, never touch the network). Replay latency and random jitter are in seconds.
+        self.FETCH_MODE: str = os.getenv('FETCH_MODE', 'live').lower()
+        self.CASSETTE_PATH: str = os.getenv('CASSETTE_PATH', '.cache/cassette.jsonl.gz')
+        self.REPLAY_LATENCY: float = float(os.getenv('REPLAY_LATENCY', '0'))
+        self.REPLAY_JITTER: float = float(os.getenv('REPLAY_JITTER', '0'))
+        
+        # Concurrent scraping (sites scraped at once, wall-clock limit per site in seconds)
+        self.SCRAPE_CONCURRENCY: int = int(os.getenv('SCRAPE_CONCURRENCY', '6'))
+        self.SITE_DEADLINE: float = float(os.getenv('SITE_DEADLINE', '60'))
+        # Seconds before an overall deadline (e.g. /scrape-all?deadline_ms=) at which fetches stop,
+        # leaving scrapers time to return what they already have
+        self.DEADLINE_RESERVE: float = float(os.getenv('DEADLINE_RESERVE', '0.5'))
+        
+        # Background snapshots served by the API (seconds between refreshes, max age before revalidating)
+        self.SNAPSHOT_REFRESH_ENABLED: bool = os.getenv('SNAPSHOT_REFRESH_ENABLED', 'true').lower() == 'true'
+        self.SNAPSHOT_REFRESH_INTERVAL: float = float(os.getenv('SNAPSHOT_REFRESH_INTERVAL', '300'))
+        self.SNAPSHOT_MAX_AGE: float = float(os.getenv('SNAPSHOT_MAX_AGE', '600'))
+        
+        # State shared by all API workers (start.sh WORKERS): site snapshots and per-site scrape locks
+        # in one SQLite file, so N workers scrape each site once. Lock TTL in seconds.
+        self.SHARED_STATE_ENABLED: bool = os.getenv('SHARED_STATE_ENABLED', 'true').lower() == 'true'
+        self.SHARED_STATE_PATH: str = os.getenv('SHARED_STATE_PATH', '.cache/shared.sqlite3')
+        self.SCRAPE_LOCK_TTL: float = float(os.getenv('SCRAPE_LOCK_TTL', str(self.SITE_DEADLINE + 30)))
+        
+        # Article fetching (concurrent fetches per host, default articles per site)
+        self.ARTICLE_CONCURRENCY_PER_HOST: int = int(os.getenv('ARTICLE_CONCURRENCY_PER_HOST', '3'))
+        self.MAX_ARTICLES: int = int(os.getenv('MAX_ARTICLES', '10'))
+        
+        # Politeness scheduling: token bucket per host (requests per second, burst size).
+        # Scrapfly calls share one bucket paced by REQUEST_DELAY.
+        self.RATE_LIMIT: float = float(os.getenv('RATE_LIMIT', '2.0'))
+        self.RATE_BURST: int = int(os.getenv('RATE_BURST', '5'))
+        
+        # Conditional-GET HTTP cache (ETag / Last-Modified validators stored on disk)
+        self.HTTP_CACHE_ENABLED: bool = os.getenv('HTTP_CACHE_ENABLED', 'true').lower() == 'true'
+        self.HTTP_CACHE_DIR: str = os.getenv('HTTP_CACHE_DIR', '.cache/http')
+        self.HTTP_CACHE_MAX_ENTRIES: int = int(os.getenv('HTTP_CACHE_MAX_ENTRIES', '500'))
+        
+        # Article-body cache keyed by canonical article URL (TTL in seconds)
+        self.ARTICLE_CACHE_ENABLED: bool = os.getenv('ARTICLE_CACHE_ENABLED', 'true').lower() == 'true'
+        self.ARTICLE_CACHE_PATH: str = os.getenv('ARTICLE_CACHE_PATH', '.cache/articles.sqlite3')
+        self.ARTICLE_CACHE_TTL: float = float(os.getenv('ARTICLE_CACHE_TTL', '21600'))
+        self.ARTICLE_CACHE_MAX_ENTRIES: int = int(os.getenv('ARTICLE_CACHE_MAX_ENTRIES', '5000'))
+        
+        # Durable store of every scraped article (first/last seen, content hash), served at /articles
+        self.ARTICLE_STORE_ENABLED: bool = os.getenv('ARTICLE_STORE_ENABLED', 'true').lower() == 'true'
+        self.ARTICLE_STORE_PATH: str = os.getenv('ARTICLE_STORE_PATH', 'data/articles.sqlite3')
+        
+        # Near-duplicate detection across sites (MinHash LSH index; estimated Jaccard similarity
+        # from which an article joins an earlier article's cluster as its duplicate_of)
+        self.DEDUP_ENABLED: bool = os.getenv('DEDUP_ENABLED', 'true').lower() == 'true'
+        self.DEDUP_INDEX_PATH: str = os.getenv('DEDUP_INDEX_PATH', 'data/dedup.sqlite3')
+        self.DEDUP_THRESHOLD: float = float(os.getenv('DEDUP_THRESHOLD', '0.7'))
+        
+        # API response compression: JSON bodies of at least the minimum size (bytes) are sent with
+        # the best coding the client accepts (zstd and br when their packages are installed, gzip)
+        self.RESPONSE_COMPRESSION_ENABLED: bool = os.getenv('RESPONSE_COMPRESSION_ENABLED', 'true').lower() == 'true'
+        self.RESPONSE_COMPRESSION_MIN_BYTES: int = int(os.getenv('RESPONSE_COMPRESSION_MIN_BYTES', '1024'))
+
+        # HTML parsing backend: 'lxml' (compiled CSS selectors on lxml.html) or 'bs4'
+        self.HTML_PARSER: str = os.getenv('HTML_PARSER', 'lxml')
+        # Strip scripts/styles before parsing and parse only the region each extractor reads
+        self.HTML_PARSE_REGIONS: bool = os.getenv('HTML_PARSE_REGIONS', 'true').lower() == 'true'
+        
+        # Adaptive routing: seconds before a host routed through Scrapfly re-probes direct access,
+        # doubling after every failed probe up to the maximum
+        self.ROUTE_PROBE_INTERVAL: float = float(os.getenv('ROUTE_PROBE_INTERVAL', '600'))
+        self.ROUTE_PROBE_MAX_INTERVAL: float = float(os.getenv('ROUTE_PROBE_MAX_INTERVAL', '21600'))
+        
+        # Circuit breakers: a site (or host) that failed this many times in a row is skipped until
+        # a single probe is let through after the reset timeout (seconds)
+        self.CIRCUIT_BREAKER_ENABLED: bool = os.getenv('CIRCUIT_BREAKER_ENABLED', 'true').lower() == 'true'
+        self.CIRCUIT_FAILURE_THRESHOLD: int = int(os.getenv('CIRCUIT_FAILURE_THRESHOLD', '3'))
+        self.CIRCUIT_RESET_TIMEOUT: float = float(os.getenv('CIRCUIT_RESET_TIMEOUT', '300'))
+        self.HOST_CIRCUIT_FAILURE_THRESHOLD: int = int(os.getenv('HOST_CIRCUIT_FAILURE_THRESHOLD', '5'))
+        self.HOST_CIRCUIT_RESET_TIMEOUT: float = float(os.getenv('HOST_CIRCUIT_RESET_TIMEOUT', '120'))
+        
+        # Prometheus metrics served at /metrics (per-site fetch, parse and extract timings)
+        self.METRICS_ENABLED: bool = os.getenv('METRICS_ENABLED', 'true').lower() == 'true'
+        
+        # On-demand profiling of /scrape/{site_name}?profile=true: allowed for everyone when enabled,
+        # otherwise only with an X-Profile-Token header matching PROFILE_TOKEN. Interval in seconds.
+        self.PROFILING_ENABLED: bool = os.getenv('PROFILING_ENABLED', 'false').lower() == 'true'
+        self.PROFILE_TOKEN: Optional[str] = os.getenv('PROFILE_TOKEN')
+        self.PROFILE_INTERVAL: float = float(os.getenv('PROFILE_INTERVAL', '0.005'))
+        self.PROFILE_DIR: str = os.getenv('PROFILE_DIR', '.cache/profiles')
+        self.PROFILE_MAX_FILES: int = int(os.getenv('PROFILE_MAX_FILES', '50'))
+        
+        # Per-site settings, keyed by the site names used in the API.
+        # 'rate' and 'burst' override RATE_LIMIT/RATE_BURST for the site's host.
+        # 'route': 'scrapfly' starts the host on Scrapfly instead of learning it from a 403.
+        # 'max_articles' caps the article bodies fetched per scrape; None fetches every article found.
+        # Sites that usually go through Scrapfly (route 'scrapfly') fetch 5 to save credits; Al-Akhbar
+        # and LBC Group fetched few or no bodies before and stay at 5 to keep their request load low.
+        self.SITE_SETTINGS = {
+            'addiyar': {'host': 'www.addiyar.com', 'max_articles': None},
+            'annahar': {'host': 'www.annahar.com', 'max_articles': None},
+            'aljoumhouria': {'host': 'www.aljoumhouria.com'},
+            'alakhbar': {'host': 'www.al-akhbar.com', 'max_articles': 5},
+            'nidaalwatan': {'host': 'www.nidaalwatan.com', 'max_articles': 5, 'route': 'scrapfly'},
+            'aliwaa': {'host': 'aliwaa.com.lb', 'max_articles': self.MAX_ARTICLES},
+            'elsharkonline': {'host': 'www.elsharkonline.com', 'max_articles': 5, 'route': 'scrapfly'},
+            'mtv': {'host': 'www.mtv.com.lb', 'max_articles': self.MAX_ARTICLES},
+            'aljadeed': {'host': 'www.aljadeed.tv', 'max_articles': self.MAX_ARTICLES},
+            'sawtbeirut': {'host': 'www.sawtbeirut.com', 'max_articles': 5, 'route': 'scrapfly'},
+            'lebanondebate': {'host': 'www.lebanondebate.com', 'max_articles': self.MAX_ARTICLES},
+            'lebaneseforces': {'host': 'www.lebanese-forces.com', 'max_articles': 5, 'route': 'scrapfly'},
+            'lbcgroup': {'host': 'www.lbcgroup.tv', 'max_articles': 5},
+            'almarkazia': {'host': 'www.almarkazia.com', 'max_articles': self.MAX_ARTICLES},
+        }
+        
         # User agent strings for rotation
         self.USER_AGENTS = [
             'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
@@ -32,6 +155,37 @@ class Config:
             return False
         return True
     
+    def get_site_setting(self, site_name: str, key: str, default=None):
+        """Get a per-site setting, falling back to ``default`` when it is not set."""
+        return self.SITE_SETTINGS.get(site_name, {}).get(key, default)
+    
+    def get_site_for_host(self, host: str) -> Optional[str]:
+        """Get the site name whose host matches ``host`` (ignoring a leading www.)."""
+        host = host.lower()
+        if host.startswith('www.'):
+            host = host[4:]
+        for site_name, settings in self.SITE_SETTINGS.items():
+            site_host = settings.get('host', '')
+            if site_host.startswith('www.'):
+                site_host = site_host[4:]
+            if site_host == host:
+                return site_name
+        return None
+    
+    def get_rate_limit(self, host: str) -> tuple:
+        """Get the (rate, burst) token bucket settings for a host."""
+        if host.lower() == urlsplit(self.SCRAPFLY_API_URL).netloc:
+            return (1.0 / self.REQUEST_DELAY if self.REQUEST_DELAY > 0 else 0.0, 1)
+        site_name = self.get_site_for_host(host)
+        return (
+            self.get_site_setting(site_name, 'rate', self.RATE_LIMIT),
+            self.get_site_setting(site_name, 'burst', self.RATE_BURST)
+        )
+    
+    def get_max_articles(self, site_name: str) -> Optional[int]:
+        """Get the maximum number of articles to fetch for a site, or None for no limit."""
+        return self.get_site_setting(site_name, 'max_articles', self.MAX_ARTICLES)
+    
     def get_default_headers(self) -> dict:
         """Get default headers for requests."""
         return {
@@ -0,0 +1,171 @@
+import json
+import logging
+import sqlite3
+import sys
+import os
+import threading
+import time
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+# Add parent directory to path to import config
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import config
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Query parameters that never change the article being served
+_TRACKING_PARAMS = {'fbclid', 'gclid', 'mc_cid', 'mc_eid'}
+
+# Helper results that describe a failed fetch and must be retried next time
+UNCACHEABLE_TEXTS = {
+    "Failed to retrieve article text.",
+    "Article content not found.",
+    "Article text not found.",
+}
+
+def canonical_url(url):
+    """
+    Normalize an article URL so the same article always maps to one cache key:
+    lowercase scheme and host, no default port, fragment or tracking
+    parameters, sorted query string and no trailing slash.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or '').lower()
+    if parts.port and not ((scheme == 'http' and parts.port == 80) or (scheme == 'https' and parts.port == 443)):
+        host = "%s:%d" % (host, parts.port)
+    path = parts.path or '/'
+    if len(path) > 1:
+        path = path.rstrip('/')
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not (key.lower().startswith('utm_') or key.lower() in _TRACKING_PARAMS)
+    )
+    return urlunsplit((scheme, host, path, urlencode(query), ''))
+
+def is_cacheable(value):
+    """Return whether an article helper result is a real article worth caching."""
+    if isinstance(value, dict):
+        value = value.get("article_text")
+    return bool(value) and value not in UNCACHEABLE_TEXTS
+
+class ArticleCache:
+    """
+    Persistent article-body cache in SQLite, keyed by canonical article URL.
+
+    Entries expire after ``ttl`` seconds and the least recently used entries
+    are evicted once the cache holds more than ``max_entries``. Hit, miss and
+    eviction counters are kept per process.
+    """
+
+    def __init__(self, path, ttl, max_entries):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._local = threading.local()
+        self._counter_lock = threading.Lock()
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS articles ("
+                "url TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                "stored_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS articles_accessed_at ON articles (accessed_at)")
+            conn.commit()
+            self._local.conn = conn
+        return conn
+
+    def _count(self, name, amount=1):
+        with self._counter_lock:
+            setattr(self, name, getattr(self, name) + amount)
+
+    def get(self, url):
+        """Return the cached helper result for ``url``, or None on a miss."""
+        key = canonical_url(url)
+        now = time.time()
+        try:
+            conn = self._connection()
+            row = conn.execute("SELECT value, stored_at FROM articles WHERE url = ?", (key,)).fetchone()
+            if row is None or now - row[1] > self.ttl:
+                if row is not None:
+                    conn.execute("DELETE FROM articles WHERE url = ?", (key,))
+                    conn.commit()
+                self._count('misses')
+                return None
+            conn.execute("UPDATE articles SET accessed_at = ? WHERE url = ?", (now, key))
+            conn.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"Article cache read failed for {url}: {e}")
+            self._count('misses')
+            return None
+        self._count('hits')
+        return json.loads(row[0])
+
+    def set(self, url, value):
+        """Store a helper result for ``url`` and evict the oldest entries if over capacity."""
+        key = canonical_url(url)
+        now = time.time()
+        try:
+            conn = self._connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO articles (url, value, stored_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value, ensure_ascii=False), now, now)
+            )
+            excess = conn.execute("SELECT COUNT(*) FROM articles").fetchone()[0] - self.max_entries
+            if excess > 0:
+                conn.execute(
+                    "DELETE FROM articles WHERE url IN "
+                    "(SELECT url FROM articles ORDER BY accessed_at LIMIT ?)", (excess,)
+                )
+                self._count('evictions', excess)
+            conn.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"Article cache write failed for {url}: {e}")
+
+    def stats(self):
+        """Return hit/miss counters and the current size of the cache."""
+        try:
+            entries = self._connection().execute("SELECT COUNT(*) FROM articles").fetchone()[0]
+        except sqlite3.Error:
+            entries = None
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "entries": entries,
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl
+        }
+
+article_cache = ArticleCache(config.ARTICLE_CACHE_PATH, config.ARTICLE_CACHE_TTL, config.ARTICLE_CACHE_MAX_ENTRIES)
+
+def cached_fetch(fetch_function, article_url):
+    """
+    Return the cached result for ``article_url`` or call ``fetch_function``
+    and cache what it returns, unless it reports a failed fetch.
+    """
+    if not config.ARTICLE_CACHE_ENABLED:
+        return fetch_function(article_url)
+
+    cached = article_cache.get(article_url)
+    if cached is not None:
+        return cached
+
+    value = fetch_function(article_url)
+    if is_cacheable(value):
+        article_cache.set(article_url, value)
+    return value
@@ -0,0 +1,158 @@
+import base64
+import hashlib
+import json
+import logging
+import sqlite3
+import sys
+import os
+import threading
+import time
+from .article_cache import canonical_url, is_cacheable
+
+# Add parent directory to path to import config
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import config
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+def content_hash(article):
+    """Return a hash of what a reader sees of an article: its headline and text."""
+    text = "%s\n%s" % (article.get("headline") or "", article.get("article_text") or "")
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+def encode_cursor(changed_at, url):
+    """Return the opaque page cursor pointing just past the article ``url`` changed at ``changed_at``."""
+    return base64.urlsafe_b64encode(json.dumps([changed_at, url]).encode('utf-8')).decode('ascii')
+
+def decode_cursor(cursor):
+    """Return the ``(changed_at, url)`` position of a page cursor; raises ValueError when it is not one."""
+    try:
+        changed_at, url = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        return float(changed_at), str(url)
+    except (TypeError, ValueError, UnicodeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+class ArticleStore:
+    """
+    Durable store of every article scraped, in SQLite, keyed by canonical URL.
+
+    Each scrape upserts its articles: an article seen again only moves its
+    ``last_seen`` time, while one whose headline or text changed is updated
+    and gets a new ``changed_at`` time. A refetch that failed to get the
+    article text never overwrites the text already stored. Queries page
+    through articles in ``changed_at`` order, so consumers can poll for what
+    is new since their last page.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS articles ("
+                "url TEXT PRIMARY KEY, site TEXT NOT NULL, article TEXT NOT NULL, content_hash TEXT NOT NULL, "
+                "first_seen REAL NOT NULL, last_seen REAL NOT NULL, changed_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS articles_changed ON articles (changed_at, url)")
+            conn.execute("CREATE INDEX IF NOT EXISTS articles_site_changed ON articles (site, changed_at, url)")
+            conn.commit()
+            self._local.conn = conn
+        return conn
+
+    def upsert(self, site_name, articles):
+        """
+        Record the articles of one scrape of ``site_name`` and return how many
+        were inserted, updated with new content, or already known unchanged.
+        """
+        now = time.time()
+        by_url = {}
+        for article in articles:
+            if article.get("article_url"):
+                by_url[canonical_url(article["article_url"])] = article
+        counts = {"inserted": 0, "updated": 0, "unchanged": 0}
+        if not by_url:
+            return counts
+
+        try:
+            conn = self._connection()
+            placeholders = ",".join("?" * len(by_url))
+            known = dict(conn.execute(
+                "SELECT url, content_hash FROM articles WHERE url IN (%s)" % placeholders, list(by_url)
+            ).fetchall())
+            for url, article in by_url.items():
+                digest = content_hash(article)
+                if url not in known:
+                    conn.execute(
+                        "INSERT INTO articles (url, site, article, content_hash, first_seen, last_seen, changed_at) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        (url, site_name, json.dumps(article, ensure_ascii=False), digest, now, now, now)
+                    )
+                    counts["inserted"] += 1
+                elif known[url] == digest or not is_cacheable(article):
+                    conn.execute("UPDATE articles SET last_seen = ? WHERE url = ?", (now, url))
+                    counts["unchanged"] += 1
+                else:
+                    conn.execute(
+                        "UPDATE articles SET article = ?, content_hash = ?, last_seen = ?, changed_at = ? "
+                        "WHERE url = ?",
+                        (json.dumps(article, ensure_ascii=False), digest, now, now, url)
+                    )
+                    counts["updated"] += 1
+            conn.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"Article store write failed for {site_name}: {e}")
+        return counts
+
+    def query(self, site=None, since=None, cursor=None, limit=50):
+        """
+        Return up to ``limit`` articles in ``changed_at`` order, optionally for
+        one ``site`` and changed after the epoch time ``since``, starting after
+        ``cursor``. Returns ``(articles, next_cursor, has_more)``; next_cursor
+        is the cursor to poll with next, even when there was nothing new.
+        """
+        conditions, params = [], []
+        if site is not None:
+            conditions.append("site = ?")
+            params.append(site)
+        if since is not None:
+            conditions.append("changed_at > ?")
+            params.append(since)
+        if cursor is not None:
+            conditions.append("(changed_at, url) > (?, ?)")
+            params.extend(decode_cursor(cursor))
+        where = ("WHERE " + " AND ".join(conditions)) if conditions else ""
+        rows = self._connection().execute(
+            "SELECT url, site, article, content_hash, first_seen, last_seen, changed_at FROM articles "
+            "%s ORDER BY changed_at, url LIMIT ?" % where, params + [limit + 1]
+        ).fetchall()
+
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        articles = [
+            dict(json.loads(article), url=url, site=site_name, content_hash=digest,
+                 first_seen=first_seen, last_seen=last_seen, changed_at=changed_at)
+            for url, site_name, article, digest, first_seen, last_seen, changed_at in rows
+        ]
+        next_cursor = encode_cursor(rows[-1][6], rows[-1][0]) if rows else cursor
+        return articles, next_cursor, has_more
+
+article_store = ArticleStore(config.ARTICLE_STORE_PATH)
+
+def store_articles(site_name, articles):
+    """Upsert a scrape's articles into the article store, when it is enabled."""
+    if not config.ARTICLE_STORE_ENABLED or not articles:
+        return
+    counts = article_store.upsert(site_name, articles)
+    logger.info(
+        f"Stored {site_name} articles: {counts['inserted']} new, {counts['updated']} updated, "
+        f"{counts['unchanged']} unchanged"
+    )
@@ -0,0 +1,260 @@
+import asyncio
+import base64
+import gzip
+import json
+import logging
+import random
+import sys
+import os
+import threading
+import time
+from datetime import timedelta
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+# Add parent directory to path to import config
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import config
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Query parameters that are credentials, never written to a cassette or part of a key
+_SECRET_PARAMS = {'key'}
+
+# Request headers that would turn a recording into an empty 304
+_CONDITIONAL_HEADERS = ('If-None-Match', 'If-Modified-Since')
+
+# Response headers that describe the wire format of a body we store decoded
+_TRANSPORT_HEADERS = {'content-encoding', 'content-length', 'transfer-encoding', 'connection', 'set-cookie'}
+
+def request_key(method, url):
+    """Return the cassette key of a request: method plus URL with sorted query and no secrets."""
+    parts = urlsplit(url)
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key not in _SECRET_PARAMS
+    )
+    return "%s %s" % (method.upper(), urlunsplit((parts.scheme, parts.netloc.lower(), parts.path, urlencode(query), '')))
+
+def _without_secrets(url):
+    parts = urlsplit(url)
+    query = [(key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True) if key not in _SECRET_PARAMS]
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+def _encode_body(content):
+    # Pages are stored as text when possible: it compresses far better than base64
+    try:
+        return {'body': content.decode('utf-8'), 'body_encoding': 'utf-8'}
+    except UnicodeDecodeError:
+        return {'body': base64.b64encode(content).decode('ascii'), 'body_encoding': 'base64'}
+
+def _decode_body(entry):
+    if entry.get('body_encoding') == 'utf-8':
+        return entry['body'].encode('utf-8')
+    return base64.b64decode(entry['body'])
+
+class Cassette:
+    """
+    Archive of recorded responses, stored as gzip-compressed JSON lines.
+
+    Every recorded response is appended as its own gzip member, so recording
+    never rewrites the file and concurrent recorders only contend on a lock.
+    When a request was recorded several times the latest recording wins.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._entries = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        entries = {}
+        try:
+            with gzip.open(self.path, 'rt', encoding='utf-8') as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        entries[entry['key']] = entry
+        except FileNotFoundError:
+            logger.warning(f"Cassette {self.path} does not exist yet")
+        except (OSError, EOFError, ValueError) as e:
+            # A recorder killed mid-write leaves a truncated last member; keep what was read
+            logger.warning(f"Cassette {self.path} is truncated or corrupt, loaded {len(entries)} entries: {e}")
+        return entries
+
+    def _ensure_loaded(self):
+        if self._entries is None:
+            with self._lock:
+                if self._entries is None:
+                    self._entries = self._load()
+        return self._entries
+
+    def get(self, key):
+        """Return the recorded entry for a request key, or None."""
+        return self._ensure_loaded().get(key)
+
+    def __len__(self):
+        return len(self._ensure_loaded())
+
+    def record(self, key, response):
+        """Append a requests response to the archive."""
+        self.record_entry(key, response.url, response.status_code, response.reason,
+                          response.headers, response.content, response.elapsed.total_seconds())
+
+    def record_entry(self, key, url, status, reason, headers, content, elapsed):
+        """Append a response, given by its parts, to the archive."""
+        entry = {
+            'key': key,
+            'url': _without_secrets(url),
+            'status': status,
+            'reason': reason,
+            'headers': {k: v for k, v in headers.items() if k.lower() not in _TRANSPORT_HEADERS},
+            **_encode_body(content),
+            'elapsed': elapsed,
+            'recorded_at': time.time()
+        }
+        line = (json.dumps(entry, ensure_ascii=False) + "\n").encode('utf-8')
+        directory = os.path.dirname(self.path)
+        with self._lock:
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.path, 'ab') as f:
+                f.write(gzip.compress(line))
+            if self._entries is not None:
+                self._entries[key] = entry
+
+class CassetteAdapter(HTTPAdapter):
+    """
+    Transport adapter that records responses to a cassette or replays them.
+
+    In ``record`` mode requests go to the network unchanged (minus conditional
+    headers, so full bodies get recorded) and every response is archived. In
+    ``replay`` mode nothing leaves the machine: the recorded response is served
+    after ``latency`` seconds plus up to ``jitter`` seconds of random delay, and
+    unrecorded requests fail with a ConnectionError like an unreachable host.
+    """
+
+    def __init__(self, cassette, mode, latency=0.0, jitter=0.0, **kwargs):
+        super().__init__(**kwargs)
+        self.cassette = cassette
+        self.mode = mode
+        self.latency = latency
+        self.jitter = jitter
+
+    def send(self, request, **kwargs):
+        key = request_key(request.method, request.url)
+        if self.mode == 'replay':
+            return self._replay(key, request)
+
+        for header in _CONDITIONAL_HEADERS:
+            request.headers.pop(header, None)
+        response = super().send(request, **kwargs)
+        try:
+            self.cassette.record(key, response)
+        except OSError as e:
+            logger.warning(f"Could not record {key}: {e}")
+        return response
+
+    def _replay(self, key, request):
+        entry = self.cassette.get(key)
+        delay = self.latency + (random.uniform(0, self.jitter) if self.jitter > 0 else 0.0)
+        if delay > 0:
+            time.sleep(delay)
+        if entry is None:
+            raise requests.exceptions.ConnectionError(f"No recording for {key}", request=request)
+
+        response = requests.Response()
+        response.status_code = entry['status']
+        response.reason = entry.get('reason')
+        response.url = entry.get('url') or request.url
+        response.headers = CaseInsensitiveDict(entry['headers'])
+        response.encoding = get_encoding_from_headers(response.headers)
+        response._content = _decode_body(entry)
+        response.request = request
+        response.elapsed = timedelta(seconds=delay)
+        response.connection = self
+        return response
+
+class AsyncCassetteTransport(httpx.AsyncBaseTransport):
+    """
+    httpx counterpart of CassetteAdapter for the async clients, sharing the
+    same cassette format and keys so one recording covers both transports.
+    """
+
+    def __init__(self, cassette, mode, transport, latency=0.0, jitter=0.0):
+        self.cassette = cassette
+        self.mode = mode
+        self.transport = transport
+        self.latency = latency
+        self.jitter = jitter
+
+    async def handle_async_request(self, request):
+        key = request_key(request.method, str(request.url))
+        if self.mode == 'replay':
+            return await self._replay(key, request)
+
+        for header in _CONDITIONAL_HEADERS:
+            request.headers.pop(header, None)
+        start = time.perf_counter()
+        response = await self.transport.handle_async_request(request)
+        try:
+            # Reading through httpx decodes the body, so hand back a decoded copy
+            content = await response.aread()
+        finally:
+            await response.aclose()
+        headers = [(k, v) for k, v in response.headers.items() if k.lower() not in _TRANSPORT_HEADERS]
+        try:
+            self.cassette.record_entry(key, str(request.url), response.status_code, response.reason_phrase,
+                                       dict(headers), content, time.perf_counter() - start)
+        except OSError as e:
+            logger.warning(f"Could not record {key}: {e}")
+        return httpx.Response(response.status_code, headers=headers, content=content, request=request)
+
+    async def _replay(self, key, request):
+        entry = self.cassette.get(key)
+        delay = self.latency + (random.uniform(0, self.jitter) if self.jitter > 0 else 0.0)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if entry is None:
+            raise httpx.ConnectError(f"No recording for {key}", request=request)
+        return httpx.Response(entry['status'], headers=entry['headers'], content=_decode_body(entry), request=request)
+
+    async def aclose(self):
+        await self.transport.aclose()
+
+_cassettes = {}
+_cassettes_lock = threading.Lock()
+
+def get_cassette(path):
+    """Return the process-wide Cassette for ``path``, shared by the sync and async transports."""
+    with _cassettes_lock:
+        cassette = _cassettes.get(path)
+        if cassette is None:
+            cassette = _cassettes[path] = Cassette(path)
+        return cassette
+
+def build_adapter(**kwargs):
+    """Return a CassetteAdapter configured from FETCH_MODE, or None in live mode."""
+    mode = config.FETCH_MODE
+    if mode not in ('record', 'replay'):
+        return None
+    logger.info(f"Fetch mode '{mode}' using cassette {config.CASSETTE_PATH}")
+    return CassetteAdapter(
+        get_cassette(config.CASSETTE_PATH), mode,
+        latency=config.REPLAY_LATENCY, jitter=config.REPLAY_JITTER, **kwargs
+    )
+
+def build_async_transport(transport):
+    """Wrap an httpx transport in an AsyncCassetteTransport configured from FETCH_MODE, or return it in live mode."""
+    mode = config.FETCH_MODE
+    if mode not in ('record', 'replay'):
+        return transport
+    return AsyncCassetteTransport(
+        get_cassette(config.CASSETTE_PATH), mode, transport,
+        latency=config.REPLAY_LATENCY, jitter=config.REPLAY_JITTER
+    )
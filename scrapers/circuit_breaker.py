@@ -0,0 +1,136 @@
+import logging
+import sys
+import os
+import threading
+import time
+import requests
+
+# Add parent directory to path to import config
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import config
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """Raised instead of sending a request while the circuit of its host is open."""
+
+def is_failure_status(status_code):
+    """Return whether an HTTP status means the host is down or blocking us (5xx, 403, 429)."""
+    return status_code is not None and (status_code >= 500 or status_code in (403, 429))
+
+class CircuitBreaker:
+    """
+    Circuit breaker for one site or host.
+
+    Closed, calls go through and consecutive failures are counted. After
+    ``failure_threshold`` of them the circuit opens and calls are refused
+    without being attempted. Once ``reset_timeout`` seconds have passed it
+    half-opens: a single probe call is let through, closing the circuit on
+    success and opening it for another ``reset_timeout`` on failure.
+    """
+
+    def __init__(self, name, failure_threshold, reset_timeout):
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self.last_error = None
+        self.opened_at = None
+        self.retry_at = None
+        self.times_opened = 0
+        self.short_circuits = 0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """Return whether a call may go ahead; exactly one caller gets to probe a half-open circuit."""
+        if not config.CIRCUIT_BREAKER_ENABLED:
+            return True
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if not self._probing and time.time() >= self.retry_at:
+                self.state = HALF_OPEN
+                self._probing = True
+                logger.info(f"Circuit for {self.name} half-open, probing")
+                return True
+            self.short_circuits += 1
+            return False
+
+    def record_success(self):
+        if not config.CIRCUIT_BREAKER_ENABLED:
+            return
+        with self._lock:
+            self.failures = 0
+            self._probing = False
+            if self.state != CLOSED:
+                logger.info(f"Circuit for {self.name} closed again")
+                self.state, self.opened_at, self.retry_at = CLOSED, None, None
+
+    def record_failure(self, error):
+        if not config.CIRCUIT_BREAKER_ENABLED:
+            return
+        with self._lock:
+            self.failures += 1
+            self.last_error = str(error)
+            was_probing, self._probing = self._probing, False
+            if was_probing or (self.state == CLOSED and self.failures >= self.failure_threshold):
+                if self.state == CLOSED:
+                    logger.warning(f"Circuit for {self.name} opened after {self.failures} failures: {error}")
+                    self.times_opened += 1
+                self.state = OPEN
+                self.opened_at = time.time()
+                self.retry_at = self.opened_at + self.reset_timeout
+
+    def release(self):
+        """Give up a probe that ended without a verdict, letting the next caller probe instead."""
+        with self._lock:
+            if self._probing:
+                self._probing = False
+                self.state = OPEN
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                "state": self.state,
+                "consecutive_failures": self.failures,
+                "last_error": self.last_error,
+                "opened_at": self.opened_at,
+                "retry_in_seconds": round(max(0.0, self.retry_at - time.time()), 1) if self.retry_at else None,
+                "times_opened": self.times_opened,
+                "short_circuits": self.short_circuits
+            }
+
+class CircuitBreakers:
+    """Circuit breakers created on first use, one per key (a site name or a host)."""
+
+    def __init__(self, failure_threshold, reset_timeout):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._breakers = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        breaker = self._breakers.get(key)
+        if breaker is None:
+            with self._lock:
+                breaker = self._breakers.get(key)
+                if breaker is None:
+                    breaker = CircuitBreaker(key, self.failure_threshold, self.reset_timeout)
+                    self._breakers[key] = breaker
+        return breaker
+
+    def snapshot(self):
+        """Return the state of every breaker keyed by site or host."""
+        with self._lock:
+            breakers = sorted(self._breakers.items())
+        return {key: breaker.to_dict() for key, breaker in breakers}
+
+site_breakers = CircuitBreakers(config.CIRCUIT_FAILURE_THRESHOLD, config.CIRCUIT_RESET_TIMEOUT)
+host_breakers = CircuitBreakers(config.HOST_CIRCUIT_FAILURE_THRESHOLD, config.HOST_CIRCUIT_RESET_TIMEOUT)
@@ -0,0 +1,95 @@
+import contextvars
+import logging
+import sys
+import os
+import time
+from contextlib import contextmanager
+import requests
+
+# Add parent directory to path to import config
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import config
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+class DeadlineExceeded(requests.exceptions.Timeout):
+    """Raised instead of sending a request once the overall deadline has passed."""
+
+class Budget:
+    """An absolute deadline on the monotonic clock, and whether a fetch ran into it."""
+
+    __slots__ = ('expires_at', 'exceeded')
+
+    def __init__(self, expires_at):
+        self.expires_at = expires_at
+        self.exceeded = False
+
+    def remaining(self):
+        return self.expires_at - time.monotonic()
+
+_budget = contextvars.ContextVar('deadline_budget', default=None)
+
+@contextmanager
+def overall_deadline(seconds):
+    """
+    Bound everything started in this context (tasks, scraper threads and the
+    fetches they make) by ``seconds`` from now. Does nothing when ``seconds``
+    is None; an enclosing, earlier deadline is kept.
+    """
+    if seconds is None:
+        yield _budget.get()
+        return
+    expires_at = time.monotonic() + seconds
+    parent = _budget.get()
+    if parent is not None:
+        expires_at = min(expires_at, parent.expires_at)
+    budget = Budget(expires_at)
+    token = _budget.set(budget)
+    try:
+        yield budget
+    finally:
+        _budget.reset(token)
+
+def current():
+    """Return the Budget of the current context, or None without a deadline."""
+    return _budget.get()
+
+def remaining():
+    """Return the seconds left before the current deadline, or None without one."""
+    budget = _budget.get()
+    return None if budget is None else max(0.0, budget.remaining())
+
+def expired():
+    """Return whether the current context has a deadline that has passed."""
+    budget = _budget.get()
+    return budget is not None and budget.remaining() <= 0
+
+def clamp_timeout(timeout):
+    """
+    Return ``timeout`` cut down to the time left before the current deadline.
+    Raises DeadlineExceeded when no time is left.
+    """
+    budget = _budget.get()
+    if budget is None:
+        return timeout
+    left = budget.remaining()
+    if left <= 0:
+        budget.exceeded = True
+        raise DeadlineExceeded("Overall deadline exceeded")
+    return left if timeout is None else min(timeout, left)
+
+def run_within(budget, function, *args):
+    """Call ``function(*args)`` with ``budget`` as the deadline of the current context."""
+    _budget.set(budget)
+    return function(*args)
+
+def site_budget(parent):
+    """
+    Return the Budget for one site's fetches under the overall ``parent``
+    budget. It ends slightly earlier, leaving the scraper time to return what
+    it already has before the overall deadline cuts it off.
+    """
+    left = max(0.0, parent.remaining())
+    reserve = min(config.DEADLINE_RESERVE, left * 0.1)
+    return Budget(parent.expires_at - reserve)
@@ -0,0 +1,233 @@
+import hashlib
+import logging
+import random
+import sqlite3
+import sys
+import os
+import threading
+import zlib
+from array import array
+from .article_cache import canonical_url, is_cacheable
+from .text_cleaning import normalize_words
+
+# Add parent directory to path to import config
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import config
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# MinHash signature length, split into BANDS bands of ROWS values for LSH. Two articles become
+# candidates when any band matches, which is likely from a Jaccard similarity of about
+# (1 / BANDS) ** (1 / ROWS) = 0.5 up; candidates are then checked against DEDUP_THRESHOLD.
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+SHINGLE_SIZE = 3
+# Articles with fewer word shingles than this (failed fetches, teasers) are not matched
+MIN_SHINGLES = 5
+# Most candidates compared per lookup, so a crowded bucket cannot slow lookups down
+MAX_CANDIDATES = 50
+
+_MERSENNE_PRIME = (1 << 61) - 1
+# Fixed seed: signatures stored by one process must be comparable with those of every other
+_rng = random.Random(0x5eed)
+_PERMUTATIONS = [(_rng.randrange(1, _MERSENNE_PRIME), _rng.randrange(0, _MERSENNE_PRIME)) for _ in range(NUM_PERM)]
+
+def shingles(text):
+    """Return the set of word shingles of ``text``, hashed to stable 32-bit integers."""
+    words = normalize_words(text)
+    return {
+        zlib.crc32(' '.join(words[i:i + SHINGLE_SIZE]).encode('utf-8'))
+        for i in range(max(0, len(words) - SHINGLE_SIZE + 1))
+    }
+
+def minhash(hashed_shingles):
+    """Return the MinHash signature of a non-empty set of hashed shingles."""
+    return array('Q', (
+        min((a * value + b) % _MERSENNE_PRIME for value in hashed_shingles)
+        for a, b in _PERMUTATIONS
+    ))
+
+def similarity(signature, other):
+    """Estimate the Jaccard similarity of two articles from their signatures."""
+    return sum(1 for x, y in zip(signature, other) if x == y) / NUM_PERM
+
+def band_keys(signature):
+    """Return the LSH bucket of each band of a signature, as signed 64-bit integers for SQLite."""
+    # A digest of the band's bytes, so bucket ids stored on disk stay valid across processes and Python versions
+    return [
+        int.from_bytes(
+            hashlib.blake2b(signature[band * ROWS:(band + 1) * ROWS].tobytes(), digest_size=8,
+                            person=b'band%d' % band).digest(),
+            'big', signed=True
+        )
+        for band in range(BANDS)
+    ]
+
+def article_text(article):
+    """Return the text an article is compared on: its headline and, when it was fetched, its body."""
+    text = article.get("headline") or ""
+    if is_cacheable(article.get("article_text")):
+        text += "\n" + article["article_text"]
+    return text
+
+def text_hash(text):
+    """Return a short hash of the text an article was signed from, to tell when it changed."""
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=16).hexdigest()
+
+class DuplicateIndex:
+    """
+    Incremental MinHash LSH index of every article seen, in SQLite.
+
+    Each article is added under its canonical URL to the cluster of the
+    most similar earlier article whose estimated similarity reaches
+    ``threshold``, or to a new cluster of its own, and is signed and placed
+    again when its text changes. A cluster is identified by
+    the canonical URL of its first article. Lookups read only the rows of the
+    article's LSH buckets, so they cost the same however big the index grows.
+    """
+
+    def __init__(self, path, threshold):
+        self.path = path
+        self.threshold = threshold
+        self._local = threading.local()
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            # Transactions are explicit so that lookup and insert are atomic across workers
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            # Safe with WAL, and keeps commits from waiting on an fsync
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS signatures ("
+                "id INTEGER PRIMARY KEY, url TEXT NOT NULL UNIQUE, cluster TEXT NOT NULL, signature BLOB NOT NULL, "
+                "text_hash TEXT)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS bands ("
+                "bucket INTEGER NOT NULL, article INTEGER NOT NULL, PRIMARY KEY (bucket, article)) WITHOUT ROWID"
+            )
+            self._local.conn = conn
+        return conn
+
+    def _closest_cluster(self, conn, buckets, signature):
+        # Articles sharing the most bands are the likeliest near-duplicates, so they are compared first
+        candidates = conn.execute(
+            "SELECT s.cluster, s.signature FROM bands b JOIN signatures s ON s.id = b.article "
+            "WHERE b.bucket IN (%s) GROUP BY s.id ORDER BY COUNT(*) DESC, s.id DESC LIMIT ?"
+            % ",".join("?" * len(buckets)),
+            buckets + [MAX_CANDIDATES]
+        ).fetchall()
+        cluster, best = None, self.threshold
+        for candidate_cluster, blob in candidates:
+            score = similarity(signature, array('Q', blob))
+            if score >= best:
+                cluster, best = candidate_cluster, score
+        return cluster
+
+    def lookup(self, signature):
+        """Return the cluster id of the closest indexed near-duplicate of a signature, or None."""
+        return self._closest_cluster(self._connection(), band_keys(signature), signature)
+
+    def indexed(self, urls):
+        """Return ``{url: (cluster, text_hash)}`` for the canonical ``urls`` already in the index."""
+        if not urls:
+            return {}
+        rows = self._connection().execute(
+            "SELECT url, cluster, text_hash FROM signatures WHERE url IN (%s)" % ",".join("?" * len(urls)),
+            list(urls)
+        ).fetchall()
+        return {url: (cluster, digest) for url, cluster, digest in rows}
+
+    def assign(self, url, signature, digest):
+        """
+        Add an article signed from text with hash ``digest`` to the index, or
+        sign it again when it is there with other text, and return its cluster
+        id: the URL of the first article of the cluster.
+        """
+        url = canonical_url(url)
+        buckets = band_keys(signature)
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT id, cluster, signature, text_hash FROM signatures WHERE url = ?",
+                               (url,)).fetchone()
+            if row is not None and row[3] == digest:
+                conn.execute("COMMIT")
+                return row[1]
+
+            if row is None:
+                cluster = self._closest_cluster(conn, buckets, signature) or url
+                article_id = conn.execute(
+                    "INSERT INTO signatures (url, cluster, signature, text_hash) VALUES (?, ?, ?, ?)",
+                    (url, cluster, signature.tobytes(), digest)
+                ).lastrowid
+            else:
+                # Out of its old buckets first, so it is not its own closest match
+                article_id = row[0]
+                conn.executemany(
+                    "DELETE FROM bands WHERE bucket = ? AND article = ?",
+                    [(bucket, article_id) for bucket in band_keys(array('Q', row[2]))]
+                )
+                cluster = self._closest_cluster(conn, buckets, signature) or url
+                conn.execute(
+                    "UPDATE signatures SET cluster = ?, signature = ?, text_hash = ? WHERE id = ?",
+                    (cluster, signature.tobytes(), digest, article_id)
+                )
+            conn.executemany(
+                "INSERT OR IGNORE INTO bands (bucket, article) VALUES (?, ?)",
+                [(bucket, article_id) for bucket in buckets]
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return cluster
+
+duplicate_index = DuplicateIndex(config.DEDUP_INDEX_PATH, config.DEDUP_THRESHOLD)
+
+def mark_duplicates(articles):
+    """
+    Set ``duplicate_of`` on every article: the cluster id of the earlier
+    article (on any site) it is a near-duplicate of, or None when it is the
+    first copy seen or too short to compare.
+    """
+    if not config.DEDUP_ENABLED:
+        return
+    for article in articles:
+        article["duplicate_of"] = None
+    urls = {canonical_url(article["article_url"]) for article in articles if article.get("article_url")}
+    try:
+        indexed = duplicate_index.indexed(urls)
+    except sqlite3.Error as e:
+        logger.warning(f"Duplicate lookup failed: {e}")
+        return
+
+    for article in articles:
+        if not article.get("article_url"):
+            continue
+        url = canonical_url(article["article_url"])
+        text = article_text(article)
+        digest = text_hash(text)
+        known = indexed.get(url)
+        # Signing is the costly part: only new articles and changed text are signed,
+        # and a failed body fetch keeps the signature of the text fetched before
+        if known is not None and (known[1] == digest or not is_cacheable(article.get("article_text"))):
+            cluster = known[0]
+        else:
+            hashed = shingles(text)
+            if len(hashed) < MIN_SHINGLES:
+                continue
+            try:
+                cluster = duplicate_index.assign(url, minhash(hashed), digest)
+            except sqlite3.Error as e:
+                logger.warning(f"Duplicate lookup failed for {article['article_url']}: {e}")
+                continue
+        if cluster != url:
+            article["duplicate_of"] = cluster
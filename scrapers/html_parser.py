@@ -0,0 +1,261 @@
+import logging
+import re
+import sys
+import os
+import time
+from functools import lru_cache
+from bs4 import BeautifulSoup
+
+# Add parent directory to path to import config
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import config
+from .metrics import observe_parse
+
+try:
+    import lxml.html
+    from lxml import etree
+    from lxml.cssselect import CSSSelector
+except ImportError:
+    lxml = None
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+class SoupNode:
+    """Node API on top of a BeautifulSoup tag."""
+
+    __slots__ = ('_tag',)
+
+    def __init__(self, tag):
+        self._tag = tag
+
+    def select(self, css):
+        """Return all descendants matching a CSS selector, in document order."""
+        return [SoupNode(tag) for tag in self._tag.select(css)]
+
+    def select_one(self, css):
+        """Return the first descendant matching a CSS selector, or None."""
+        tag = self._tag.select_one(css)
+        return SoupNode(tag) if tag is not None else None
+
+    def children(self, tag_name):
+        """Return the direct child elements with the given tag name."""
+        return [SoupNode(tag) for tag in self._tag.find_all(tag_name, recursive=False)]
+
+    def find_parent(self, tag_name):
+        """Return the closest ancestor with the given tag name, or None."""
+        tag = self._tag.find_parent(tag_name)
+        return SoupNode(tag) if tag is not None else None
+
+    def get(self, name, default=None):
+        """Return an attribute value as a string."""
+        value = self._tag.get(name, default)
+        if isinstance(value, list):
+            value = " ".join(value)
+        return value
+
+    def text(self, separator="", strip=False):
+        """Return the text content, like BeautifulSoup's get_text()."""
+        return self._tag.get_text(separator=separator, strip=strip)
+
+    def remove(self):
+        """Remove the element and its subtree from the document."""
+        self._tag.decompose()
+
+class LxmlNode:
+    """Node API on top of an lxml.html element."""
+
+    __slots__ = ('_el',)
+
+    def __init__(self, el):
+        self._el = el
+
+    def select(self, css):
+        """Return all descendants matching a CSS selector, in document order."""
+        return [LxmlNode(el) for el in _compile(css)(self._el) if el is not self._el]
+
+    def select_one(self, css):
+        """Return the first descendant matching a CSS selector, or None."""
+        for el in _compile(css)(self._el):
+            if el is not self._el:
+                return LxmlNode(el)
+        return None
+
+    def children(self, tag_name):
+        """Return the direct child elements with the given tag name."""
+        return [LxmlNode(el) for el in self._el.iterchildren(tag_name)]
+
+    def find_parent(self, tag_name):
+        """Return the closest ancestor with the given tag name, or None."""
+        for el in self._el.iterancestors(tag_name):
+            return LxmlNode(el)
+        return None
+
+    def get(self, name, default=None):
+        """Return an attribute value as a string."""
+        return self._el.get(name, default)
+
+    def text(self, separator="", strip=False):
+        """Return the text content, like BeautifulSoup's get_text()."""
+        strings = _TEXT_XPATH(self._el)
+        if strip:
+            strings = [s.strip() for s in strings]
+            strings = [s for s in strings if s]
+        return separator.join(strings)
+
+    def remove(self):
+        """Remove the element and its subtree from the document, keeping its tail text."""
+        self._el.drop_tree()
+
+if lxml is not None:
+    # Text nodes as BeautifulSoup's get_text() sees them: no script, style or template content
+    _TEXT_XPATH = etree.XPath(
+        "descendant-or-self::text()[not(ancestor::script or ancestor::style or ancestor::template)]",
+        smart_strings=False
+    )
+    _UTF8_PARSER = lxml.html.HTMLParser(encoding='utf-8')
+    _DEFAULT_PARSER = lxml.html.HTMLParser()
+
+# Start of a script or style element or a comment: never read by an extractor, often most of the page
+_BOILERPLATE_START_RE = re.compile(rb'<(script|style)\b|<!--')
+_CHARSET_META_RE = re.compile(rb'<meta\b[^>]*charset[^>]*>', re.IGNORECASE)
+_SIMPLE_SELECTOR_RE = re.compile(r'^([a-zA-Z][a-zA-Z0-9]*)((?:[.#][\w-]+)*)$')
+_ATTR_RE_TEMPLATE = r'(?:^|\s){}\s*=\s*(?:"([^"]*)"|\'([^\']*)\'|([^\s>]+))'
+_CLASS_ATTR_RE = re.compile(_ATTR_RE_TEMPLATE.format('class').encode(), re.IGNORECASE)
+_ID_ATTR_RE = re.compile(_ATTR_RE_TEMPLATE.format('id').encode(), re.IGNORECASE)
+
+def strip_boilerplate(content):
+    """Remove <script> and <style> elements and HTML comments from a page."""
+    if isinstance(content, str):
+        content = content.encode('utf-8')
+    # Plain find() on a lowercased copy is several times faster than a lazy DOTALL regex
+    lowered = content.lower()
+    parts = []
+    position = 0
+    while True:
+        start = _BOILERPLATE_START_RE.search(lowered, position)
+        if start is None:
+            break
+        if start.group(1):
+            end = lowered.find(b'</' + start.group(1), start.end())
+            end = lowered.find(b'>', end) + 1 if end != -1 else 0
+        else:
+            end = lowered.find(b'-->', start.end())
+            end = end + 3 if end != -1 else 0
+        if not end:
+            break
+        parts.append(content[position:start.start()])
+        position = end
+    parts.append(content[position:])
+    return b''.join(parts)
+
+def _attr_value(pattern, start_tag):
+    match = pattern.search(start_tag)
+    if not match:
+        return None
+    return next(group for group in match.groups() if group is not None)
+
+@lru_cache(maxsize=128)
+def _region_patterns(selector):
+    """Split a simple ``tag.class#id`` selector into a start-tag regex, an open/close regex, classes and id."""
+    match = _SIMPLE_SELECTOR_RE.match(selector)
+    if not match:
+        raise ValueError(f"Unsupported region selector: {selector}")
+    tag = match.group(1).encode()
+    parts = re.findall(r'([.#])([\w-]+)', match.group(2))
+    classes = {name.encode() for kind, name in parts if kind == '.'}
+    ids = [name.encode() for kind, name in parts if kind == '#']
+    start_re = re.compile(rb'<' + tag + rb'\b[^>]*>', re.IGNORECASE)
+    boundary_re = re.compile(rb'<(/?)' + tag + rb'\b[^>]*?(/?)>', re.IGNORECASE)
+    return start_re, boundary_re, classes, ids[0] if ids else None
+
+def extract_region(content, selector):
+    """
+    Return the bytes of the first element matching a simple ``tag.class#id``
+    selector, from its start tag to the matching end tag, or None if the
+    element is missing or not closed.
+    """
+    start_re, boundary_re, classes, element_id = _region_patterns(selector)
+    for start in start_re.finditer(content):
+        start_tag = start.group(0)
+        if classes and not classes.issubset((_attr_value(_CLASS_ATTR_RE, start_tag) or b'').split()):
+            continue
+        if element_id is not None and _attr_value(_ID_ATTR_RE, start_tag) != element_id:
+            continue
+        depth = 1
+        for boundary in boundary_re.finditer(content, start.end()):
+            if boundary.group(1):
+                depth -= 1
+            elif not boundary.group(2):
+                depth += 1
+            if depth == 0:
+                # Carry the charset declaration over so the fragment decodes like the page
+                charset = _CHARSET_META_RE.search(content, 0, start.start())
+                prefix = charset.group(0) if charset else b''
+                return prefix + content[start.start():boundary.end()]
+        return None
+    return None
+
+@lru_cache(maxsize=512)
+def _compile(css):
+    """Compile a CSS selector to XPath once and reuse it for every document."""
+    return CSSSelector(css, translator='html')
+
+def _parse_lxml(content):
+    if isinstance(content, bytes):
+        # libxml2 assumes Latin-1 when a page does not declare its charset,
+        # which garbles Arabic text; prefer UTF-8 whenever the bytes are valid UTF-8.
+        try:
+            content.decode('utf-8')
+            parser = _UTF8_PARSER
+        except UnicodeDecodeError:
+            parser = _DEFAULT_PARSER
+        return LxmlNode(lxml.html.document_fromstring(content, parser=parser))
+    return LxmlNode(lxml.html.document_fromstring(content))
+
+def _parse_bs4(content):
+    return SoupNode(BeautifulSoup(content, "lxml"))
+
+def prepare_html(content, region=None):
+    """
+    Return the markup parse_html() hands to the parser. With
+    config.HTML_PARSE_REGIONS on, scripts, styles and comments are stripped
+    and, if ``region`` names a simple selector such as "div.featured-articles",
+    only the first matching element is kept. The whole page is kept when the
+    region cannot be found.
+    """
+    if not config.HTML_PARSE_REGIONS:
+        return content
+    content = strip_boilerplate(content)
+    if region:
+        fragment = extract_region(content, region)
+        if fragment is not None:
+            return fragment
+        logger.debug(f"Region {region} not found, parsing the whole page")
+    return content
+
+def parse_html(content, backend=None, region=None):
+    """
+    Parse an HTML document and return its root node.
+
+    ``backend`` is "lxml" or "bs4" and defaults to config.HTML_PARSER. The lxml
+    backend parses with lxml.html and evaluates CSS through compiled, cached
+    selectors, avoiding the cost of a BeautifulSoup tree and soupsieve. It
+    falls back to BeautifulSoup when lxml is unavailable or rejects the document.
+
+    ``region`` limits parsing to the element an extractor reads (see
+    prepare_html()). The region element stays selectable from the returned
+    root, so extractors work unchanged.
+    """
+    start = time.perf_counter()
+    try:
+        backend = backend or config.HTML_PARSER
+        content = prepare_html(content, region)
+        if backend == "lxml" and lxml is not None:
+            try:
+                return _parse_lxml(content)
+            except (etree.ParserError, ValueError) as e:
+                logger.debug(f"lxml could not parse document, falling back to BeautifulSoup: {e}")
+        return _parse_bs4(content)
+    finally:
+        observe_parse(time.perf_counter() - start)
@@ -0,0 +1,170 @@
+import hashlib
+import json
+import logging
+import sys
+import os
+import threading
+import time
+import requests
+from requests.structures import CaseInsensitiveDict
+
+# Add parent directory to path to import config
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import config
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Response headers kept alongside the cached body
+_STORED_HEADERS = ('Content-Type', 'ETag', 'Last-Modified')
+
+class HTTPCache:
+    """
+    Disk-backed cache of validated responses for conditional GETs.
+
+    Responses carrying an ETag or Last-Modified header are stored as a JSON
+    metadata file plus the raw body. Later requests for the same URL send
+    If-None-Match / If-Modified-Since, and a 304 is answered from disk.
+    """
+
+    def __init__(self, directory, max_entries=500):
+        self.directory = directory
+        self.max_entries = max_entries
+        self._stores = 0
+        self._lock = threading.Lock()
+
+    def _paths(self, url):
+        key = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        base = os.path.join(self.directory, key)
+        return base + '.json', base + '.body'
+
+    def _load_meta(self, url):
+        meta_path, _ = self._paths(url)
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def conditional_headers(self, url):
+        """Return the If-None-Match / If-Modified-Since headers for a cached URL."""
+        meta = self._load_meta(url)
+        if not meta:
+            return {}
+        headers = {}
+        if meta.get('etag'):
+            headers['If-None-Match'] = meta['etag']
+        if meta.get('last_modified'):
+            headers['If-Modified-Since'] = meta['last_modified']
+        return headers
+
+    def store(self, url, response):
+        """Store a 200 response if the server sent validators for it."""
+        if response.status_code != 200:
+            return
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        if not (etag or last_modified):
+            return
+
+        meta = {
+            'url': url,
+            'etag': etag,
+            'last_modified': last_modified,
+            'encoding': response.encoding,
+            'headers': {k: response.headers[k] for k in _STORED_HEADERS if k in response.headers},
+            'stored_at': time.time()
+        }
+        meta_path, body_path = self._paths(url)
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            # Write the body first and swap files in atomically so readers never see a torn entry
+            for path, data, mode in ((body_path, response.content, 'wb'),
+                                     (meta_path, json.dumps(meta), 'w')):
+                tmp_path = "%s.%d.%d.tmp" % (path, os.getpid(), threading.get_ident())
+                with open(tmp_path, mode) as f:
+                    f.write(data)
+                os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not write HTTP cache entry for {url}: {e}")
+            return
+
+        with self._lock:
+            self._stores += 1
+            should_prune = self._stores % 50 == 0
+        if should_prune:
+            self.prune()
+
+    def load(self, url):
+        """Build a 200 response from the cached entry, or return None if it is missing."""
+        meta = self._load_meta(url)
+        if not meta:
+            return None
+        meta_path, body_path = self._paths(url)
+        try:
+            with open(body_path, 'rb') as f:
+                body = f.read()
+            # Mark the entry as recently used so pruning keeps it
+            os.utime(meta_path)
+        except OSError:
+            return None
+
+        response = requests.Response()
+        response.status_code = 200
+        response.reason = 'OK'
+        response.url = url
+        response._content = body
+        response.encoding = meta.get('encoding')
+        response.headers = CaseInsensitiveDict(meta.get('headers', {}))
+        response.from_cache = True
+        response.cache_key = url
+        return response
+
+    def prune(self):
+        """Drop the least recently used entries beyond max_entries."""
+        try:
+            entries = [
+                os.path.join(self.directory, name)
+                for name in os.listdir(self.directory) if name.endswith('.json')
+            ]
+        except OSError:
+            return
+        if len(entries) <= self.max_entries:
+            return
+        entries.sort(key=lambda path: os.path.getmtime(path) if os.path.exists(path) else 0)
+        for meta_path in entries[:len(entries) - self.max_entries]:
+            for path in (meta_path, meta_path[:-len('.json')] + '.body'):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+http_cache = HTTPCache(config.HTTP_CACHE_DIR, config.HTTP_CACHE_MAX_ENTRIES)
+
+# Last parse result per URL, keyed by the validators of the page it came from
+_parsed = {}
+_parsed_lock = threading.Lock()
+
+def parse_cached(response, parse_function, *args):
+    """
+    Return ``parse_function(response.content, *args)``, reusing the previous
+    result when the page was revalidated with a 304 and is byte-for-byte the
+    one parsed last time. Returns fresh copies so callers can mutate them.
+    """
+    url = getattr(response, 'cache_key', None)
+    headers = getattr(response, 'headers', None) or {}
+    validators = (headers.get('ETag'), headers.get('Last-Modified'))
+    if url is None or not any(validators):
+        return parse_function(response.content, *args)
+
+    if getattr(response, 'from_cache', False):
+        with _parsed_lock:
+            cached = _parsed.get(url)
+        if cached and cached[0] == validators:
+            logger.debug(f"Reusing parsed homepage for {url}")
+            return [dict(item) for item in cached[1]]
+
+    items = parse_function(response.content, *args)
+    with _parsed_lock:
+        _parsed[url] = (validators, [dict(item) for item in items])
+    return items
@@ -0,0 +1,120 @@
+import base64
+import binascii
+import contextvars
+import hashlib
+import logging
+from contextlib import contextmanager
+from .article_cache import canonical_url, is_cacheable
+from .metrics import count_delivered_skips
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Bytes of the canonical URL hash kept per article: collisions stay negligible
+# for a homepage worth of articles while a cursor fits in a query string
+_KEY_SIZE = 8
+
+def article_key(article_url):
+    """Return the cursor key of an article: a short hash of its canonical URL."""
+    return hashlib.blake2b(canonical_url(article_url).encode('utf-8'), digest_size=_KEY_SIZE).digest()
+
+def encode_cursor(keys):
+    """Return the opaque delivery cursor holding the article keys ``keys``."""
+    return base64.urlsafe_b64encode(b"".join(keys)).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor):
+    """Return the set of article keys in a delivery cursor; raises ValueError when it is not one."""
+    try:
+        raw = base64.b64decode(cursor + '=' * (-len(cursor) % 4), altchars=b'-_', validate=True)
+    except (binascii.Error, ValueError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+    if len(raw) % _KEY_SIZE:
+        raise ValueError(f"Invalid cursor: {cursor}")
+    return {raw[i:i + _KEY_SIZE] for i in range(0, len(raw), _KEY_SIZE)}
+
+class Delivery:
+    """
+    What one caller already has of a site, and what the current scrape saw.
+
+    ``delivered`` holds the keys of the caller's cursor. Every article passed
+    through filter() is remembered, so next_cursor() covers the whole
+    homepage, skipped articles included.
+    """
+
+    def __init__(self, delivered):
+        self.delivered = delivered
+        self._seen = {}
+
+    def filter(self, articles):
+        """Remember ``articles`` and return those the caller does not have yet."""
+        fresh = []
+        for article in articles:
+            url = article.get("article_url")
+            if not url:
+                fresh.append(article)
+                continue
+            key = article_key(url)
+            if key not in self.delivered:
+                fresh.append(article)
+            # Bodies that failed to fetch stay out of the cursor, so the next poll retries them
+            self._seen[key] = key in self.delivered or "article_text" not in article or is_cacheable(article)
+        return fresh
+
+    @property
+    def saw_articles(self):
+        return bool(self._seen)
+
+    def next_cursor(self):
+        """Return the cursor to poll with next: every article seen whose body the caller has."""
+        return encode_cursor(key for key, delivered in self._seen.items() if delivered)
+
+_delivery = contextvars.ContextVar('article_delivery', default=None)
+
+@contextmanager
+def since(cursor):
+    """
+    Scrape only what is new since ``cursor`` in this context: scrapers skip
+    the article-body fetch of every article it covers. Yields the Delivery,
+    or None (and changes nothing) when ``cursor`` is None. Raises ValueError
+    for a malformed cursor.
+    """
+    if cursor is None:
+        yield None
+        return
+    delivery = Delivery(decode_cursor(cursor))
+    token = _delivery.set(delivery)
+    try:
+        yield delivery
+    finally:
+        _delivery.reset(token)
+
+def current():
+    """Return the Delivery of the incremental scrape running in this context, or None."""
+    return _delivery.get()
+
+def skip_delivered(articles):
+    """
+    Return the homepage articles whose body still has to be fetched: all of
+    them, unless this is an incremental scrape (see since()), in which case
+    the articles the caller already has are dropped.
+    """
+    delivery = _delivery.get()
+    if delivery is None:
+        return articles
+    fresh = delivery.filter(articles)
+    skipped = len(articles) - len(fresh)
+    if skipped:
+        # Articles without a URL are never skipped, so any article with one tells the site
+        article_url = next(a["article_url"] for a in articles if a.get("article_url"))
+        logger.debug(f"Skipping the body fetch of {skipped} delivered articles from {article_url}")
+        count_delivered_skips(article_url, skipped)
+    return fresh
+
+def new_since(articles, cursor):
+    """
+    Return ``(new_articles, next_cursor)`` for a finished scrape's articles
+    and a caller's cursor (None: the caller has nothing yet). Raises
+    ValueError for a malformed cursor.
+    """
+    delivery = Delivery(decode_cursor(cursor) if cursor is not None else set())
+    return delivery.filter(articles), delivery.next_cursor()
@@ -1,22 +1,24 @@
 import requests
-from bs4 import BeautifulSoup
 import re
+from ..scrapfly_helper import direct_get, fetch_homepage_articles
+from ..html_parser import parse_html
+from ..text_cleaning import join_paragraphs
 
 # --- Helper Functions ---
 
 def _get_article_text(article_url):
     """Helper function to fetch and parse the text from an Addiyar article page."""
     try:
-        response = requests.get(article_url, timeout=10)
+        response = direct_get(article_url, timeout=10)
         response.raise_for_status()
-        soup = BeautifulSoup(response.content, "lxml")
+        document = parse_html(response.content, region="div.article-content")
         
-        content_div = soup.find("div", class_="article-content")
+        content_div = document.select_one("div.article-content")
         if not content_div:
             return "Article content not found."
             
-        paragraphs = content_div.find_all("p")
-        article_text = "\n".join([p.get_text(strip=True) for p in paragraphs])
+        paragraphs = content_div.select("p")
+        article_text = join_paragraphs((p.text(strip=True) for p in paragraphs), keep_blank=True)
         return article_text
         
     except requests.exceptions.RequestException as e:
@@ -29,16 +31,16 @@ def _get_annahar_article_text(article_url):
         'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
     }
     try:
-        response = requests.get(article_url, timeout=10, headers=headers)
+        response = direct_get(article_url, timeout=10, headers=headers)
         response.raise_for_status()
-        soup = BeautifulSoup(response.content, "lxml")
+        document = parse_html(response.content, region="div.bodyContentMainParent")
         
-        content_div = soup.find("div", class_="bodyContentMainParent")
+        content_div = document.select_one("div.bodyContentMainParent")
         if not content_div:
             return "Article content not found."
             
-        paragraphs = content_div.find_all("p")
-        article_text = "\n".join([p.get_text(strip=True) for p in paragraphs])
+        paragraphs = content_div.select("p")
+        article_text = join_paragraphs((p.text(strip=True) for p in paragraphs), keep_blank=True)
         return article_text
         
     except requests.exceptions.RequestException as e:
@@ -48,16 +50,16 @@ def _get_annahar_article_text(article_url):
 def _get_aljoumhouria_article_text(article_url):
     """Helper function to fetch and parse the text from an Al-Joumhouria article page."""
     try:
-        response = requests.get(article_url, timeout=10)
+        response = direct_get(article_url, timeout=10)
         response.raise_for_status()
-        soup = BeautifulSoup(response.content, "lxml")
+        document = parse_html(response.content, region="div.description.direction-rtl")
         
-        content_div = soup.find("div", class_="description direction-rtl")
+        content_div = document.select_one("div.description.direction-rtl")
         if not content_div:
             return "Article content not found."
             
-        paragraphs = content_div.find_all("p")
-        article_text = "\n".join([p.get_text(strip=True) for p in paragraphs])
+        paragraphs = content_div.select("p")
+        article_text = join_paragraphs((p.text(strip=True) for p in paragraphs), keep_blank=True)
         return article_text
         
     except requests.exceptions.RequestException as e:
@@ -66,151 +68,166 @@ def _get_aljoumhouria_article_text(article_url):
 
 # --- Scraper Functions ---
 
-def scrape_addiyar():
-    """
-    Scrapes featured articles from addiyar.com.
-    """
-    URL = "https://www.addiyar.com/"
-    BASE_URL = "https://www.addiyar.com"
+def _parse_addiyar_homepage(content, base_url):
+    """Extracts featured articles from the addiyar.com homepage HTML."""
     scraped_data = []
 
-    try:
-        response = requests.get(URL, timeout=15)
-        response.raise_for_status()
-    except requests.exceptions.RequestException as e:
-        print("Error fetching the main URL %s: %s" % (URL, e))
-        return []
-
-    soup = BeautifulSoup(response.content, "lxml")
+    document = parse_html(content, region="div.featured-articles")
 
-    featured_articles_div = soup.find("div", class_="featured-articles")
+    featured_articles_div = document.select_one("div.featured-articles")
     if not featured_articles_div:
         return []
 
-    articles = featured_articles_div.find_all("article")
+    articles = featured_articles_div.select("article")
 
     for article in articles:
-        header_tag = article.find("h2")
-        figure_tag = article.find("figure")
-        link_tag = article.find("a")
+        header_tag = article.select_one("h2")
+        figure_tag = article.select_one("figure")
+        link_tag = article.select_one("a")
 
-        if not header_tag or not figure_tag or not link_tag or not link_tag.has_attr("href"):
+        if not header_tag or not figure_tag or not link_tag or link_tag.get("href") is None:
             continue
 
-        headline = header_tag.get_text(separator=" ", strip=True)
-        article_url = BASE_URL + link_tag["href"]
+        headline = header_tag.text(separator=" ", strip=True)
+        article_url = base_url + link_tag.get("href")
 
         style_attr = figure_tag.get("style", "")
         match = re.search(r"url\('([^']+)'\)", style_attr)
         image_url = match.group(1) if match else ""
 
         if headline and image_url and article_url:
-            article_text = _get_article_text(article_url)
             scraped_data.append({
                 "headline": headline,
                 "image_url": image_url,
-                "article_url": article_url,
-                "article_text": article_text
+                "article_url": article_url
             })
 
     return scraped_data
 
-def scrape_annahar():
+def scrape_addiyar():
     """
-    Scrapes featured articles from an-nahar.com.
+    Scrapes featured articles from addiyar.com.
     """
-    URL = "https://www.annahar.com/"
-    scraped_data = []
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-    }
+    URL = "https://www.addiyar.com/"
+    BASE_URL = "https://www.addiyar.com"
 
     try:
-        response = requests.get(URL, timeout=15, headers=headers)
+        response = direct_get(URL, timeout=15)
         response.raise_for_status()
     except requests.exceptions.RequestException as e:
         print("Error fetching the main URL %s: %s" % (URL, e))
         return []
 
-    soup = BeautifulSoup(response.content, "lxml")
+    scraped_data = fetch_homepage_articles(response, "addiyar", _parse_addiyar_homepage, BASE_URL, _get_article_text)
 
-    featured_articles = soup.select("div.listingItemDIV.featured")
+    return scraped_data
+
+def _parse_annahar_homepage(content, base_url):
+    """Extracts featured articles from the an-nahar.com homepage HTML."""
+    scraped_data = []
+
+    document = parse_html(content)
+
+    featured_articles = document.select("div.listingItemDIV.featured")
 
     for article in featured_articles:
-        title_div = article.find("div", class_="listingTitle")
-        image_div = article.find("div", class_="listingImage")
+        title_div = article.select_one("div.listingTitle")
+        image_div = article.select_one("div.listingImage")
 
         if not title_div or not image_div:
             continue
         
-        link_tag = title_div.find("a")
-        img_tag = image_div.find("img")
+        link_tag = title_div.select_one("a")
+        img_tag = image_div.select_one("img")
 
-        if not link_tag or not img_tag or not link_tag.has_attr("href"):
+        if not link_tag or not img_tag or link_tag.get("href") is None:
             continue
 
-        headline = link_tag.get_text(strip=True)
-        article_url = link_tag["href"]
+        headline = link_tag.text(strip=True)
+        article_url = link_tag.get("href")
         image_url = img_tag.get("data-src", "")
 
         if headline and image_url and article_url:
-            article_text = _get_annahar_article_text(article_url)
             scraped_data.append({
                 "headline": headline,
                 "image_url": image_url,
-                "article_url": article_url,
-                "article_text": article_text
+                "article_url": article_url
             })
 
     return scraped_data
 
-def scrape_aljoumhouria():
+def scrape_annahar():
     """
-    Scrapes the main featured article from aljoumhouria.com.
+    Scrapes featured articles from an-nahar.com.
     """
-    URL = "https://www.aljoumhouria.com/ar"
-    BASE_URL = "https://www.aljoumhouria.com"
-    scraped_data = []
+    URL = "https://www.annahar.com/"
+    headers = {
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+    }
 
     try:
-        response = requests.get(URL, timeout=15)
+        response = direct_get(URL, timeout=15, headers=headers)
         response.raise_for_status()
     except requests.exceptions.RequestException as e:
         print("Error fetching the main URL %s: %s" % (URL, e))
         return []
 
-    soup = BeautifulSoup(response.content, "lxml")
+    scraped_data = fetch_homepage_articles(response, "annahar", _parse_annahar_homepage, URL, _get_annahar_article_text)
 
-    big_news_div = soup.find("div", class_="big-block-news")
+    return scraped_data
+
+def _parse_aljoumhouria_homepage(content, base_url):
+    """Extracts the main featured article from the aljoumhouria.com homepage HTML."""
+    scraped_data = []
+
+    document = parse_html(content, region="div.big-block-news")
+
+    big_news_div = document.select_one("div.big-block-news")
     if not big_news_div:
         return []
 
-    link_tag = big_news_div.find("a")
-    if not link_tag or not link_tag.has_attr("href"):
+    link_tag = big_news_div.select_one("a")
+    if not link_tag or link_tag.get("href") is None:
         return []
 
-    article_url = link_tag["href"]
+    article_url = link_tag.get("href")
     # Ensure the URL is absolute
     if not article_url.startswith('http'):
-        article_url = BASE_URL + article_url
+        article_url = base_url + article_url
 
 
-    img_tag = link_tag.find("img", class_="big-news-img")
-    headline_div = link_tag.find("div", class_="description")
+    img_tag = link_tag.select_one("img.big-news-img")
+    headline_div = link_tag.select_one("div.description")
 
     if not img_tag or not headline_div:
         return []
     
     image_url = img_tag.get("src", "")
-    headline = headline_div.get_text(strip=True)
+    headline = headline_div.text(strip=True)
 
     if headline and image_url and article_url:
-        article_text = _get_aljoumhouria_article_text(article_url)
         scraped_data.append({
             "headline": headline,
             "image_url": image_url,
-            "article_url": article_url,
-            "article_text": article_text
+            "article_url": article_url
         })
 
-    return scraped_data 
\ No newline at end of file
+    return scraped_data
+
+def scrape_aljoumhouria():
+    """
+    Scrapes the main featured article from aljoumhouria.com.
+    """
+    URL = "https://www.aljoumhouria.com/ar"
+    BASE_URL = "https://www.aljoumhouria.com"
+
+    try:
+        response = direct_get(URL, timeout=15)
+        response.raise_for_status()
+    except requests.exceptions.RequestException as e:
+        print("Error fetching the main URL %s: %s" % (URL, e))
+        return []
+
+    scraped_data = fetch_homepage_articles(response, "aljoumhouria", _parse_aljoumhouria_homepage, BASE_URL, _get_aljoumhouria_article_text)
+
+    return scraped_data
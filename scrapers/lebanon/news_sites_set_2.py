@@ -4,10 +4,21 @@ def scrape_site(url, site_name):
     return []
 
 import requests
-from bs4 import BeautifulSoup
 import json
 import re
-from ..scrapfly_helper import get_with_fallback
+from ..scrapfly_helper import direct_get, get_with_fallback, fetch_homepage_articles
+from ..html_parser import parse_html
+from ..text_cleaning import ParagraphFilter, join_paragraphs
+
+# Substantial Arabic paragraphs of more than 3 words, without the masthead and short section labels
+_ALAKHBAR_PARAGRAPHS = ParagraphFilter(
+    min_chars=21, min_words=4, require_arabic=True,
+    skip_terms=('الأخبار', 'تموز 2025', 'EN'),
+    label_terms=('لبنان|سياسة', 'فلسطين', 'سوريا', 'عرب وعالم')
+)
+
+# Aliwaa puts paragraphs in bare divs; very short ones are empty wrappers or captions
+_ALIWAA_PARAGRAPHS = ParagraphFilter(min_chars=11)
 
 def _get_alakhbar_article_text(article_url):
     """Helper function to fetch and parse the text from an Al-Akhbar article page."""
@@ -17,34 +28,21 @@ def _get_alakhbar_article_text(article_url):
     try:
         response = get_with_fallback(article_url, timeout=10, headers=headers)
         response.raise_for_status()
-        soup = BeautifulSoup(response.content, "lxml")
+        document = parse_html(response.content, region="main")
 
         # Look for the main content container that Scrapfly returns
-        content_container = soup.select_one("main.container")
+        content_container = document.select_one("main.container")
         if not content_container:
             # Fallback to other possible containers
-            content_container = soup.select_one("main")
+            content_container = document.select_one("main")
             if not content_container:
-                content_container = soup.select_one("div.gap-4.sm\\:flex")
+                content_container = document.select_one("div.gap-4.sm\\:flex")
                 if not content_container:
                     return "Article content not found."
 
-        # Look for paragraphs with substantial Arabic content
-        paragraphs = content_container.find_all('p')
-        article_text_parts = []
-        
-        for p in paragraphs:
-            text = p.get_text(strip=True)
-            # Filter out navigation/menu items and keep only substantial Arabic content
-            if (text and len(text) > 20 and 
-                any('\u0600' <= char <= '\u06FF' for char in text) and
-                not any(skip_word in text for skip_word in ['الأخبار', 'تموز 2025', 'EN']) and
-                len(text.split()) > 3):  # More than 3 words
-                # Skip very short category labels but keep article content
-                if not (len(text) < 50 and any(category in text for category in ['لبنان|سياسة', 'فلسطين', 'سوريا', 'عرب وعالم'])):
-                    article_text_parts.append(text)
-
-        article_text = "\n".join(article_text_parts)
+        # Keep paragraphs with substantial Arabic content, not navigation/menu items or category labels
+        paragraphs = content_container.select('p')
+        article_text = _ALAKHBAR_PARAGRAPHS.join(p.text(strip=True) for p in paragraphs)
 
         return article_text if article_text else "Article content not found."
         
@@ -52,40 +50,29 @@ def _get_alakhbar_article_text(article_url):
         print("Error processing article %s: %s" % (article_url, e))
         return "Failed to retrieve article text."
 
-def scrape_al_akhbar():
-    """
-    Scrapes the main featured articles from al-akhbar.com.
-    """
-    URL = "https://www.al-akhbar.com/"
-    BASE_URL = "https://www.al-akhbar.com"
+def _parse_al_akhbar_homepage(content, base_url):
+    """Extracts the main featured articles from the al-akhbar.com homepage HTML."""
     scraped_data = []
 
-    try:
-        response = get_with_fallback(URL, timeout=15)
-        response.raise_for_status()
-    except requests.exceptions.RequestException as e:
-        print("Error fetching the main URL %s: %s" % (URL, e))
-        return []
-
-    soup = BeautifulSoup(response.content, "lxml")
+    document = parse_html(content)
 
     # The main articles are located in a grid. We find all of them.
     # The selector targets the container for each article in the main grid.
-    articles = soup.select("div.grid.md\\:grid-cols-2 > div.group")
+    articles = document.select("div.grid.md\\:grid-cols-2 > div.group")
 
     if not articles:
         print("Could not find any article containers on the main page.")
         return []
 
     for article_container in articles:
-        link_tag = article_container.find("a", href=True)
-        headline_tag = article_container.find("h3")
-        img_tag = article_container.find("img")
+        link_tag = article_container.select_one("a[href]")
+        headline_tag = article_container.select_one("h3")
+        img_tag = article_container.select_one("img")
 
         if not (link_tag and headline_tag and img_tag):
             continue
 
-        headline = headline_tag.get_text(strip=True)
+        headline = headline_tag.text(strip=True)
         article_url = link_tag.get("href")
         
         image_url = img_tag.get('src')
@@ -99,21 +86,32 @@ def scrape_al_akhbar():
             continue
 
         if not article_url.startswith('http'):
-            article_url = BASE_URL + article_url
-        
-        # To avoid being blocked, we only fetch the text for the first article
-        if len(scraped_data) == 0:
-            article_text = _get_alakhbar_article_text(article_url)
-        else:
-            article_text = "Not fetched to avoid excessive requests."
+            article_url = base_url + article_url
             
         scraped_data.append({
             "headline": headline,
             "image_url": image_url,
-            "article_url": article_url,
-            "article_text": article_text
+            "article_url": article_url
         })
 
+    return scraped_data
+
+def scrape_al_akhbar():
+    """
+    Scrapes the main featured articles from al-akhbar.com.
+    """
+    URL = "https://www.al-akhbar.com/"
+    BASE_URL = "https://www.al-akhbar.com"
+
+    try:
+        response = get_with_fallback(URL, timeout=15)
+        response.raise_for_status()
+    except requests.exceptions.RequestException as e:
+        print("Error fetching the main URL %s: %s" % (URL, e))
+        return []
+
+    scraped_data = fetch_homepage_articles(response, "alakhbar", _parse_al_akhbar_homepage, BASE_URL, _get_alakhbar_article_text)
+
     if not scraped_data:
         print("Could not scrape any articles from Al-Akhbar.")
 
@@ -124,18 +122,18 @@ def _get_nidaalwatan_article_text(article_url):
     try:
         response = get_with_fallback(article_url, timeout=10)
         response.raise_for_status()
-        soup = BeautifulSoup(response.content, "lxml")
+        document = parse_html(response.content, region="div.article-content")
         
-        content_div = soup.select_one("div.article-content")
+        content_div = document.select_one("div.article-content")
         if not content_div:
             return "Article content not found."
 
         # Remove related articles and other clutter before extracting text
         for element in content_div.select("div.relatedArticles, ul.keywords, div.mpu"):
-            element.decompose()
+            element.remove()
             
-        paragraphs = content_div.find_all("p")
-        article_text = "\n".join(p.get_text(strip=True) for p in paragraphs if p.get_text(strip=True))
+        paragraphs = content_div.select("p")
+        article_text = join_paragraphs(p.text(strip=True) for p in paragraphs)
         
         return article_text if article_text else "Article text not found."
 
@@ -143,24 +141,14 @@ def _get_nidaalwatan_article_text(article_url):
         print("Error fetching article %s: %s" % (article_url, e))
         return "Failed to retrieve article text."
 
-def scrape_nidaalwatan():
-    """
-    Scrapes featured articles from nidaalwatan.com.
-    """
-    URL = "https://www.nidaalwatan.com"
+def _parse_nidaalwatan_homepage(content, base_url):
+    """Extracts featured articles from the nidaalwatan.com homepage HTML."""
     scraped_data = []
 
-    try:
-        response = get_with_fallback(URL, timeout=15)
-        response.raise_for_status()
-    except requests.exceptions.RequestException as e:
-        print("Error fetching the main URL %s: %s" % (URL, e))
-        return []
-
-    soup = BeautifulSoup(response.content, "lxml")
+    document = parse_html(content, region="div.featured_articles")
     
     # Select all featured articles from the carousel
-    articles = soup.select("div.featured_articles div.carousel-component > a")
+    articles = document.select("div.featured_articles div.carousel-component > a")
 
     if not articles:
         print("Could not find any featured articles on Nidaalwatan.")
@@ -168,12 +156,12 @@ def scrape_nidaalwatan():
     
     for article_link in articles:
         headline_tag = article_link.select_one("div.info > p")
-        figure_tag = article_link.find("figure")
+        figure_tag = article_link.select_one("figure")
 
         if not (headline_tag and figure_tag):
             continue
             
-        headline = headline_tag.get_text(strip=True)
+        headline = headline_tag.text(strip=True)
         article_url = article_link.get("href")
         
         # Extract image URL from inline style attribute
@@ -185,20 +173,30 @@ def scrape_nidaalwatan():
             continue
 
         if not article_url.startswith('http'):
-            article_url = URL + article_url
+            article_url = base_url + article_url
 
-        article_text = _get_nidaalwatan_article_text(article_url)
-        
         scraped_data.append({
             "headline": headline,
             "image_url": image_url,
-            "article_url": article_url,
-            "article_text": article_text
+            "article_url": article_url
         })
-        
-        # To avoid being blocked, we only process the first article for now
-        if scraped_data:
-            break
+
+    return scraped_data
+
+def scrape_nidaalwatan():
+    """
+    Scrapes featured articles from nidaalwatan.com.
+    """
+    URL = "https://www.nidaalwatan.com"
+
+    try:
+        response = get_with_fallback(URL, timeout=15)
+        response.raise_for_status()
+    except requests.exceptions.RequestException as e:
+        print("Error fetching the main URL %s: %s" % (URL, e))
+        return []
+
+    scraped_data = fetch_homepage_articles(response, "nidaalwatan", _parse_nidaalwatan_homepage, URL, _get_nidaalwatan_article_text)
 
     if not scraped_data:
         print("Could not scrape any articles from Nidaalwatan.")
@@ -211,63 +209,42 @@ def _get_aliwaa_article_text(article_url):
         'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
     }
     try:
-        response = requests.get(article_url, timeout=10, headers=headers)
+        response = direct_get(article_url, timeout=10, headers=headers)
         response.raise_for_status()
-        soup = BeautifulSoup(response.content, "lxml")
+        document = parse_html(response.content, region="div.content-container")
         
-        content_div = soup.select_one("div.content-container")
+        content_div = document.select_one("div.content-container")
         if not content_div:
             return "Article content not found."
 
         # Remove any ads or unwanted elements
         for element in content_div.select("div[id*='gpt'], iframe, .advertisement"):
-            element.decompose()
+            element.remove()
             
         # Extract text from divs (aliwaa uses divs instead of paragraphs)
-        content_divs = content_div.find_all("div", recursive=False)
-        article_text_parts = []
-        
-        for div in content_divs:
-            text = div.get_text(strip=True)
-            if text and len(text) > 10:  # Skip empty or very short divs
-                article_text_parts.append(text)
-        
-        article_text = "\n".join(article_text_parts)
+        content_divs = content_div.children("div")
+        article_text = _ALIWAA_PARAGRAPHS.join(div.text(strip=True) for div in content_divs)
         return article_text if article_text else "Article text not found."
 
     except requests.exceptions.RequestException as e:
         print("Error fetching article %s: %s" % (article_url, e))
         return "Failed to retrieve article text."
 
-def scrape_aliwaa():
-    """
-    Scrapes featured articles from aliwaa.com.lb.
-    """
-    URL = "https://aliwaa.com.lb"
+def _parse_aliwaa_homepage(content, base_url):
+    """Extracts featured articles from the aliwaa.com.lb homepage HTML."""
     scraped_data = []
-    
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-    }
 
-    try:
-        response = requests.get(URL, timeout=15, headers=headers)
-        response.raise_for_status()
-    except requests.exceptions.RequestException as e:
-        print("Error fetching the main URL %s: %s" % (URL, e))
-        return []
-
-    soup = BeautifulSoup(response.content, "lxml")
+    document = parse_html(content)
     
     # Select all news carousel items
-    articles = soup.select("div.news-carousel-item")
+    articles = document.select("div.news-carousel-item")
 
     if not articles:
         print("Could not find any news carousel items on Aliwaa.")
         return []
     
     for article_item in articles:
-        link_tag = article_item.find("a", href=True)
+        link_tag = article_item.select_one("a[href]")
         if not link_tag:
             continue
             
@@ -276,11 +253,11 @@ def scrape_aliwaa():
         if not title_span:
             continue
             
-        headline = title_span.get_text(strip=True)
+        headline = title_span.text(strip=True)
         article_url = link_tag.get("href")
         
         # Extract image URL from img tag, handling lazy loading
-        img_tag = link_tag.find("img")
+        img_tag = link_tag.select_one("img")
         image_url = None
         if img_tag:
             # Check data-src first (for lazy loading), then src
@@ -292,27 +269,41 @@ def scrape_aliwaa():
             
             # Build complete URL if it's relative
             if image_url and not image_url.startswith('http'):
-                image_url = URL + image_url
+                image_url = base_url + image_url
 
         if not (headline and article_url):
             continue
 
         # Build full URL if relative
         if not article_url.startswith('http'):
-            article_url = URL + article_url
+            article_url = base_url + article_url
 
-        article_text = _get_aliwaa_article_text(article_url)
-        
         scraped_data.append({
             "headline": headline,
             "image_url": image_url,
-            "article_url": article_url,
-            "article_text": article_text
+            "article_url": article_url
         })
-        
-        # To avoid being blocked, we only process the first article for now
-        if scraped_data:
-            break
+
+    return scraped_data
+
+def scrape_aliwaa():
+    """
+    Scrapes featured articles from aliwaa.com.lb.
+    """
+    URL = "https://aliwaa.com.lb"
+    
+    headers = {
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+    }
+
+    try:
+        response = direct_get(URL, timeout=15, headers=headers)
+        response.raise_for_status()
+    except requests.exceptions.RequestException as e:
+        print("Error fetching the main URL %s: %s" % (URL, e))
+        return []
+
+    scraped_data = fetch_homepage_articles(response, "aliwaa", _parse_aliwaa_homepage, URL, _get_aliwaa_article_text)
 
     if not scraped_data:
         print("Could not scrape any articles from Aliwaa.")
@@ -1,7 +1,8 @@
 import requests
-from bs4 import BeautifulSoup
 import re
-from ..scrapfly_helper import get_with_fallback
+from ..scrapfly_helper import direct_get, get_with_fallback, fetch_homepage_articles
+from ..html_parser import parse_html
+from ..text_cleaning import clean_lines, collapse_whitespace, join_paragraphs
 
 def scrape_site(url, site_name):
     """A generic template to scrape a news site."""
@@ -16,19 +17,19 @@ def _get_elsharkonline_article_text(article_url):
     try:
         response = get_with_fallback(article_url, timeout=10, headers=headers)
         response.raise_for_status()
-        soup = BeautifulSoup(response.content, "lxml")
+        document = parse_html(response.content, region="div.entry-content.clearfix.single-post-content")
         
-        content_div = soup.select_one("div.entry-content.clearfix.single-post-content")
+        content_div = document.select_one("div.entry-content.clearfix.single-post-content")
         if not content_div:
             return "Article content not found."
 
         # Remove any ads, share buttons or unwanted elements
         for element in content_div.select("div.post-share, div[id*='gpt'], iframe, .advertisement"):
-            element.decompose()
+            element.remove()
             
         # Extract text from paragraphs
-        paragraphs = content_div.find_all("p")
-        article_text = "\n".join(p.get_text(strip=True) for p in paragraphs if p.get_text(strip=True))
+        paragraphs = content_div.select("p")
+        article_text = join_paragraphs(p.text(strip=True) for p in paragraphs)
         
         return article_text if article_text else "Article text not found."
 
@@ -36,28 +37,14 @@ def _get_elsharkonline_article_text(article_url):
         print("Error fetching article %s: %s" % (article_url, e))
         return "Failed to retrieve article text."
 
-def scrape_elsharkonline():
-    """
-    Scrapes featured articles from elsharkonline.com.
-    """
-    URL = "https://www.elsharkonline.com"
+def _parse_elsharkonline_homepage(content, base_url):
+    """Extracts featured articles from the elsharkonline.com homepage HTML."""
     scraped_data = []
-    
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-    }
 
-    try:
-        response = get_with_fallback(URL, timeout=15, headers=headers)
-        response.raise_for_status()
-    except requests.exceptions.RequestException as e:
-        print("Error fetching the main URL %s: %s" % (URL, e))
-        return []
-
-    soup = BeautifulSoup(response.content, "lxml")
+    document = parse_html(content)
     
     # Select all articles from the main column
-    articles = soup.select("div.column-1 > article")
+    articles = document.select("div.column-1 > article")
 
     if not articles:
         print("Could not find any articles on Elsharkonline.")
@@ -69,7 +56,7 @@ def scrape_elsharkonline():
         if not title_link:
             continue
             
-        headline = title_link.get_text(strip=True)
+        headline = title_link.text(strip=True)
         article_url = title_link.get("href")
         
         # Extract image URL from featured div background-image style
@@ -83,31 +70,45 @@ def scrape_elsharkonline():
 
         # Extract summary text
         summary_div = article.select_one("div.post-summary")
-        summary = summary_div.get_text(strip=True) if summary_div else ""
+        summary = summary_div.text(strip=True) if summary_div else ""
 
         if not (headline and article_url):
             continue
 
         # Build full URL if relative
         if not article_url.startswith('http'):
-            article_url = URL + article_url
+            article_url = base_url + article_url
             
         # Build full image URL if relative
         if image_url and not image_url.startswith('http'):
-            image_url = URL + image_url
+            image_url = base_url + image_url
 
-        article_text = _get_elsharkonline_article_text(article_url)
-        
         scraped_data.append({
             "headline": headline,
             "image_url": image_url,
-            "article_url": article_url,
-            "article_text": article_text
+            "article_url": article_url
         })
-        
-        # To avoid being blocked, we only process the first article for now
-        if scraped_data:
-            break
+
+    return scraped_data
+
+def scrape_elsharkonline():
+    """
+    Scrapes featured articles from elsharkonline.com.
+    """
+    URL = "https://www.elsharkonline.com"
+    
+    headers = {
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+    }
+
+    try:
+        response = get_with_fallback(URL, timeout=15, headers=headers)
+        response.raise_for_status()
+    except requests.exceptions.RequestException as e:
+        print("Error fetching the main URL %s: %s" % (URL, e))
+        return []
+
+    scraped_data = fetch_homepage_articles(response, "elsharkonline", _parse_elsharkonline_homepage, URL, _get_elsharkonline_article_text)
 
     if not scraped_data:
         print("Could not scrape any articles from Elsharkonline.")
@@ -120,25 +121,24 @@ def _get_mtv_article_text(article_url):
         'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
     }
     try:
-        response = requests.get(article_url, timeout=10, headers=headers)
+        response = direct_get(article_url, timeout=10, headers=headers)
         response.raise_for_status()
-        soup = BeautifulSoup(response.content, "lxml")
+        document = parse_html(response.content, region="div.articles-report")
         
-        content_div = soup.select_one("div.articles-report")
+        content_div = document.select_one("div.articles-report")
         if not content_div:
             return "Article content not found."
 
         # Remove any ads and unwanted elements
         for element in content_div.select("div[id*='gpt'], iframe, .article-ad, div[id*='google_ads']"):
-            element.decompose()
+            element.remove()
             
         # Extract text from paragraphs and line breaks
         # MTV uses both <p> tags and <br> tags for content formatting
-        text_content = content_div.get_text(separator="\n", strip=True)
+        text_content = content_div.text(separator="\n", strip=True)
         
         # Clean up extra whitespace and empty lines
-        lines = [line.strip() for line in text_content.split('\n') if line.strip()]
-        article_text = "\n".join(lines)
+        article_text = clean_lines(text_content)
         
         return article_text if article_text else "Article text not found."
 
@@ -146,28 +146,14 @@ def _get_mtv_article_text(article_url):
         print("Error fetching article %s: %s" % (article_url, e))
         return "Failed to retrieve article text."
 
-def scrape_mtv():
-    """
-    Scrapes quick news from mtv.com.lb.
-    """
-    URL = "https://www.mtv.com.lb"
+def _parse_mtv_homepage(content, base_url):
+    """Extracts quick news from the mtv.com.lb homepage HTML."""
     scraped_data = []
-    
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-    }
 
-    try:
-        response = requests.get(URL, timeout=15, headers=headers)
-        response.raise_for_status()
-    except requests.exceptions.RequestException as e:
-        print("Error fetching the main URL %s: %s" % (URL, e))
-        return []
-
-    soup = BeautifulSoup(response.content, "lxml")
+    document = parse_html(content, region="div.swiper-wrapper.news-wrapper")
     
     # Select all news items from the swiper
-    news_items = soup.select("div.swiper-wrapper.news-wrapper > a.swiper-slide.news-item")
+    news_items = document.select("div.swiper-wrapper.news-wrapper > a.swiper-slide.news-item")
 
     if not news_items:
         print("Could not find any news items on MTV Lebanon.")
@@ -181,13 +167,13 @@ def scrape_mtv():
             
         # Extract time
         time_span = news_title_div.select_one("span.news-time")
-        time = time_span.get_text(strip=True) if time_span else ""
+        time = time_span.text(strip=True) if time_span else ""
         
         # Remove time span to get clean headline
         if time_span:
-            time_span.decompose()
+            time_span.remove()
             
-        headline = news_title_div.get_text(strip=True)
+        headline = news_title_div.text(strip=True)
         article_url = news_item.get("href")
 
         if not (headline and article_url):
@@ -195,27 +181,46 @@ def scrape_mtv():
 
         # Build full URL if relative
         if not article_url.startswith('http'):
-            article_url = URL + article_url
+            article_url = base_url + article_url
 
-        # Get article details including image and full text
-        article_details = _get_mtv_article_details(article_url)
-        
         scraped_data.append({
             "headline": headline,
-            "image_url": article_details.get("image_url"),
-            "article_url": article_url,
-            "article_text": article_details.get("article_text", "")
+            "image_url": None,
+            "article_url": article_url
         })
-        
-        # To avoid being blocked, we only process the first article for now
-        if scraped_data:
-            break
+
+    return scraped_data
+
+def scrape_mtv():
+    """
+    Scrapes quick news from mtv.com.lb.
+    """
+    URL = "https://www.mtv.com.lb"
+    
+    headers = {
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+    }
+
+    try:
+        response = direct_get(URL, timeout=15, headers=headers)
+        response.raise_for_status()
+    except requests.exceptions.RequestException as e:
+        print("Error fetching the main URL %s: %s" % (URL, e))
+        return []
+
+    # Article pages give the image as well as the full text
+    scraped_data = fetch_homepage_articles(response, "mtv", _parse_mtv_homepage, URL, _get_mtv_article_details,
+                                           attach=_attach_mtv_article_details)
 
     if not scraped_data:
         print("Could not scrape any news items from MTV Lebanon.")
         
     return scraped_data
 
+def _attach_mtv_article_details(article, article_details):
+    article["image_url"] = article_details.get("image_url")
+    article["article_text"] = article_details.get("article_text", "")
+
 def _get_mtv_article_details(article_url):
     """Helper function to fetch article details including image and text from MTV article page."""
     headers = {
@@ -225,28 +230,27 @@ def _get_mtv_article_details(article_url):
     details = {"image_url": None, "article_text": ""}
     
     try:
-        response = requests.get(article_url, timeout=10, headers=headers)
+        response = direct_get(article_url, timeout=10, headers=headers)
         response.raise_for_status()
-        soup = BeautifulSoup(response.content, "lxml")
+        document = parse_html(response.content)
         
         # Extract image URL
-        img_tag = soup.select_one("div.articles-header-image img")
+        img_tag = document.select_one("div.articles-header-image img")
         if img_tag:
             details["image_url"] = img_tag.get("src")
         
         # Extract article text
-        content_div = soup.select_one("div.articles-report")
+        content_div = document.select_one("div.articles-report")
         if content_div:
             # Remove any ads and unwanted elements
             for element in content_div.select("div[id*='gpt'], iframe, .article-ad, div[id*='google_ads']"):
-                element.decompose()
+                element.remove()
                 
             # Extract text from paragraphs and line breaks
-            text_content = content_div.get_text(separator="\n", strip=True)
+            text_content = content_div.text(separator="\n", strip=True)
             
             # Clean up extra whitespace and empty lines
-            lines = [line.strip() for line in text_content.split('\n') if line.strip()]
-            details["article_text"] = "\n".join(lines)
+            details["article_text"] = clean_lines(text_content)
         
     except requests.exceptions.RequestException as e:
         print("Error fetching article details %s: %s" % (article_url, e))
@@ -260,24 +264,24 @@ def _get_aljadeed_article_text(article_url):
         'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
     }
     try:
-        response = requests.get(article_url, timeout=10, headers=headers)
+        response = direct_get(article_url, timeout=10, headers=headers)
         response.raise_for_status()
-        soup = BeautifulSoup(response.content, "lxml")
+        document = parse_html(response.content, region="div.LongDesc.text-title-9")
         
-        content_div = soup.select_one("div.LongDesc.text-title-9")
+        content_div = document.select_one("div.LongDesc.text-title-9")
         if not content_div:
             return "Article content not found."
 
         # Remove any unwanted injection elements
         for element in content_div.select("controlinjection"):
-            element.decompose()
+            element.remove()
             
         # Extract text while preserving some formatting
         # Al-Jadeed uses custom formatting with entity links
-        text_content = content_div.get_text(separator=" ", strip=True)
+        text_content = content_div.text(separator=" ", strip=True)
         
         # Clean up extra whitespace
-        article_text = re.sub(r'\s+', ' ', text_content).strip()
+        article_text = collapse_whitespace(text_content)
         
         return article_text if article_text else "Article text not found."
 
@@ -285,29 +289,15 @@ def _get_aljadeed_article_text(article_url):
         print("Error fetching article %s: %s" % (article_url, e))
         return "Failed to retrieve article text."
 
-def scrape_aljadeed():
-    """
-    Scrapes featured articles from aljadeed.tv.
-    """
-    URL = "https://www.aljadeed.tv"
+def _parse_aljadeed_homepage(content, base_url):
+    """Extracts featured articles from the aljadeed.tv homepage HTML."""
     scraped_data = []
-    
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-    }
 
-    try:
-        response = requests.get(URL, timeout=15, headers=headers)
-        response.raise_for_status()
-    except requests.exceptions.RequestException as e:
-        print("Error fetching the main URL %s: %s" % (URL, e))
-        return []
-
-    soup = BeautifulSoup(response.content, "lxml")
+    document = parse_html(content)
     
     # Select slider images and info containers
-    image_slides = soup.select("div.swiper-wrapper > div.swiper-slide.pres-swiper-slide")
-    info_slides = soup.select("div.swiper-info-container div.swiper-wrapper > div.swiper-slide")
+    image_slides = document.select("div.swiper-wrapper > div.swiper-slide.pres-swiper-slide")
+    info_slides = document.select("div.swiper-info-container div.swiper-wrapper > div.swiper-slide")
 
     if not image_slides or not info_slides:
         print("Could not find any articles on Al-Jadeed TV.")
@@ -330,35 +320,49 @@ def scrape_aljadeed():
         if not title_link:
             continue
             
-        headline = title_link.get_text(strip=True)
+        headline = title_link.text(strip=True)
         
         # Extract category
         category_link = info_slide.select_one("div.card-category-inner .card-title h2 a")
-        category = category_link.get_text(strip=True) if category_link else ""
+        category = category_link.text(strip=True) if category_link else ""
 
         if not (headline and article_url and image_url):
             continue
 
         # Build full URL if relative
         if not article_url.startswith('http'):
-            article_url = URL + article_url
+            article_url = base_url + article_url
             
         # Build full image URL if relative
         if not image_url.startswith('http'):
-            image_url = URL + image_url
+            image_url = base_url + image_url
 
-        article_text = _get_aljadeed_article_text(article_url)
-        
         scraped_data.append({
             "headline": headline,
             "image_url": image_url,
-            "article_url": article_url,
-            "article_text": article_text
+            "article_url": article_url
         })
-        
-        # To avoid being blocked, we only process the first article for now
-        if scraped_data:
-            break
+
+    return scraped_data
+
+def scrape_aljadeed():
+    """
+    Scrapes featured articles from aljadeed.tv.
+    """
+    URL = "https://www.aljadeed.tv"
+    
+    headers = {
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+    }
+
+    try:
+        response = direct_get(URL, timeout=15, headers=headers)
+        response.raise_for_status()
+    except requests.exceptions.RequestException as e:
+        print("Error fetching the main URL %s: %s" % (URL, e))
+        return []
+
+    scraped_data = fetch_homepage_articles(response, "aljadeed", _parse_aljadeed_homepage, URL, _get_aljadeed_article_text)
 
     if not scraped_data:
         print("Could not scrape any articles from Al-Jadeed TV.")
@@ -373,19 +377,19 @@ def _get_sawtbeirut_article_text(article_url):
     try:
         response = get_with_fallback(article_url, timeout=10, headers=headers)
         response.raise_for_status()
-        soup = BeautifulSoup(response.content, "lxml")
+        document = parse_html(response.content, region="div.single-description")
         
-        content_div = soup.select_one("div.single-description")
+        content_div = document.select_one("div.single-description")
         if not content_div:
             return "Article content not found."
 
         # Remove any ads, share buttons or unwanted elements
         for element in content_div.select("div.heateor_sss_sharing_container, div[class*='code-block'], script, .ai-viewports"):
-            element.decompose()
+            element.remove()
             
         # Extract text from paragraphs
-        paragraphs = content_div.find_all("p")
-        article_text = "\n".join(p.get_text(strip=True) for p in paragraphs if p.get_text(strip=True))
+        paragraphs = content_div.select("p")
+        article_text = join_paragraphs(p.text(strip=True) for p in paragraphs)
         
         return article_text if article_text else "Article text not found."
 
@@ -393,28 +397,14 @@ def _get_sawtbeirut_article_text(article_url):
         print("Error fetching article %s: %s" % (article_url, e))
         return "Failed to retrieve article text."
 
-def scrape_sawtbeirut():
-    """
-    Scrapes featured articles from sawtbeirut.com.
-    """
-    URL = "https://www.sawtbeirut.com"
+def _parse_sawtbeirut_homepage(content, base_url):
+    """Extracts featured articles from the sawtbeirut.com homepage HTML."""
     scraped_data = []
-    
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-    }
 
-    try:
-        response = get_with_fallback(URL, timeout=15, headers=headers)
-        response.raise_for_status()
-    except requests.exceptions.RequestException as e:
-        print("Error fetching the main URL %s: %s" % (URL, e))
-        return []
-
-    soup = BeautifulSoup(response.content, "lxml")
+    document = parse_html(content, region="section#headlines")
     
     # Select the headlines section
-    headlines_section = soup.select_one("section#headlines")
+    headlines_section = document.select_one("section#headlines")
     if not headlines_section:
         print("Could not find headlines section on Sawt Beirut.")
         return []
@@ -441,7 +431,7 @@ def scrape_sawtbeirut():
         if not title_element:
             continue
             
-        headline = title_element.get_text(strip=True)
+        headline = title_element.text(strip=True)
         
         # Extract image URL
         img_tag = card.select_one("img")
@@ -449,31 +439,45 @@ def scrape_sawtbeirut():
         
         # Extract category
         category_span = card.select_one("span.cat")
-        category = category_span.get_text(strip=True) if category_span else ""
+        category = category_span.text(strip=True) if category_span else ""
 
         if not (headline and article_url):
             continue
 
         # Build full URL if relative
         if not article_url.startswith('http'):
-            article_url = URL + article_url
+            article_url = base_url + article_url
             
         # Build full image URL if relative
         if image_url and not image_url.startswith('http'):
-            image_url = URL + image_url
+            image_url = base_url + image_url
 
-        article_text = _get_sawtbeirut_article_text(article_url)
-        
         scraped_data.append({
             "headline": headline,
             "image_url": image_url,
-            "article_url": article_url,
-            "article_text": article_text
+            "article_url": article_url
         })
-        
-        # To avoid being blocked, we only process the first article for now
-        if scraped_data:
-            break
+
+    return scraped_data
+
+def scrape_sawtbeirut():
+    """
+    Scrapes featured articles from sawtbeirut.com.
+    """
+    URL = "https://www.sawtbeirut.com"
+    
+    headers = {
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+    }
+
+    try:
+        response = get_with_fallback(URL, timeout=15, headers=headers)
+        response.raise_for_status()
+    except requests.exceptions.RequestException as e:
+        print("Error fetching the main URL %s: %s" % (URL, e))
+        return []
+
+    scraped_data = fetch_homepage_articles(response, "sawtbeirut", _parse_sawtbeirut_homepage, URL, _get_sawtbeirut_article_text)
 
     if not scraped_data:
         print("Could not scrape any articles from Sawt Beirut.")
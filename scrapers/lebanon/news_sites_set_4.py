@@ -1,6 +1,8 @@
 import requests
-from bs4 import BeautifulSoup
 import re
+from ..scrapfly_helper import direct_get, fetch_homepage_articles
+from ..html_parser import parse_html
+from ..text_cleaning import join_paragraphs
 
 def scrape_site(url, site_name):
     """A generic template to scrape a news site."""
@@ -13,29 +15,29 @@ def _get_lebanondebate_article_text(article_url):
         'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
     }
     try:
-        response = requests.get(article_url, timeout=10, headers=headers)
+        response = direct_get(article_url, timeout=10, headers=headers)
         response.raise_for_status()
-        soup = BeautifulSoup(response.content, "lxml")
+        document = parse_html(response.content)
         
         # First try to get summary text
-        summary_div = soup.select_one("div.summary-text.text")
+        summary_div = document.select_one("div.summary-text.text")
         summary_text = ""
         if summary_div:
-            summary_paragraphs = summary_div.find_all("p")
-            summary_text = "\n".join(p.get_text(strip=True) for p in summary_paragraphs if p.get_text(strip=True))
+            summary_paragraphs = summary_div.select("p")
+            summary_text = join_paragraphs(p.text(strip=True) for p in summary_paragraphs)
         
         # Then get main article text
-        content_div = soup.select_one("div.article-texts.text")
+        content_div = document.select_one("div.article-texts.text")
         if not content_div:
             return summary_text if summary_text else "Article content not found."
 
         # Remove any ads and unwanted elements
         for element in content_div.select("div[id*='gpt'], div.advertisement, iframe, script"):
-            element.decompose()
+            element.remove()
             
         # Extract text from paragraphs
-        paragraphs = content_div.find_all("p")
-        article_text = "\n".join(p.get_text(strip=True) for p in paragraphs if p.get_text(strip=True))
+        paragraphs = content_div.select("p")
+        article_text = join_paragraphs(p.text(strip=True) for p in paragraphs)
         
         # Combine summary and article text
         full_text = ""
@@ -53,28 +55,14 @@ def _get_lebanondebate_article_text(article_url):
 def scrape_nna_leb():
     return scrape_site("https://www.nna-leb.gov.lb", "NNA Lebanon")
 
-def scrape_lebanondebate():
-    """
-    Scrapes featured articles from lebanondebate.com.
-    """
-    URL = "https://www.lebanondebate.com"
+def _parse_lebanondebate_homepage(content, base_url):
+    """Extracts featured articles from the lebanondebate.com homepage HTML."""
     scraped_data = []
-    
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-    }
 
-    try:
-        response = requests.get(URL, timeout=15, headers=headers)
-        response.raise_for_status()
-    except requests.exceptions.RequestException as e:
-        print("Error fetching the main URL %s: %s" % (URL, e))
-        return []
-
-    soup = BeautifulSoup(response.content, "lxml")
+    document = parse_html(content)
     
     # Select featured articles
-    featured_articles = soup.select("a.featured-article")
+    featured_articles = document.select("a.featured-article")
 
     if not featured_articles:
         print("Could not find any featured articles on Lebanon Debate.")
@@ -99,39 +87,53 @@ def scrape_lebanondebate():
         if not headline_h3:
             continue
             
-        headline = headline_h3.get_text(strip=True)
+        headline = headline_h3.text(strip=True)
         
         # Extract category (first <p> tag)
         category_p = details_div.select_one("p")
-        category = category_p.get_text(strip=True) if category_p else ""
+        category = category_p.text(strip=True) if category_p else ""
         
         # Extract date
         date_tag = details_div.select_one("date")
-        date = date_tag.get_text(strip=True) if date_tag else ""
+        date = date_tag.text(strip=True) if date_tag else ""
 
         if not (headline and article_url):
             continue
 
         # Build full URL if relative
         if not article_url.startswith('http'):
-            article_url = URL + article_url
+            article_url = base_url + article_url
             
         # Build full image URL if relative
         if image_url and not image_url.startswith('http'):
-            image_url = URL + image_url
+            image_url = base_url + image_url
 
-        article_text = _get_lebanondebate_article_text(article_url)
-        
         scraped_data.append({
             "headline": headline,
             "image_url": image_url,
-            "article_url": article_url,
-            "article_text": article_text
+            "article_url": article_url
         })
-        
-        # To avoid being blocked, we only process the first article for now
-        if scraped_data:
-            break
+
+    return scraped_data
+
+def scrape_lebanondebate():
+    """
+    Scrapes featured articles from lebanondebate.com.
+    """
+    URL = "https://www.lebanondebate.com"
+    
+    headers = {
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+    }
+
+    try:
+        response = direct_get(URL, timeout=15, headers=headers)
+        response.raise_for_status()
+    except requests.exceptions.RequestException as e:
+        print("Error fetching the main URL %s: %s" % (URL, e))
+        return []
+
+    scraped_data = fetch_homepage_articles(response, "lebanondebate", _parse_lebanondebate_homepage, URL, _get_lebanondebate_article_text)
 
     if not scraped_data:
         print("Could not scrape any articles from Lebanon Debate.")
@@ -0,0 +1,232 @@
+import bisect
+import contextvars
+import logging
+import sys
+import os
+import threading
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+from urllib.parse import urlsplit
+
+# Add parent directory to path to import config
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import config
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Bucket upper bounds in seconds (or articles) for the histograms below
+_FETCH_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0)
+_CPU_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+_SCRAPE_BUCKETS = (0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0)
+_ARTICLE_BUCKETS = (0, 1, 2, 3, 5, 10, 15, 20, 30)
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join('%s="%s"' % (name, _escape(value)) for name, value in pairs) + '}'
+
+def _format_number(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Counter:
+    """Monotonic counter with labels, rendered in the Prometheus text format."""
+
+    kind = 'counter'
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self):
+        with self._lock:
+            values = sorted(self._values.items())
+        for labels, value in values:
+            yield '%s%s %s' % (self.name, _format_labels(self.labelnames, labels), _format_number(value))
+
+class Histogram:
+    """Histogram with fixed buckets and labels, rendered in the Prometheus text format."""
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=_CPU_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # Per label set: [count per bucket (+Inf last), sum]
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                state = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            state[0][index] += 1
+            state[1] += value
+
+    def render(self):
+        with self._lock:
+            values = sorted((labels, (list(counts), total)) for labels, (counts, total) in self._values.items())
+        for labels, (counts, total) in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                yield '%s_bucket%s %d' % (
+                    self.name, _format_labels(self.labelnames, labels, [('le', _format_number(bound))]), cumulative)
+            yield '%s_sum%s %s' % (self.name, _format_labels(self.labelnames, labels), repr(total))
+            yield '%s_count%s %d' % (self.name, _format_labels(self.labelnames, labels), cumulative)
+
+FETCH_SECONDS = Histogram(
+    'news_fetch_seconds', 'Time to fetch a page, by site and route (direct or scrapfly).',
+    ('site', 'route'), _FETCH_BUCKETS)
+PARSE_SECONDS = Histogram(
+    'news_parse_seconds', 'Time to parse an HTML page into a document, by site.', ('site',))
+EXTRACT_SECONDS = Histogram(
+    'news_extract_seconds', 'Time spent extracting data from parsed pages, by site.', ('site',))
+SCRAPE_SECONDS = Histogram(
+    'news_scrape_seconds', 'Wall-clock time of a full site scrape, by site.', ('site',), _SCRAPE_BUCKETS)
+ARTICLES_PER_SCRAPE = Histogram(
+    'news_articles_per_scrape', 'Articles returned by a site scrape, by site.', ('site',), _ARTICLE_BUCKETS)
+DOWNLOADED_BYTES = Counter(
+    'news_downloaded_bytes_total', 'Response body bytes downloaded, by site and route.', ('site', 'route'))
+SCRAPFLY_FALLBACKS = Counter(
+    'news_scrapfly_fallbacks_total',
+    'Fetches sent to Scrapfly, by site and reason (blocked: after a 403, routed: learned route).',
+    ('site', 'reason'))
+ARTICLE_FAILURES = Counter(
+    'news_article_fetch_failures_total', 'Article pages that could not be fetched or extracted, by site.', ('site',))
+DELIVERED_SKIPS = Counter(
+    'news_article_fetches_skipped_total',
+    'Article bodies not fetched because the caller already had them (incremental scrapes), by site.', ('site',))
+SCRAPES = Counter(
+    'news_scrapes_total', 'Finished site scrapes, by site and status.', ('site', 'status'))
+SCRAPE_TIMEOUTS = Counter(
+    'news_scrape_timeouts_total', 'Site scrapes abandoned at the site deadline, by site.', ('site',))
+
+METRICS = (FETCH_SECONDS, PARSE_SECONDS, EXTRACT_SECONDS, SCRAPE_SECONDS, ARTICLES_PER_SCRAPE,
+           DOWNLOADED_BYTES, SCRAPFLY_FALLBACKS, ARTICLE_FAILURES, DELIVERED_SKIPS, SCRAPES, SCRAPE_TIMEOUTS)
+
+def render():
+    """Return every metric in the Prometheus text exposition format."""
+    lines = []
+    for metric in METRICS:
+        lines.append('# HELP %s %s' % (metric.name, metric.documentation))
+        lines.append('# TYPE %s %s' % (metric.name, metric.kind))
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
+
+@lru_cache(maxsize=256)
+def site_for_host(host):
+    """Return the site label for a host; hosts outside SITE_SETTINGS share one label."""
+    return config.get_site_for_host(host) or 'other'
+
+def site_for_url(url):
+    return site_for_host(urlsplit(url).netloc.lower())
+
+class _StageTimes:
+    """Fetch and parse seconds spent by the current unit of work (a scrape or one article)."""
+
+    __slots__ = ('site', 'fetch', 'parse', 'waiting')
+
+    def __init__(self, site):
+        self.site = site
+        self.fetch = 0.0
+        self.parse = 0.0
+        self.waiting = 0.0
+
+_current = contextvars.ContextVar('news_stage_times', default=None)
+
+@contextmanager
+def stage_timer(site):
+    """
+    Time a unit of work for ``site``. Fetch and parse time recorded inside it
+    is attributed to the site, and the remainder of its wall time (minus time
+    spent waiting on article workers) is recorded as extract time.
+    """
+    if not config.METRICS_ENABLED:
+        yield None
+        return
+    times = _StageTimes(site)
+    token = _current.set(times)
+    start = time.perf_counter()
+    try:
+        yield times
+    finally:
+        elapsed = time.perf_counter() - start
+        _current.reset(token)
+        # Work answered entirely from the article cache parsed nothing, so there was nothing to extract
+        if times.parse:
+            EXTRACT_SECONDS.observe(max(0.0, elapsed - times.fetch - times.parse - times.waiting), site)
+
+def current_site():
+    """Return the site of the unit of work being timed, or None outside a scrape."""
+    times = _current.get()
+    return times.site if times is not None else None
+
+def observe_fetch(url, route, seconds, response=None):
+    """Record one fetch of ``url``; cached responses count no downloaded bytes."""
+    if not config.METRICS_ENABLED:
+        return
+    site = site_for_url(url)
+    FETCH_SECONDS.observe(seconds, site, route)
+    if response is not None and not getattr(response, 'from_cache', False):
+        DOWNLOADED_BYTES.inc(site, route, amount=len(response.content))
+    times = _current.get()
+    if times is not None:
+        times.fetch += seconds
+
+def observe_parse(seconds):
+    """Record the parse of one document for the site being scraped."""
+    if not config.METRICS_ENABLED:
+        return
+    times = _current.get()
+    PARSE_SECONDS.observe(seconds, times.site if times is not None else 'other')
+    if times is not None:
+        times.parse += seconds
+
+def observe_waiting(seconds):
+    """Exclude time spent waiting on other threads from the current extract time."""
+    times = _current.get()
+    if times is not None:
+        times.waiting += seconds
+
+def count_scrapfly_fallback(url, reason):
+    if config.METRICS_ENABLED:
+        SCRAPFLY_FALLBACKS.inc(site_for_url(url), reason)
+
+def count_article_failure(url):
+    if config.METRICS_ENABLED:
+        ARTICLE_FAILURES.inc(site_for_url(url))
+
+def count_delivered_skips(url, count):
+    if config.METRICS_ENABLED:
+        DELIVERED_SKIPS.inc(site_for_url(url), amount=count)
+
+def observe_scrape(site, status, seconds, articles):
+    """Record the outcome of a full site scrape."""
+    if not config.METRICS_ENABLED:
+        return
+    SCRAPES.inc(site, status)
+    SCRAPE_SECONDS.observe(seconds, site)
+    ARTICLES_PER_SCRAPE.observe(articles, site)
+
+def count_scrape_timeout(site):
+    if config.METRICS_ENABLED:
+        SCRAPE_TIMEOUTS.inc(site)
@@ -0,0 +1,263 @@
+import asyncio
+import contextvars
+import functools
+import json
+import logging
+import sys
+import os
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+# Add parent directory to path to import config
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import config
+from .runner import run_scraper, run_scraper_async
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Files and functions that put a sampled stack in a category (see _classify)
+_NETWORK_FILES = ('/socket.py', '/ssl.py', '/http/client.py', '/requests/', '/urllib3/', '/httpx/', '/httpcore/',
+                  '/scrapers/scrapfly_client.py')
+_NETWORK_FUNCTIONS = {'direct_get', '_direct_get', 'scrapfly_get'}
+_RATE_LIMIT_FILES = ('/scrapers/rate_limiter.py',)
+_SELECTOR_FILES = ('/soupsieve/', '/cssselect/')
+_SELECTOR_FUNCTIONS = {'select', 'select_one', 'children', 'find_parent', '_compile'}
+_PARSE_FILES = ('/bs4/builder/', '/html/parser.py', '/_markupbase.py')
+_PARSE_FUNCTIONS = {'parse_html', 'prepare_html', 'strip_boilerplate', 'extract_region', '_parse_lxml', '_parse_bs4'}
+_WAIT_FILES = ('/threading.py', '/concurrent/futures/')
+
+# Outer frames that only start threads and run executor work items
+_BOOTSTRAP_FILES = ('/threading.py', '/concurrent/futures/thread.py')
+
+CATEGORIES = ('network', 'rate_limit', 'parse', 'selectors', 'extract', 'waiting')
+
+def _classify(frames):
+    """Return the category of a sampled stack, given as (filename, function) pairs innermost first."""
+    filenames = [filename.replace('\\', '/') for filename, _ in frames]
+    # Politeness waits happen inside direct_get, so they are told apart first
+    if any(part in name for name in filenames for part in _RATE_LIMIT_FILES):
+        return 'rate_limit'
+    if any(part in name for name in filenames for part in _NETWORK_FILES):
+        return 'network'
+    if any(function in _NETWORK_FUNCTIONS and name.endswith('/scrapers/scrapfly_helper.py')
+           for name, (_, function) in zip(filenames, frames)):
+        return 'network'
+    for name, (_, function) in zip(filenames, frames):
+        if any(part in name for part in _SELECTOR_FILES):
+            return 'selectors'
+        if name.endswith('/scrapers/html_parser.py') and function in _SELECTOR_FUNCTIONS:
+            return 'selectors'
+    for name, (_, function) in zip(filenames, frames):
+        if any(part in name for part in _PARSE_FILES):
+            return 'parse'
+        if name.endswith('/scrapers/html_parser.py') and function in _PARSE_FUNCTIONS:
+            return 'parse'
+    # A scrape thread blocked on its article workers, whose samples are counted on their own threads
+    if any(part in filenames[0] for part in _WAIT_FILES) and any(
+            function == 'fetch_articles' for _, function in frames):
+        return 'waiting'
+    return 'extract'
+
+def _frame_label(frame):
+    code = frame.f_code
+    module = os.path.splitext(os.path.basename(code.co_filename))[0]
+    return "%s:%s" % (module, code.co_name)
+
+class ProfileSession:
+    """
+    Sampling profiler for one scrape.
+
+    A background thread samples the stacks of every thread working on the
+    scrape (the scraper thread and its article workers register themselves)
+    every ``interval`` seconds. Each sample is attributed to a category
+    (network, rate_limit, parse, selectors, extract, waiting) and kept as a
+    folded stack rooted at ``site;category`` for flamegraph tools.
+    """
+
+    def __init__(self, site_name, interval=None):
+        self.site_name = site_name
+        self.interval = config.PROFILE_INTERVAL if interval is None else interval
+        self.id = "%s-%s" % (site_name, datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%fZ"))
+        self.samples = Counter()
+        self.categories = Counter()
+        self.started_at = None
+        self.duration = 0.0
+        self.ticks = 0
+        self._threads = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._sampler = None
+        self._finished = False
+        self.stored = False
+
+    def add_thread(self, ident):
+        with self._lock:
+            self._threads.add(ident)
+
+    def remove_thread(self, ident):
+        with self._lock:
+            self._threads.discard(ident)
+
+    def start(self):
+        self.started_at = time.time()
+        self._sampler = threading.Thread(target=self._run, name="profiler-%s" % self.site_name, daemon=True)
+        self._sampler.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._sampler is not None:
+            self._sampler.join()
+        self.duration = time.time() - self.started_at
+
+    def finish(self):
+        """
+        Stop sampling and store the profile, once: later calls do nothing.
+        Sets ``stored`` when the profile can be read from /profiles/{id}.
+        """
+        with self._lock:
+            if self._finished:
+                return
+            self._finished = True
+        if self.started_at is None:
+            # The scraper never ran (open circuit, deadline already passed): nothing to store
+            return
+        self.stop()
+        self.stored = self.save()
+        logger.info(f"Profiled {self.site_name}: {self.summary()['samples']} samples stored as {self.id}")
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            self.ticks += 1
+            with self._lock:
+                threads = set(self._threads)
+            for ident, frame in sys._current_frames().items():
+                if ident in threads and ident != own:
+                    self._sample(frame)
+
+    def _sample(self, frame):
+        frames, labels = [], []
+        while frame is not None:
+            frames.append((frame.f_code.co_filename, frame.f_code.co_name))
+            labels.append(_frame_label(frame))
+            frame = frame.f_back
+        # Drop the thread and executor plumbing below the scraper code
+        while frames and frames[-1][0].replace('\\', '/').endswith(_BOOTSTRAP_FILES):
+            frames.pop()
+            labels.pop()
+        if not frames:
+            return
+        category = _classify(frames)
+        self.categories[category] += 1
+        self.samples[";".join([self.site_name, category] + labels[::-1])] += 1
+
+    def folded(self):
+        """Return the samples as folded stacks ("frame;frame;... count" per line)."""
+        return "".join("%s %d\n" % (stack, count) for stack, count in sorted(self.samples.items()))
+
+    def summary(self):
+        """Return the per-category breakdown of the samples."""
+        total = sum(self.categories.values())
+        # The real sampling period, which stretches beyond ``interval`` when the process is busy
+        period = self.duration / self.ticks if self.ticks else self.interval
+        return {
+            "id": self.id,
+            "site": self.site_name,
+            "duration_seconds": round(self.duration, 3),
+            "interval_ms": round(period * 1000, 2),
+            "samples": total,
+            # Seconds are thread-seconds: concurrent article workers add up beyond the wall time
+            "breakdown": {
+                category: {
+                    "samples": self.categories[category],
+                    "seconds": round(self.categories[category] * period, 3),
+                    "share": round(self.categories[category] / total, 4) if total else 0.0
+                }
+                for category in CATEGORIES
+            },
+            "folded_url": "/profiles/%s" % self.id
+        }
+
+    def save(self, directory=None):
+        """
+        Write the folded stacks and the summary to PROFILE_DIR and prune old
+        profiles. Returns whether the profile was written.
+        """
+        directory = directory or config.PROFILE_DIR
+        try:
+            os.makedirs(directory, exist_ok=True)
+            with open(os.path.join(directory, self.id + ".folded"), "w", encoding="utf-8") as f:
+                f.write(self.folded())
+            with open(os.path.join(directory, self.id + ".json"), "w", encoding="utf-8") as f:
+                json.dump(self.summary(), f, indent=2)
+        except OSError as e:
+            logger.warning(f"Could not store profile {self.id}: {e}")
+            return False
+        _prune(directory, config.PROFILE_MAX_FILES)
+        return True
+
+def _prune(directory, keep):
+    try:
+        summaries = sorted(name for name in os.listdir(directory) if name.endswith(".json"))
+    except OSError:
+        return
+    summaries.sort(key=lambda name: os.path.getmtime(os.path.join(directory, name)))
+    for name in summaries[:max(0, len(summaries) - keep)]:
+        for suffix in (".json", ".folded"):
+            try:
+                os.remove(os.path.join(directory, name[:-len(".json")] + suffix))
+            except OSError:
+                pass
+
+def load_profile(profile_id, directory=None):
+    """Return the folded stacks of a stored profile, or None if it does not exist."""
+    if not profile_id or os.path.basename(profile_id) != profile_id:
+        return None
+    try:
+        with open(os.path.join(directory or config.PROFILE_DIR, profile_id + ".folded"), "r", encoding="utf-8") as f:
+            return f.read()
+    except OSError:
+        return None
+
+_session = contextvars.ContextVar('profile_session', default=None)
+
+@contextmanager
+def track_thread():
+    """Include the calling thread in the samples of the profile session of the current context, if any."""
+    session = _session.get()
+    if session is None:
+        yield
+        return
+    ident = threading.get_ident()
+    session.add_thread(ident)
+    try:
+        yield
+    finally:
+        session.remove_thread(ident)
+
+def _profiled_run(session, site_name, scraper_function):
+    _session.set(session)
+    session.start()
+    try:
+        with track_thread():
+            return run_scraper(site_name, scraper_function)
+    finally:
+        session.finish()
+
+async def profile_scraper_async(site_name, scraper_function, deadline=None):
+    """
+    Run one scraper under the sampling profiler, like run_scraper_async(),
+    and return ``(result, session)``. The session is finished (sampling
+    stopped, profile stored) by then; a scraper that overran its deadline
+    and is still running gets a partial profile of the time until then.
+    """
+    session = ProfileSession(site_name)
+    # run_scraper_async() runs this in a copy of the context, so the session stays with this scrape
+    run = functools.partial(_profiled_run, session)
+    result = await run_scraper_async(site_name, scraper_function, deadline, run=run)
+    await asyncio.to_thread(session.finish)
+    return result, session
@@ -0,0 +1,91 @@
+import asyncio
+import logging
+import sys
+import os
+import threading
+import time
+from urllib.parse import urlsplit
+
+# Add parent directory to path to import config
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import config
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+class TokenBucket:
+    """
+    Thread-safe token bucket. Holds up to ``burst`` tokens and refills at
+    ``rate`` tokens per second. Callers reserve a token and then wait outside
+    the lock, so a waiting caller never holds up callers of other buckets.
+    """
+
+    def __init__(self, rate, burst):
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        """Take one token and return how many seconds to wait before using it."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            if self._tokens >= 0 or self.rate <= 0:
+                return 0.0
+            # Negative balance queues callers in arrival order
+            return -self._tokens / self.rate
+
+    def acquire(self):
+        """Block the calling thread until a token is available."""
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    async def acquire_async(self):
+        """Wait for a token without blocking the event loop."""
+        wait = self.reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+_buckets = {}
+_buckets_lock = threading.Lock()
+
+def get_bucket(host):
+    """Return the token bucket for ``host``, creating it from config on first use."""
+    host = host.lower()
+    bucket = _buckets.get(host)
+    if bucket is None:
+        with _buckets_lock:
+            bucket = _buckets.get(host)
+            if bucket is None:
+                rate, burst = config.get_rate_limit(host)
+                bucket = TokenBucket(rate, burst)
+                _buckets[host] = bucket
+    return bucket
+
+def wait_for_host(url):
+    """Block until the politeness scheduler allows another request to the host of ``url``."""
+    if config.FETCH_MODE == 'replay':
+        # Replayed responses never reach the host, so there is nothing to be polite to
+        return 0.0
+    host = urlsplit(url).netloc
+    wait = get_bucket(host).acquire()
+    if wait > 0:
+        logger.debug(f"Rate limited {host} for {wait:.2f}s")
+    return wait
+
+async def wait_for_host_async(url):
+    """Wait for the politeness scheduler like wait_for_host(), without blocking the event loop."""
+    if config.FETCH_MODE == 'replay':
+        return 0.0
+    host = urlsplit(url).netloc
+    wait = await get_bucket(host).acquire_async()
+    if wait > 0:
+        logger.debug(f"Rate limited {host} for {wait:.2f}s")
+    return wait
@@ -0,0 +1,104 @@
+import gzip
+import json
+import sys
+import os
+
+# Add parent directory to path to import config
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import config
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Fields of a scraped article, and the extra fields of an article from the article store
+ARTICLE_FIELDS = ("headline", "image_url", "article_url", "article_text", "duplicate_of")
+STORED_ARTICLE_FIELDS = ARTICLE_FIELDS + ("url", "site", "content_hash", "first_seen", "last_seen", "changed_at")
+
+# Levels that favour speed: responses are compressed on every request, not once
+_COMPRESSORS = {}
+if zstandard is not None:
+    _COMPRESSORS['zstd'] = lambda body: zstandard.ZstdCompressor(level=3).compress(body)
+if brotli is not None:
+    _COMPRESSORS['br'] = lambda body: brotli.compress(body, mode=brotli.MODE_TEXT, quality=5)
+_COMPRESSORS['gzip'] = lambda body: gzip.compress(body, compresslevel=6, mtime=0)
+
+def parse_fields(fields, allowed=ARTICLE_FIELDS):
+    """
+    Return the article fields named in the comma-separated ``fields``, or
+    None (every field) when it is None or empty. Raises ValueError for a
+    field not in ``allowed``.
+    """
+    if not fields:
+        return None
+    names = tuple(dict.fromkeys(name.strip() for name in fields.split(",") if name.strip()))
+    unknown = [name for name in names if name not in allowed]
+    if unknown:
+        raise ValueError(f"Unknown field(s): {', '.join(unknown)}. Available: {', '.join(allowed)}")
+    return names or None
+
+def project(articles, fields):
+    """Return copies of ``articles`` with only ``fields`` (all of them when None)."""
+    if fields is None:
+        return articles
+    return [{name: article[name] for name in fields if name in article} for article in articles]
+
+def dumps(payload):
+    """Serialize a response payload to compact UTF-8 JSON, with orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode('utf-8')
+
+def negotiate(accept_encoding):
+    """
+    Return the content coding to answer an Accept-Encoding header with, or
+    None for an uncompressed body. Among the codings the client accepts, the
+    highest q-value wins and ties go to zstd, then br, then gzip.
+    """
+    if not accept_encoding or not config.RESPONSE_COMPRESSION_ENABLED:
+        return None
+    accepted = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.partition(";")
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name.lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted[coding.strip().lower()] = quality
+
+    best, best_quality = None, 0.0
+    for coding in _COMPRESSORS:
+        quality = accepted.get(coding, accepted.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = coding, quality
+    return best
+
+def encode(payload, accept_encoding=None):
+    """
+    Serialize a response payload and compress it for ``accept_encoding``
+    when it is at least RESPONSE_COMPRESSION_MIN_BYTES long. Returns
+    ``(body, headers)``. CPU-bound on large payloads: call it off the event
+    loop.
+    """
+    body = dumps(payload)
+    headers = {"Vary": "Accept-Encoding"}
+    coding = negotiate(accept_encoding)
+    if coding is not None and len(body) >= config.RESPONSE_COMPRESSION_MIN_BYTES:
+        body = _COMPRESSORS[coding](body)
+        headers["Content-Encoding"] = coding
+    return body, headers
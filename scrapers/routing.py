@@ -0,0 +1,130 @@
+import logging
+import sys
+import os
+import threading
+import time
+
+# Add parent directory to path to import config
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import config
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+DIRECT = 'direct'
+SCRAPFLY = 'scrapfly'
+
+class HostRoute:
+    """What the fetch layer has learned about one host."""
+
+    __slots__ = ('host', 'route', 'backoff', 'next_probe_at', 'probing',
+                 'direct_successes', 'direct_blocks', 'scrapfly_fetches', 'changed_at')
+
+    def __init__(self, host, route=DIRECT, backoff=0.0, next_probe_at=None):
+        self.host = host
+        self.route = route
+        self.backoff = backoff
+        self.next_probe_at = next_probe_at
+        self.probing = False
+        self.direct_successes = 0
+        self.direct_blocks = 0
+        self.scrapfly_fetches = 0
+        self.changed_at = time.time()
+
+    def to_dict(self):
+        return {
+            "route": self.route,
+            "next_probe_in_seconds": (
+                round(max(0.0, self.next_probe_at - time.time()), 1)
+                if self.route == SCRAPFLY and self.next_probe_at else None
+            ),
+            "backoff_seconds": self.backoff or None,
+            "direct_successes": self.direct_successes,
+            "direct_blocks": self.direct_blocks,
+            "scrapfly_fetches": self.scrapfly_fetches,
+            "changed_at": self.changed_at
+        }
+
+class RoutingTable:
+    """
+    Learns per host whether a direct request works or Scrapfly is needed.
+
+    A host starts on the route configured for its site (direct by default).
+    A blocked direct request moves it to Scrapfly; from then on requests go
+    straight to Scrapfly, and a single request re-probes the direct path
+    after a backoff that doubles on every failed probe, up to
+    ROUTE_PROBE_MAX_INTERVAL. A successful probe moves the host back to direct.
+    """
+
+    def __init__(self, probe_interval=None, max_probe_interval=None):
+        self.probe_interval = config.ROUTE_PROBE_INTERVAL if probe_interval is None else probe_interval
+        self.max_probe_interval = config.ROUTE_PROBE_MAX_INTERVAL if max_probe_interval is None else max_probe_interval
+        self._routes = {}
+        self._lock = threading.Lock()
+
+    def _get(self, host):
+        state = self._routes.get(host)
+        if state is None:
+            site_name = config.get_site_for_host(host)
+            if config.get_site_setting(site_name, 'route', DIRECT) == SCRAPFLY:
+                state = HostRoute(host, SCRAPFLY, self.probe_interval, time.time() + self.probe_interval)
+            else:
+                state = HostRoute(host)
+            self._routes[host] = state
+        return state
+
+    def choose(self, host):
+        """
+        Return the route to use for the next request to ``host``. Exactly one
+        caller gets DIRECT when a Scrapfly host is due for a re-probe.
+        """
+        host = host.lower()
+        with self._lock:
+            state = self._get(host)
+            if state.route == DIRECT:
+                return DIRECT
+            if not state.probing and time.time() >= state.next_probe_at:
+                state.probing = True
+                logger.info(f"Re-probing direct access to {host}")
+                return DIRECT
+            return SCRAPFLY
+
+    def record_direct(self, host, blocked):
+        """Record the outcome of a direct request to ``host``."""
+        host = host.lower()
+        with self._lock:
+            state = self._get(host)
+            was_probing, state.probing = state.probing, False
+            if not blocked:
+                state.direct_successes += 1
+                if state.route != DIRECT:
+                    logger.info(f"Direct access to {host} works again, routing it directly")
+                    state.route, state.backoff, state.next_probe_at = DIRECT, 0.0, None
+                    state.changed_at = time.time()
+                return
+
+            state.direct_blocks += 1
+            if state.route == DIRECT:
+                logger.info(f"{host} blocked a direct request, routing it through Scrapfly")
+                state.route, state.backoff = SCRAPFLY, self.probe_interval
+                state.changed_at = time.time()
+            elif was_probing:
+                state.backoff = min(self.max_probe_interval, max(self.probe_interval, state.backoff * 2))
+            state.next_probe_at = time.time() + state.backoff
+
+    def record_scrapfly(self, host):
+        """Count a fetch of ``host`` that went through Scrapfly."""
+        with self._lock:
+            self._get(host.lower()).scrapfly_fetches += 1
+
+    def release_probe(self, host):
+        """Give up a re-probe that ended without a verdict (e.g. a timeout) so another request can probe."""
+        with self._lock:
+            self._get(host.lower()).probing = False
+
+    def snapshot(self):
+        """Return the learned routes keyed by host."""
+        with self._lock:
+            return {host: state.to_dict() for host, state in sorted(self._routes.items())}
+
+routing_table = RoutingTable()
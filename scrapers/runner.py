@@ -0,0 +1,184 @@
+import asyncio
+import contextvars
+import functools
+import logging
+import sys
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Add parent directory to path to import config
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import config
+from .metrics import stage_timer, observe_scrape, count_scrape_timeout
+from .circuit_breaker import site_breakers
+from .article_store import store_articles
+from .dedup import mark_duplicates
+from . import deadlines, incremental
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Scrapers are blocking, so they run on a dedicated pool. It is sized above the
+# concurrency limit because a scraper that overran its deadline keeps its thread
+# until the underlying socket times out.
+_executor = ThreadPoolExecutor(
+    max_workers=config.SCRAPE_CONCURRENCY * 2,
+    thread_name_prefix="scraper"
+)
+
+def run_scraper(site_name, scraper_function):
+    """
+    Run one scraper synchronously and return a result record with its timing.
+    The articles it found are marked with the near-duplicates they have on
+    any site and upserted into the article store.
+    
+    In an incremental scrape (see incremental.since()) only the articles the
+    caller does not have yet are returned, and the result carries the
+    ``cursor`` to poll with next. Finding nothing new on a homepage that
+    still lists articles is a success.
+    """
+    start = time.monotonic()
+    delivery = incremental.current()
+    try:
+        with stage_timer(site_name):
+            articles = scraper_function() or []
+        if delivery is not None:
+            # Also covers scrapers that fetch no article bodies and so never skip any
+            articles = delivery.filter(articles)
+        mark_duplicates(articles)
+        store_articles(site_name, articles)
+        found = bool(articles) or (delivery is not None and delivery.saw_articles)
+        result = {
+            "site": site_name,
+            "status": "success" if found else "no_content",
+            "articles": articles,
+            "elapsed_seconds": round(time.monotonic() - start, 3)
+        }
+        if delivery is not None:
+            result["cursor"] = delivery.next_cursor()
+    except Exception as e:
+        logger.error(f"Scraper {site_name} failed: {e}")
+        result = {
+            "site": site_name,
+            "status": "error",
+            "error": str(e),
+            "articles": [],
+            "elapsed_seconds": round(time.monotonic() - start, 3)
+        }
+    observe_scrape(site_name, result["status"], time.monotonic() - start, len(result["articles"]))
+    return result
+
+def timeout_result(site_name, error, elapsed_seconds, timed_out=False):
+    """
+    Build the result record of a scrape that was cut off.
+    """
+    return {
+        "site": site_name,
+        "status": "timeout",
+        "error": error,
+        "articles": [],
+        "elapsed_seconds": round(elapsed_seconds, 3),
+        "timed_out": timed_out
+    }
+
+async def run_scraper_async(site_name, scraper_function, deadline=None, run=run_scraper):
+    """
+    Run one scraper in the scraper pool without blocking the event loop.
+    Gives up after ``deadline`` seconds of wall-clock time and reports a timeout.
+    ``run`` is called as ``run(site_name, scraper_function)`` on the pool
+    thread, in a copy of the caller's context, and defaults to run_scraper().
+    
+    Under an overall deadline (see deadlines.overall_deadline()) every fetch
+    the scraper makes is bounded by it too, and the result is marked
+    ``timed_out`` when the deadline cut the scrape short; whatever the
+    scraper returned by then is kept.
+    
+    Scrapes that fail, time out or find no articles count against the site's
+    circuit breaker; while it is open the scraper is not run and a
+    "circuit_open" result carrying the last error is returned at once.
+    """
+    if deadline is None:
+        deadline = config.SITE_DEADLINE
+
+    overall = deadlines.current()
+    if overall is not None:
+        if overall.remaining() <= 0:
+            return timeout_result(site_name, "Overall deadline exceeded before the scrape started", 0.0, True)
+        deadline = min(deadline, overall.remaining())
+
+    breaker = site_breakers.get(site_name)
+    if not breaker.allow():
+        return {
+            "site": site_name,
+            "status": "circuit_open",
+            "error": f"Circuit open after repeated failures: {breaker.last_error}",
+            "articles": [],
+            "elapsed_seconds": 0.0
+        }
+
+    budget = deadlines.site_budget(overall) if overall is not None else None
+    call = functools.partial(contextvars.copy_context().run, deadlines.run_within, budget, run)
+    loop = asyncio.get_running_loop()
+    start = time.monotonic()
+    try:
+        result = await asyncio.wait_for(
+            loop.run_in_executor(_executor, call, site_name, scraper_function),
+            timeout=deadline
+        )
+        result["timed_out"] = budget is not None and (budget.exceeded or budget.remaining() <= 0)
+    except asyncio.TimeoutError:
+        cut_by_overall = overall is not None and overall.remaining() <= 0
+        if cut_by_overall:
+            logger.warning(f"Scraper {site_name} was cut off by the overall deadline")
+            error = "Overall deadline exceeded"
+        else:
+            logger.warning(f"Scraper {site_name} exceeded its {deadline}s deadline")
+            error = f"Exceeded site deadline of {deadline}s"
+        count_scrape_timeout(site_name)
+        result = timeout_result(site_name, error, time.monotonic() - start, cut_by_overall)
+    except BaseException:
+        breaker.release()
+        raise
+
+    if result["timed_out"] and result["status"] != "success":
+        # The caller's deadline ran out, which says nothing about the site
+        breaker.release()
+    elif result["status"] == "success":
+        breaker.record_success()
+    else:
+        breaker.record_failure(result.get("error") or "No articles found")
+    return result
+
+async def scrape_sites_async(scrapers, concurrency=None, deadline=None, overall_deadline=None):
+    """
+    Scrape several sites concurrently.
+
+    ``scrapers`` maps site names to scraper functions. At most ``concurrency``
+    sites run at once and each one is bounded by its own ``deadline``, so a
+    slow or blocked site never delays the others. ``overall_deadline`` bounds
+    the whole call in seconds: sites still running then are cut off with
+    what they have, and sites not started yet are reported as timed out.
+    Results keep the input order.
+    """
+    if concurrency is None:
+        concurrency = config.SCRAPE_CONCURRENCY
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def _bounded(site_name, scraper_function):
+        async with semaphore:
+            return await run_scraper_async(site_name, scraper_function, deadline)
+
+    # Tasks created by gather() copy the context, and with it the deadline
+    with deadlines.overall_deadline(overall_deadline):
+        results = await asyncio.gather(*(
+            _bounded(site_name, scraper_function)
+            for site_name, scraper_function in scrapers.items()
+        ))
+    return {result["site"]: result for result in results}
+
+def scrape_sites(scrapers, concurrency=None, deadline=None, overall_deadline=None):
+    """
+    Blocking wrapper around scrape_sites_async() for scripts and the CLI.
+    """
+    return asyncio.run(scrape_sites_async(scrapers, concurrency, deadline, overall_deadline))
@@ -0,0 +1,276 @@
+import asyncio
+import concurrent.futures
+import logging
+import sqlite3
+import sys
+import os
+import threading
+import time
+from collections import deque
+import httpx
+import requests
+from .article_cache import canonical_url
+from .cassette import build_async_transport
+from .rate_limiter import wait_for_host_async
+
+# Add parent directory to path to import config
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import config
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+class ScrapflyResponse:
+    """Response-like object for a page fetched through Scrapfly."""
+
+    def __init__(self, content, cost=None, elapsed=0.0, from_cache=False):
+        self.content = content.encode('utf-8')
+        self.text = content
+        self.status_code = 200
+        self.cost = cost
+        self.elapsed = elapsed
+        self.from_cache = from_cache
+
+    def raise_for_status(self):
+        pass
+
+def _credits_used(response, data):
+    """Return the API credits a Scrapfly call was billed, from its header or its JSON context."""
+    cost = response.headers.get('X-Scrapfly-Api-Cost')
+    if cost is None:
+        cost = ((data.get('context') or {}).get('cost') or {}).get('total')
+    try:
+        return int(cost) if cost is not None else None
+    except (TypeError, ValueError):
+        return None
+
+class ScrapflyCache:
+    """
+    Disk cache of pages fetched through Scrapfly, in SQLite, keyed by
+    canonical URL. A page is served from here for ``ttl`` seconds so the same
+    URL is not paid for twice in that window.
+    """
+
+    def __init__(self, path, ttl, max_entries):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._local = threading.local()
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS pages ("
+                "url TEXT PRIMARY KEY, content TEXT NOT NULL, cost INTEGER, stored_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS pages_stored_at ON pages (stored_at)")
+            conn.commit()
+            self._local.conn = conn
+        return conn
+
+    def get(self, url):
+        """Return the cached page content for ``url``, or None when missing or expired."""
+        try:
+            row = self._connection().execute(
+                "SELECT content FROM pages WHERE url = ? AND stored_at >= ?",
+                (canonical_url(url), time.time() - self.ttl)
+            ).fetchone()
+        except sqlite3.Error as e:
+            logger.warning(f"Scrapfly cache read failed for {url}: {e}")
+            return None
+        return row[0] if row else None
+
+    def set(self, url, content, cost):
+        """Store a fetched page and drop expired entries and the oldest ones beyond max_entries."""
+        now = time.time()
+        try:
+            conn = self._connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO pages (url, content, cost, stored_at) VALUES (?, ?, ?, ?)",
+                (canonical_url(url), content, cost, now)
+            )
+            conn.execute("DELETE FROM pages WHERE stored_at < ?", (now - self.ttl,))
+            excess = conn.execute("SELECT COUNT(*) FROM pages").fetchone()[0] - self.max_entries
+            if excess > 0:
+                conn.execute(
+                    "DELETE FROM pages WHERE url IN (SELECT url FROM pages ORDER BY stored_at LIMIT ?)", (excess,)
+                )
+            conn.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"Scrapfly cache write failed for {url}: {e}")
+
+class ScrapflyStats:
+    """Call, cache, latency and credit counters of the Scrapfly client."""
+
+    def __init__(self, window=500):
+        self.calls = 0
+        self.errors = 0
+        self.cache_hits = 0
+        self.shared_calls = 0
+        self.credits_used = 0
+        self.remaining_credits = None
+        self.in_flight = 0
+        self._latencies = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def count(self, name, amount=1):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + amount)
+
+    def record_call(self, latency, cost, remaining=None, failed=False):
+        with self._lock:
+            self.calls += 1
+            self.errors += 1 if failed else 0
+            self.credits_used += cost or 0
+            if remaining is not None:
+                self.remaining_credits = remaining
+            self._latencies.append(latency)
+
+    def snapshot(self):
+        """Return the counters plus latency percentiles over the last calls."""
+        with self._lock:
+            latencies = sorted(self._latencies)
+            stats = {
+                "calls": self.calls,
+                "errors": self.errors,
+                "in_flight": self.in_flight,
+                "cache_hits": self.cache_hits,
+                "shared_calls": self.shared_calls,
+                "credits_used": self.credits_used,
+                "credits_per_call": round(self.credits_used / self.calls, 2) if self.calls else None,
+                "remaining_credits": self.remaining_credits,
+            }
+
+        def _ms(fraction):
+            return round(latencies[min(len(latencies) - 1, int(fraction * len(latencies)))] * 1000, 1)
+
+        stats["latency_ms"] = {
+            "p50": _ms(0.5), "p95": _ms(0.95), "max": round(latencies[-1] * 1000, 1)
+        } if latencies else None
+        return stats
+
+class ScrapflyClient:
+    """
+    Async Scrapfly client shared by the whole process.
+
+    Calls run on a private event loop in a daemon thread over one pooled
+    httpx connection pool, with at most ``concurrency`` calls in flight and
+    Scrapfly's politeness bucket still applied. Scraper threads call fetch()
+    and share the cap, the cache and the stats. Concurrent requests for the
+    same URL wait on a single call.
+    """
+
+    def __init__(self, concurrency, cache=None):
+        self.concurrency = max(1, concurrency)
+        self.cache = cache
+        self.stats = ScrapflyStats()
+        self._loop = None
+        self._loop_lock = threading.Lock()
+        # Created on the client's own loop, which is the only place they are used
+        self._http = None
+        self._semaphore = None
+        self._pending = {}
+
+    def _ensure_loop(self):
+        if self._loop is None:
+            with self._loop_lock:
+                if self._loop is None:
+                    loop = asyncio.new_event_loop()
+                    threading.Thread(target=loop.run_forever, name="scrapfly", daemon=True).start()
+                    self._loop = loop
+        return self._loop
+
+    def _submit(self, url, timeout):
+        return asyncio.run_coroutine_threadsafe(self._fetch(url, timeout), self._ensure_loop())
+
+    def fetch(self, url, timeout=15, max_wait=None):
+        """
+        Fetch ``url`` through Scrapfly, blocking the calling thread for at most
+        ``max_wait`` seconds in total (queueing included) when it is given.
+        """
+        future = self._submit(url, timeout)
+        try:
+            return future.result(max_wait)
+        except concurrent.futures.TimeoutError:
+            # Only this caller stops waiting; a call shared with others carries on
+            future.cancel()
+            raise requests.exceptions.Timeout(f"Scrapfly call for {url} did not finish within {max_wait:.2f}s")
+
+    async def _fetch(self, url, timeout):
+        use_cache = self.cache is not None and config.SCRAPFLY_CACHE_ENABLED
+        if use_cache:
+            content = await asyncio.to_thread(self.cache.get, url)
+            if content is not None:
+                self.stats.count('cache_hits')
+                logger.debug(f"Serving {url} from the Scrapfly cache")
+                return ScrapflyResponse(content, from_cache=True)
+
+        task = self._pending.get(url)
+        if task is None:
+            task = asyncio.ensure_future(self._call(url, timeout, use_cache))
+            self._pending[url] = task
+            task.add_done_callback(lambda _: self._pending.pop(url, None))
+        else:
+            self.stats.count('shared_calls')
+        return await asyncio.shield(task)
+
+    async def _call(self, url, timeout, use_cache):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+            transport = httpx.AsyncHTTPTransport(
+                limits=httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency)
+            )
+            self._http = httpx.AsyncClient(transport=build_async_transport(transport))
+
+        async with self._semaphore:
+            await wait_for_host_async(config.SCRAPFLY_API_URL)
+            params = {'key': config.SCRAPFLY_API_KEY or '', 'url': url, 'asp': 'true'}
+            self.stats.count('in_flight')
+            start = time.perf_counter()
+            response = data = None
+            try:
+                response = await self._http.get(config.SCRAPFLY_API_URL, params=params, timeout=timeout)
+                response.raise_for_status()
+                data = response.json()
+                content = data['result']['content']
+            except Exception as e:
+                # Failed calls can still be billed, so they count towards latency and credits too
+                self.stats.record_call(time.perf_counter() - start,
+                                       _credits_used(response, data or {}) if response is not None else None,
+                                       failed=True)
+                logger.error(f"Scrapfly error for {url}: {e}")
+                raise requests.exceptions.RequestException(f"Scrapfly failed: {e}")
+            finally:
+                self.stats.count('in_flight', -1)
+
+        latency = time.perf_counter() - start
+        cost = _credits_used(response, data)
+        remaining = response.headers.get('X-Scrapfly-Remaining-Api-Credit')
+        self.stats.record_call(latency, cost, int(remaining) if remaining and remaining.isdigit() else None)
+        logger.info(f"Scrapfly fetched {url} in {latency:.2f}s for {cost if cost is not None else '?'} credits")
+
+        if use_cache:
+            await asyncio.to_thread(self.cache.set, url, content, cost)
+        return ScrapflyResponse(content, cost=cost, elapsed=latency)
+
+    def close(self):
+        """Close the pooled connections and stop the client's event loop."""
+        with self._loop_lock:
+            loop, self._loop = self._loop, None
+        if loop is None:
+            return
+        if self._http is not None:
+            asyncio.run_coroutine_threadsafe(self._http.aclose(), loop).result(timeout=5)
+        loop.call_soon_threadsafe(loop.stop)
+        self._http = self._semaphore = None
+
+scrapfly_client = ScrapflyClient(
+    config.SCRAPFLY_CONCURRENCY,
+    ScrapflyCache(config.SCRAPFLY_CACHE_PATH, config.SCRAPFLY_CACHE_TTL, config.SCRAPFLY_CACHE_MAX_ENTRIES)
+)
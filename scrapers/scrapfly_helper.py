@@ -4,6 +4,26 @@ import sys
 import os
 import logging
 import time
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+from requests.adapters import HTTPAdapter
+from .rate_limiter import wait_for_host
+from .http_cache import http_cache, parse_cached
+from .article_cache import cached_fetch, is_cacheable
+from .cassette import build_adapter
+from .routing import routing_table, SCRAPFLY
+from .scrapfly_client import scrapfly_client
+from .metrics import (
+    observe_fetch, observe_waiting, stage_timer, current_site, site_for_url,
+    count_scrapfly_fallback, count_article_failure
+)
+from .profiling import track_thread
+from .circuit_breaker import host_breakers, CircuitOpenError, is_failure_status
+from .incremental import skip_delivered
+from . import deadlines
+from .deadlines import clamp_timeout
 
 # Add parent directory to path to import config
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -12,70 +32,261 @@ from config import config
 # Set up logging
 logger = logging.getLogger(__name__)
 
+# Shared keep-alive session; urllib3 keeps one connection pool per host behind it
+_session = None
+_session_lock = threading.Lock()
+
+# Caps concurrent article fetches per host across all running scrapes
+_host_semaphores = {}
+_host_semaphores_lock = threading.Lock()
+
+def get_session():
+    """
+    Return the process-wide pooled session used for every outgoing request.
+    Connections are kept alive and reused per host instead of paying a new
+    TCP+TLS handshake for each homepage and article fetch. With FETCH_MODE set
+    to record or replay, requests go through the cassette transport instead.
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                pool_options = {
+                    'pool_connections': config.POOL_CONNECTIONS,
+                    'pool_maxsize': config.POOL_MAXSIZE
+                }
+                adapter = build_adapter(**pool_options) or HTTPAdapter(**pool_options)
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                _session = session
+    return _session
+
+def _guarded(url, fetch, *args):
+    """
+    Call ``fetch(*args)`` under the circuit breaker of the host of ``url``.
+    Raises CircuitOpenError without calling it while the circuit is open.
+    Errors, timeouts and 5xx/403/429 responses count as failures.
+    """
+    host = urlsplit(url).netloc.lower()
+    breaker = host_breakers.get(host)
+    if not breaker.allow():
+        raise CircuitOpenError(f"Circuit open for {host} after repeated failures: {breaker.last_error}")
+    try:
+        response = fetch(*args)
+    except requests.exceptions.HTTPError as e:
+        status_code = e.response.status_code if e.response is not None else None
+        if status_code is None or is_failure_status(status_code):
+            breaker.record_failure(e)
+        else:
+            breaker.record_success()
+        raise
+    except requests.exceptions.RequestException as e:
+        if isinstance(e, requests.exceptions.Timeout) and deadlines.expired():
+            # Cut short by the caller's deadline, which says nothing about the host
+            breaker.release()
+        else:
+            breaker.record_failure(e)
+        raise
+    except BaseException:
+        breaker.release()
+        raise
+    if is_failure_status(response.status_code):
+        breaker.record_failure(f"HTTP {response.status_code} for {url}")
+    else:
+        breaker.record_success()
+    return response
+
+def direct_get(url, timeout=15, headers=None):
+    """
+    Plain GET through the pooled session, a drop-in for requests.get().
+    Waits for the host's politeness token bucket before sending. Pages seen
+    before are revalidated with a conditional GET and served from the HTTP
+    cache on 304. Fails fast with CircuitOpenError while the host's circuit
+    breaker is open.
+    """
+    return _guarded(url, _direct_get, url, timeout, headers)
+
+def _direct_get(url, timeout, headers):
+    # Under an overall deadline, fail fast once it has passed and never let a request outlive it
+    clamp_timeout(timeout)
+    wait_for_host(url)
+    timeout = clamp_timeout(timeout)
+    start = time.perf_counter()
+    response = None
+    try:
+        response = _conditional_get(url, timeout, headers)
+        return response
+    finally:
+        observe_fetch(url, 'direct', time.perf_counter() - start, response)
+
+def _conditional_get(url, timeout, headers):
+    if not config.HTTP_CACHE_ENABLED:
+        return get_session().get(url, timeout=timeout, headers=headers)
+
+    validators = http_cache.conditional_headers(url)
+    request_headers = dict(headers or {}, **validators)
+    response = get_session().get(url, timeout=timeout, headers=request_headers)
+
+    if response.status_code == 304 and validators:
+        cached = http_cache.load(url)
+        if cached is not None:
+            logger.debug(f"Not modified, serving {url} from HTTP cache")
+            return cached
+        # The entry vanished between the two lookups, fetch the full page again
+        response = get_session().get(url, timeout=timeout, headers=headers)
+
+    http_cache.store(url, response)
+    response.from_cache = False
+    response.cache_key = url
+    return response
+
+def _host_semaphore(url):
+    """Return the semaphore bounding concurrent article fetches to the host of ``url``."""
+    host = urlsplit(url).netloc.lower()
+    with _host_semaphores_lock:
+        semaphore = _host_semaphores.get(host)
+        if semaphore is None:
+            semaphore = threading.BoundedSemaphore(config.ARTICLE_CONCURRENCY_PER_HOST)
+            _host_semaphores[host] = semaphore
+    return semaphore
+
+def fetch_articles(fetch_function, article_urls):
+    """
+    Call ``fetch_function(url)`` for every article URL concurrently and return
+    the results in the same order. Articles already in the article cache are
+    returned without a fetch. At most ARTICLE_CONCURRENCY_PER_HOST fetches
+    run against a single host at any time, even across concurrent scrapes.
+    """
+    if not article_urls:
+        return []
+
+    site = current_site()
+
+    def _fetch(article_url):
+        with _host_semaphore(article_url):
+            return fetch_function(article_url)
+
+    def _bounded(article_url):
+        with track_thread(), stage_timer(site or site_for_url(article_url)):
+            try:
+                value = cached_fetch(_fetch, article_url)
+            except Exception:
+                count_article_failure(article_url)
+                raise
+        if not is_cacheable(value):
+            count_article_failure(article_url)
+        return value
+
+    # Article work is timed on its own, so the caller's extract time excludes it
+    start = time.perf_counter()
+    try:
+        if len(article_urls) == 1:
+            return [_bounded(article_urls[0])]
+
+        # Each article runs in its own copy of the caller's context so its stage timings stay separate
+        contexts = {url: contextvars.copy_context() for url in article_urls}
+        workers = min(len(article_urls), config.ARTICLE_CONCURRENCY_PER_HOST)
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="article") as executor:
+            return list(executor.map(lambda url: contexts[url].run(_bounded, url), article_urls))
+    finally:
+        observe_waiting(time.perf_counter() - start)
+
+def fetch_homepage_articles(response, site_name, parse_homepage, base_url, fetch_function, attach=None):
+    """
+    Extract the articles of a fetched homepage with
+    ``parse_homepage(content, base_url)``, keep the site's first max_articles
+    and fetch their bodies with fetch_articles(). Each body result becomes
+    the article's ``article_text``, or is handed to ``attach(article, result)``
+    when given. Returns the articles.
+    """
+    # Homepage extraction is reused as-is when the page was not modified,
+    # and articles the caller already has (incremental scrapes) need no body fetch
+    articles = skip_delivered(parse_cached(response, parse_homepage, base_url)[:config.get_max_articles(site_name)])
+    results = fetch_articles(fetch_function, [article["article_url"] for article in articles])
+    for article, result in zip(articles, results):
+        if attach is None:
+            article["article_text"] = result
+        else:
+            attach(article, result)
+    return articles
+
 def scrapfly_get(url, timeout=15, headers=None):
     """
     Make a request using Scrapfly API with anti-scraping protection.
     Returns a response-like object with .content attribute.
+    Goes through the shared async client, so the call counts against
+    SCRAPFLY_CONCURRENCY and is answered from the Scrapfly cache when the
+    same URL was fetched within SCRAPFLY_CACHE_TTL.
     """
-    if not config.SCRAPFLY_API_KEY:
+    # Replayed Scrapfly calls are keyed without the API key, so none is needed
+    if not config.SCRAPFLY_API_KEY and config.FETCH_MODE != 'replay':
         raise requests.exceptions.RequestException("Scrapfly API key not configured")
-    
+    return scrapfly_client.fetch(url, clamp_timeout(timeout), max_wait=deadlines.remaining())
+
+def _scrapfly_available():
+    return bool(config.SCRAPFLY_API_KEY) or config.FETCH_MODE == 'replay'
+
+def _scrapfly_fetch(url, timeout, headers, host, reason):
+    count_scrapfly_fallback(url, reason)
+    start = time.perf_counter()
+    response = None
     try:
-        params = {
-            'key': config.SCRAPFLY_API_KEY,
-            'url': url,
-            'asp': 'true'
-        }
-        
-        response = requests.get(config.SCRAPFLY_API_URL, params=params, timeout=timeout)
-        response.raise_for_status()
-        
-        data = response.json()
-        
-        # Create a response-like object
-        class ScrapflyResponse:
-            def __init__(self, content):
-                self.content = content.encode('utf-8')
-                self.text = content
-                self.status_code = 200
-                
-            def raise_for_status(self):
-                pass
-        
-        return ScrapflyResponse(data['result']['content'])
-        
-    except Exception as e:
-        logger.error(f"Scrapfly error for {url}: {e}")
-        raise requests.exceptions.RequestException(f"Scrapfly failed: {e}")
+        response = scrapfly_get(url, timeout, headers)
+    finally:
+        observe_fetch(url, 'scrapfly', time.perf_counter() - start, response)
+    routing_table.record_scrapfly(host)
+    return response
 
 def get_with_fallback(url, timeout=15, headers=None):
     """
-    Smart fallback system: tries regular requests first, then Scrapfly on 403 errors.
+    Smart fallback system: sends the request over the route learned for the
+    host. Hosts known to block direct requests go straight to Scrapfly (with
+    a periodic direct re-probe); others are tried directly first and fall
+    back to Scrapfly on a 403, which also teaches the routing table.
+    When neither route works the host's circuit breaker counts a failure,
+    and while it is open the call fails fast with CircuitOpenError.
     """
+    return _guarded(url, _get_with_fallback, url, timeout, headers)
+
+def _get_with_fallback(url, timeout, headers):
     # Use default headers if none provided
     if headers is None:
         headers = config.get_default_headers()
     
+    host = urlsplit(url).netloc
+    routed_to_scrapfly = _scrapfly_available() and routing_table.choose(host) == SCRAPFLY
+    if routed_to_scrapfly:
+        try:
+            logger.debug(f"Routing {url} through Scrapfly")
+            return _scrapfly_fetch(url, timeout, headers, host, 'routed')
+        except requests.exceptions.RequestException as scrapfly_error:
+            logger.warning(f"Scrapfly failed for {url}, trying a regular request: {scrapfly_error}")
+    
     try:
-        # First try regular requests
         logger.debug(f"Attempting regular request to {url}")
-        response = requests.get(url, timeout=timeout, headers=headers)
+        response = _direct_get(url, timeout, headers)
         response.raise_for_status()
+        routing_table.record_direct(host, blocked=False)
         logger.debug(f"Regular request successful for {url}")
         return response
         
     except requests.exceptions.HTTPError as e:
         if e.response.status_code == 403:
+            routing_table.record_direct(host, blocked=True)
+            if routed_to_scrapfly:
+                raise e
             logger.info(f"403 error detected for {url}, trying Scrapfly...")
             try:
-                time.sleep(config.REQUEST_DELAY)  # Rate limiting
-                return scrapfly_get(url, timeout, headers)
+                return _scrapfly_fetch(url, timeout, headers, host, 'blocked')
             except Exception as scrapfly_error:
                 logger.error(f"Scrapfly also failed for {url}: {scrapfly_error}")
                 raise e  # Re-raise original error
         else:
+            routing_table.release_probe(host)
             logger.error(f"HTTP error for {url}: {e}")
             raise e
     except Exception as e:
+        routing_table.release_probe(host)
         logger.error(f"Request error for {url}: {e}")
         raise e 
\ No newline at end of file
@@ -0,0 +1,118 @@
+import json
+import logging
+import socket
+import sqlite3
+import sys
+import os
+import threading
+import time
+import uuid
+
+# Add parent directory to path to import config
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import config
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+class SharedState:
+    """
+    Site snapshots and scrape locks shared by every API worker, in SQLite.
+
+    All uvicorn workers on a machine (or containers mounting the same volume)
+    point at one file, so a site scraped by one worker is served by all of
+    them and a scrape lock keeps two workers from scraping the same site at
+    once. Locks expire after their ``ttl`` so a crashed worker cannot hold a
+    site forever.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        # Identifies this process as the holder of the locks it takes
+        self.owner = "%s:%d:%s" % (socket.gethostname(), os.getpid(), uuid.uuid4().hex[:8])
+        self._local = threading.local()
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS snapshots ("
+                "site TEXT PRIMARY KEY, value TEXT NOT NULL, scraped_at REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS locks ("
+                "name TEXT PRIMARY KEY, owner TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            conn.commit()
+            self._local.conn = conn
+        return conn
+
+    def get_snapshot(self, site_name):
+        """Return the shared snapshot of a site, or None if no worker stored one."""
+        try:
+            row = self._connection().execute(
+                "SELECT value FROM snapshots WHERE site = ?", (site_name,)
+            ).fetchone()
+        except sqlite3.Error as e:
+            logger.warning(f"Shared snapshot read failed for {site_name}: {e}")
+            return None
+        return json.loads(row[0]) if row else None
+
+    def set_snapshot(self, site_name, snapshot):
+        """Store a site's snapshot for every worker, unless a newer one is already there."""
+        try:
+            conn = self._connection()
+            conn.execute(
+                "INSERT INTO snapshots (site, value, scraped_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(site) DO UPDATE SET value = excluded.value, scraped_at = excluded.scraped_at "
+                "WHERE excluded.scraped_at >= snapshots.scraped_at",
+                (site_name, json.dumps(snapshot, ensure_ascii=False), snapshot["scraped_at"])
+            )
+            conn.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"Shared snapshot write failed for {site_name}: {e}")
+
+    def acquire_lock(self, name, ttl):
+        """Take the lock ``name`` for ``ttl`` seconds; return False if another worker holds it."""
+        now = time.time()
+        try:
+            conn = self._connection()
+            cursor = conn.execute(
+                "INSERT INTO locks (name, owner, expires_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at "
+                "WHERE locks.expires_at < ? OR locks.owner = excluded.owner",
+                (name, self.owner, now + ttl, now)
+            )
+            conn.commit()
+        except sqlite3.Error as e:
+            # Scraping twice beats not scraping at all
+            logger.warning(f"Could not take shared lock {name}, going ahead without it: {e}")
+            return True
+        return cursor.rowcount == 1
+
+    def is_locked(self, name):
+        """Return whether some worker currently holds the lock ``name``."""
+        try:
+            row = self._connection().execute(
+                "SELECT 1 FROM locks WHERE name = ? AND expires_at >= ?", (name, time.time())
+            ).fetchone()
+        except sqlite3.Error as e:
+            logger.warning(f"Shared lock check failed for {name}: {e}")
+            return False
+        return row is not None
+
+    def release_lock(self, name):
+        """Release the lock ``name`` if this process still holds it."""
+        try:
+            conn = self._connection()
+            conn.execute("DELETE FROM locks WHERE name = ? AND owner = ?", (name, self.owner))
+            conn.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"Could not release shared lock {name}: {e}")
+
+shared_state = SharedState(config.SHARED_STATE_PATH) if config.SHARED_STATE_ENABLED else None
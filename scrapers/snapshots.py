@@ -0,0 +1,222 @@
+import asyncio
+import contextvars
+import logging
+import sys
+import os
+import time
+
+# Add parent directory to path to import config
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import config
+from .runner import run_scraper_async, timeout_result
+from .shared_state import shared_state
+from . import deadlines
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Seconds between checks of the shared state, while waiting on another worker or serving a stale snapshot
+_SHARED_POLL_INTERVAL = 0.25
+_SHARED_CHECK_INTERVAL = 1.0
+
+class SnapshotStore:
+    """
+    Keeps the latest scrape result of every site warm for the API.
+
+    Snapshots are refreshed on a schedule by run_forever(). Readers get the
+    snapshot immediately; once it is older than ``max_age`` a background
+    revalidation is started (stale-while-revalidate). A failed refresh keeps
+    serving the last good snapshot and records the error next to it.
+
+    With ``shared`` state (see shared_state.SharedState) the snapshots are
+    shared with the other API workers: a worker takes the site's scrape lock
+    before scraping, and a worker finding it taken waits for that scrape and
+    returns its result instead of scraping the site again.
+    """
+
+    def __init__(self, scrapers, max_age=None, shared=shared_state):
+        self.scrapers = scrapers
+        self.max_age = config.SNAPSHOT_MAX_AGE if max_age is None else max_age
+        self.shared = shared
+        self._snapshots = {}
+        self._refreshing = {}
+        self._checked_at = {}
+
+    async def get(self, site_name):
+        """Return the current snapshot for a site, or None if it was never scraped."""
+        snapshot = self._snapshots.get(site_name)
+        if self.shared is not None and (snapshot is None or self.is_stale(snapshot)):
+            # Another worker may have scraped it since; looked up at most once a second per site
+            now = time.monotonic()
+            if now - self._checked_at.get(site_name, float('-inf')) >= _SHARED_CHECK_INTERVAL:
+                self._checked_at[site_name] = now
+                snapshot = await asyncio.to_thread(self._pull, site_name)
+        return snapshot
+
+    def _pull(self, site_name):
+        """Adopt the shared snapshot of a site if it is newer than ours and return the current one."""
+        local = self._snapshots.get(site_name)
+        shared = self.shared.get_snapshot(site_name)
+        if shared is not None and (local is None or shared["refreshed_at"] > local["refreshed_at"]):
+            self._snapshots[site_name] = shared
+            return shared
+        return local
+
+    def age(self, snapshot):
+        """Return the age of a snapshot in seconds."""
+        return time.time() - snapshot["scraped_at"]
+
+    def is_stale(self, snapshot):
+        """Return whether a snapshot is older than the allowed maximum age."""
+        return self.age(snapshot) > self.max_age
+
+    def store(self, result):
+        """
+        Record a fresh runner result as the site's snapshot and return the
+        snapshot, or None when the result was not kept: a scrape cut short by
+        a caller's overall deadline says nothing about the site, and a failure
+        with no earlier result leaves the site without a snapshot, so the next
+        request scrapes it again.
+        """
+        if result.get("timed_out"):
+            return None
+        site_name = result["site"]
+        previous = self._snapshots.get(site_name)
+        now = time.time()
+        if result["status"] in ("success", "no_content"):
+            snapshot = {"result": result, "scraped_at": now, "refreshed_at": now, "last_error": None,
+                        "failed_result": None}
+        elif previous is None:
+            logger.warning(f"First scrape of {site_name} failed, no snapshot kept: {result.get('error')}")
+            return None
+        else:
+            # Keep serving the last good result but surface why the refresh failed
+            snapshot = dict(previous, refreshed_at=now, last_error=result.get("error"), failed_result=result)
+        self._snapshots[site_name] = snapshot
+        return snapshot
+
+    async def refresh(self, site_name):
+        """
+        Scrape a site now, update its snapshot and return the fresh runner result.
+        Concurrent calls for the same site share one scrape, which runs without
+        any caller's overall deadline.
+        
+        A caller under an overall deadline stops waiting on a shared scrape
+        when the deadline passes. With no shared scrape running it scrapes
+        the site itself, bounded by its deadline; a result cut short that way
+        is returned to it only, never kept as the snapshot, and a background
+        refresh is started to get a complete one.
+        """
+        task = self._refreshing.get(site_name)
+        remaining = deadlines.remaining()
+        if task is None and remaining is not None:
+            start = time.monotonic()
+            try:
+                # Also bounds the wait on another worker's scrape of the site
+                result = await asyncio.wait_for(self._refresh(site_name), remaining)
+            except asyncio.TimeoutError:
+                result = timeout_result(site_name, "Overall deadline exceeded", time.monotonic() - start, True)
+            if result.get("timed_out"):
+                self.revalidate(site_name)
+            return result
+        if task is None:
+            # An empty context, so the shared scrape is bounded by nothing but the site deadline
+            task = contextvars.Context().run(asyncio.ensure_future, self._refresh(site_name))
+            self._refreshing[site_name] = task
+            task.add_done_callback(lambda _: self._refreshing.pop(site_name, None))
+        if remaining is None:
+            return await asyncio.shield(task)
+        start = time.monotonic()
+        try:
+            return await asyncio.wait_for(asyncio.shield(task), remaining)
+        except asyncio.TimeoutError:
+            return timeout_result(site_name, "Overall deadline exceeded", time.monotonic() - start, True)
+
+    async def _refresh(self, site_name):
+        if self.shared is None:
+            result = await run_scraper_async(site_name, self.scrapers[site_name])
+            self.store(result)
+            return result
+
+        lock = "scrape:" + site_name
+        requested_at = time.time()
+        while True:
+            if await asyncio.to_thread(self.shared.acquire_lock, lock, config.SCRAPE_LOCK_TTL):
+                try:
+                    result = await run_scraper_async(site_name, self.scrapers[site_name])
+                    # Build on whatever another worker stored meanwhile
+                    await asyncio.to_thread(self._pull, site_name)
+                    snapshot = self.store(result)
+                    if snapshot is not None:
+                        await asyncio.to_thread(self.shared.set_snapshot, site_name, snapshot)
+                finally:
+                    await asyncio.to_thread(self.shared.release_lock, lock)
+                return result
+
+            logger.info(f"Another worker is scraping {site_name}, waiting for its result")
+            while await asyncio.to_thread(self.shared.is_locked, lock):
+                await asyncio.sleep(_SHARED_POLL_INTERVAL)
+            snapshot = await asyncio.to_thread(self._pull, site_name)
+            if snapshot is not None and snapshot["refreshed_at"] >= requested_at:
+                return snapshot["failed_result"] or snapshot["result"]
+            # The other worker died, gave up or failed a first scrape without storing anything: scrape it ourselves
+
+    def revalidate(self, site_name):
+        """Start a background refresh for a site unless one is already running."""
+        if site_name not in self._refreshing:
+            logger.info(f"Revalidating the snapshot for {site_name} in the background")
+            # Not bounded by the deadline of the request that noticed the snapshot was stale
+            task = contextvars.Context().run(asyncio.ensure_future, self.refresh(site_name))
+            task.add_done_callback(self._log_failure)
+
+    @staticmethod
+    def _log_failure(task):
+        if not task.cancelled() and task.exception():
+            logger.error(f"Background snapshot refresh failed: {task.exception()}")
+
+    async def refresh_all(self, site_names=None):
+        """
+        Scrape the given sites (all by default) concurrently, update their
+        snapshots and return the fresh runner results keyed by site.
+        """
+        if site_names is None:
+            site_names = list(self.scrapers)
+        semaphore = asyncio.Semaphore(max(1, config.SCRAPE_CONCURRENCY))
+
+        async def _bounded(site_name):
+            async with semaphore:
+                return await self.refresh(site_name)
+
+        results = await asyncio.gather(*(_bounded(site_name) for site_name in site_names))
+        return {result["site"]: result for result in results}
+
+    def due_sites(self, interval):
+        """
+        Return the sites not refreshed in the last ``interval`` seconds. With
+        shared state this counts refreshes by any worker, so each cycle's
+        scrapes are spread over the workers instead of repeated by each one.
+        """
+        if self.shared is None:
+            return list(self.scrapers)
+        due = []
+        for site_name in self.scrapers:
+            snapshot = self._pull(site_name)
+            # A little slack so workers on the same schedule do not each find the site just short of due
+            if snapshot is None or time.time() - snapshot["refreshed_at"] >= interval * 0.9:
+                due.append(site_name)
+        return due
+
+    async def run_forever(self, interval=None):
+        """Refresh all snapshots every ``interval`` seconds until cancelled."""
+        if interval is None:
+            interval = config.SNAPSHOT_REFRESH_INTERVAL
+        while True:
+            start = time.monotonic()
+            try:
+                due = await asyncio.to_thread(self.due_sites, interval)
+                if due:
+                    await self.refresh_all(due)
+                logger.info(f"Refreshed snapshots for {len(due)} sites in {time.monotonic() - start:.1f}s")
+            except Exception as e:
+                logger.error(f"Snapshot refresh cycle failed: {e}")
+            await asyncio.sleep(max(0.0, interval - (time.monotonic() - start)))
@@ -0,0 +1,84 @@
+import re
+from functools import lru_cache
+
+# Arabic block; a paragraph with none of it is navigation, bylines in Latin script and the like
+_ARABIC_RE = re.compile('[\u0600-\u06ff]')
+_NON_WORD_RE = re.compile(r'[\W_]+')
+
+# Harakat, Quranic annotation marks and tatweel: they vary between copies of the same text
+_ARABIC_MARKS = [*range(0x0610, 0x061b), *range(0x064b, 0x0660), 0x0670, *range(0x06d6, 0x06ee), 0x0640]
+# Marks removed plus the letter variants that editors and keyboards use interchangeably
+_NORMALIZE_ARABIC = dict.fromkeys(_ARABIC_MARKS)
+_NORMALIZE_ARABIC.update(str.maketrans({
+    'أ': 'ا', 'إ': 'ا', 'آ': 'ا', 'ٱ': 'ا',
+    'ى': 'ي', 'ة': 'ه', 'ؤ': 'و', 'ئ': 'ي',
+}))
+
+def has_arabic(text):
+    """Return whether ``text`` contains any Arabic character."""
+    return _ARABIC_RE.search(text) is not None
+
+def normalize_arabic(text):
+    """Remove Arabic diacritics and tatweel and fold alef, yeh, teh marbuta and hamza-carrier variants."""
+    return text.translate(_NORMALIZE_ARABIC)
+
+def normalize_words(text):
+    """Return the words of ``text`` normalized for comparison: Arabic folded, no punctuation, lowercase."""
+    return _NON_WORD_RE.sub(' ', normalize_arabic(text).lower()).split()
+
+def collapse_whitespace(text):
+    """Collapse every run of whitespace, line breaks included, to one space and trim the ends."""
+    # str.split() and the regex \s agree on what whitespace is, and splitting needs no regex engine
+    return " ".join(text.split())
+
+def clean_lines(text):
+    """Trim every line of ``text`` and drop the blank ones."""
+    return "\n".join(filter(None, map(str.strip, text.split("\n"))))
+
+def join_paragraphs(paragraphs, keep_blank=False):
+    """
+    Join the non-empty paragraphs of an article body with line breaks, or
+    every paragraph, blank ones included, when ``keep_blank`` is set.
+    """
+    return "\n".join(paragraphs if keep_blank else filter(None, paragraphs))
+
+@lru_cache(maxsize=64)
+def _terms_re(terms):
+    return re.compile('|'.join(map(re.escape, terms))) if terms else None
+
+class ParagraphFilter:
+    """
+    Keeps the article paragraphs of a body and drops boilerplate: paragraphs
+    shorter than ``min_chars`` or ``min_words``, without Arabic text when
+    ``require_arabic`` is set, containing any of ``skip_terms``, or short
+    (under ``label_max_chars``) and containing any of ``label_terms``, the
+    way section labels do. Terms are matched with one precompiled regex.
+    """
+
+    def __init__(self, min_chars=1, min_words=0, require_arabic=False, skip_terms=(), label_terms=(),
+                 label_max_chars=50):
+        self.min_chars = min_chars
+        self.min_words = min_words
+        self.require_arabic = require_arabic
+        self.label_max_chars = label_max_chars
+        self._skip = _terms_re(tuple(skip_terms))
+        self._labels = _terms_re(tuple(label_terms))
+
+    def keep(self, text):
+        """Return whether the paragraph ``text`` is article content."""
+        if len(text) < self.min_chars:
+            return False
+        if self.require_arabic and not has_arabic(text):
+            return False
+        if self._skip is not None and self._skip.search(text):
+            return False
+        # Splitting stops once there are enough words to tell
+        if self.min_words and len(text.split(None, self.min_words - 1)) < self.min_words:
+            return False
+        if self._labels is not None and len(text) < self.label_max_chars and self._labels.search(text):
+            return False
+        return True
+
+    def join(self, paragraphs):
+        """Join the paragraphs worth keeping with line breaks."""
+        return "\n".join(text for text in paragraphs if self.keep(text))
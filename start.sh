@@ -6,7 +6,14 @@ set -e
 # Get the port from environment variable, default to 8080
 PORT=${PORT:-8080}
 
-echo "Starting Lebanese News Scraper API on port $PORT..."
+# Number of uvicorn workers. Workers share site snapshots, scrape locks and the article, HTTP
+# and Scrapfly caches through the files under .cache, so every site is still scraped once.
+# Per-host rate limits, fetch concurrency and circuit breakers are per worker, so N workers
+# send up to N times RATE_LIMIT and ARTICLE_CONCURRENCY_PER_HOST to a host; /metrics and the
+# stats endpoints report the worker that answers.
+WORKERS=${WORKERS:-1}
+
+echo "Starting Lebanese News Scraper API on port $PORT with $WORKERS workers..."
 
 # Start the uvicorn server
-exec uvicorn api:app --host 0.0.0.0 --port $PORT --workers 1 --timeout-keep-alive 300 
\ No newline at end of file
+exec uvicorn api:app --host 0.0.0.0 --port $PORT --workers $WORKERS --timeout-keep-alive 300 
\ No newline at end of file
@@ -8,7 +8,7 @@ import json
 import logging
 import sys
 from datetime import datetime
-from typing import List, Dict, Any, Callable
+from typing import List, Dict, Any, Callable, Optional
 
 from config import config
 from scrapers import (
@@ -17,6 +17,7 @@ from scrapers import (
     scrape_aljadeed, scrape_sawtbeirut, scrape_lebanondebate,
     scrape_lebanese_forces, scrape_lbcgroup
 )
+from scrapers.runner import run_scraper, scrape_sites
 
 # Configure logging (console only)
 logging.basicConfig(
@@ -28,6 +29,12 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# CLI names of the sites that the API (and so the article store, breakers and metrics) knows by another name
+RUNNER_SITE_NAMES = {
+    'al_akhbar': 'alakhbar',
+    'lebanese_forces': 'lebaneseforces'
+}
+
 class NewsScraper:
     """Main news scraper class that coordinates all scraping operations."""
     
@@ -66,50 +73,70 @@ class NewsScraper:
             }
         
         logger.info(f"Scraping {site_name}...")
+        result = run_scraper(RUNNER_SITE_NAMES.get(site_name, site_name), scraper_func)
+        return self._build_result(dict(result, site=site_name))
+    
+    def _build_result(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        """Convert a runner result record into the CLI result format."""
+        site_name = result['site']
+        timestamp = datetime.now().isoformat()
         
-        try:
-            articles = scraper_func()
-            
-            if articles:
-                logger.info(f"SUCCESS {site_name}: Successfully scraped {len(articles)} articles")
-                return {
-                    'site': site_name,
-                    'status': 'success',
-                    'articles': articles,
-                    'count': len(articles),
-                    'timestamp': datetime.now().isoformat()
-                }
-            else:
-                logger.warning(f"WARNING {site_name}: No articles found")
-                return {
-                    'site': site_name,
-                    'status': 'no_content',
-                    'articles': [],
-                    'count': 0,
-                    'timestamp': datetime.now().isoformat()
-                }
-                
-        except Exception as e:
-            logger.error(f"ERROR {site_name}: Scraping failed - {e}")
+        if result['status'] == 'success':
+            logger.info(f"SUCCESS {site_name}: Successfully scraped {len(result['articles'])} articles in {result['elapsed_seconds']}s")
             return {
                 'site': site_name,
-                'status': 'error',
-                'error': str(e),
+                'status': 'success',
+                'articles': result['articles'],
+                'count': len(result['articles']),
+                'elapsed_seconds': result['elapsed_seconds'],
+                'timed_out': result.get('timed_out', False),
+                'timestamp': timestamp
+            }
+        elif result['status'] == 'no_content':
+            logger.warning(f"WARNING {site_name}: No articles found")
+            return {
+                'site': site_name,
+                'status': 'no_content',
                 'articles': [],
                 'count': 0,
-                'timestamp': datetime.now().isoformat()
+                'elapsed_seconds': result['elapsed_seconds'],
+                'timed_out': result.get('timed_out', False),
+                'timestamp': timestamp
+            }
+        else:
+            logger.error(f"ERROR {site_name}: Scraping failed - {result['error']}")
+            return {
+                'site': site_name,
+                'status': result['status'],
+                'error': result['error'],
+                'articles': [],
+                'count': 0,
+                'elapsed_seconds': result['elapsed_seconds'],
+                'timed_out': result.get('timed_out', False),
+                'timestamp': timestamp
             }
     
-    def scrape_all(self) -> Dict[str, Any]:
-        """Scrape all configured news sites."""
+    def scrape_all(self, concurrency: Optional[int] = None, site_deadline: Optional[float] = None,
+                   deadline: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Scrape all configured news sites concurrently.
+        
+        ``deadline`` bounds the whole run in seconds; sites cut short by it
+        keep what they scraped and are marked ``timed_out``.
+        """
         logger.info("Starting comprehensive news scraping...")
         
         results = {}
         total_articles = 0
         successful_sites = 0
         
-        for site_name in self.scrapers.keys():
-            result = self.scrape_site(site_name)
+        runner_scrapers = {
+            RUNNER_SITE_NAMES.get(site_name, site_name): scraper_func
+            for site_name, scraper_func in self.scrapers.items()
+        }
+        site_results = scrape_sites(runner_scrapers, concurrency, site_deadline, overall_deadline=deadline)
+        for site_name, site_result in zip(self.scrapers, site_results.values()):
+            result = self._build_result(dict(site_result, site=site_name))
             results[site_name] = result
             
             if result['status'] == 'success':
@@ -121,6 +148,7 @@ class NewsScraper:
             'total_sites': len(self.scrapers),
             'successful_sites': successful_sites,
             'total_articles': total_articles,
+            'timed_out_sites': sum(1 for result in results.values() if result['timed_out']),
             'success_rate': f"{(successful_sites / len(self.scrapers)) * 100:.1f}%",
             'timestamp': datetime.now().isoformat()
         }
@@ -151,9 +179,9 @@ class NewsScraper:
             print(f"\n📰 Detailed Results:")
             for site_name, result in results['results'].items():
                 status_emoji = "✅" if result['status'] == 'success' else "❌"
-                print(f"   {status_emoji} {site_name.title()}: {result['count']} articles")
+                print(f"   {status_emoji} {site_name.title()}: {result['count']} articles ({result.get('elapsed_seconds', 0)}s)")
                 
-                if result['status'] == 'error':
+                if result['status'] in ('error', 'timeout'):
                     print(f"      Error: {result['error']}")
         
         print("="*60)